@@ -0,0 +1,90 @@
+"""Per-string cost of the original normalize_text steps versus NormalizationEngine.
+
+Run from the repository root:
+
+    python benchmarks/bench_normalization.py [--strings 20000] [--repeat 5]
+
+Translation is disabled (it is served from the artist dictionary in real
+runs); transliteration uses the ``transliterate`` package.
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+import unicodedata
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from musiclikessync.normalization import NormalizationEngine  # noqa: E402
+
+WORDS = ['love', 'night', 'dance', 'summer', 'heart', 'fire', 'dream', 'city', 'light', 'baby']
+CYRILLIC_WORDS = ['Кино', 'группа', 'крови', 'звезда', 'ночь']
+HEBREW_WORDS = ['עומר', 'אדם', 'שיר', 'אהבה']
+SUFFIXES = ['', '', '', ' - Remix', ' - Original Mix', ' - Edit']
+DECORATIONS = ['', '', ' (Live)', '!', ' (feat. Guest)', " 'Acoustic'"]
+
+
+def generate_corpus(count, seed=1):
+    """Synthetic titles and artists with the mix of scripts and punctuation seen in real libraries."""
+    rnd = random.Random(seed)
+    corpus = []
+    for _ in range(count):
+        roll = rnd.random()
+        words = CYRILLIC_WORDS if roll < 0.1 else HEBREW_WORDS if roll < 0.15 else WORDS
+        text = ' '.join(rnd.choice(words) for _ in range(rnd.randint(1, 4))).title()
+        corpus.append(text + rnd.choice(DECORATIONS) + rnd.choice(SUFFIXES))
+    return corpus
+
+
+def legacy_normalize(text, transliterate_flag=False):
+    """The original normalize_text steps without cache and translation."""
+    from transliterate import get_available_language_codes, translit
+    text = re.sub(r' - (Original Mix|Remix|Edit|Version|Extended Mix|Instrumental)$', '', text, flags=re.IGNORECASE)
+    if re.search('[\u0590-\u05FF]', text):
+        language_code = 'he'
+    elif re.search('[\u0400-\u04FF]', text):
+        language_code = 'ru'
+    else:
+        language_code = 'en'
+    if transliterate_flag and language_code in get_available_language_codes():
+        text = translit(text, language_code, reversed=True)
+    text = unicodedata.normalize('NFKC', text)
+    text = text.lower().strip()
+    text = re.sub(r'[^\w\s]', '', text)
+    return re.sub(r'\s+', ' ', text)
+
+
+def best_of(repeat, fn):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--strings', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.strings)
+    engine = NormalizationEngine()
+    for transliterate_flag in (False, True):
+        legacy_time, expected = best_of(args.repeat, lambda: [legacy_normalize(text, transliterate_flag) for text in corpus])
+        engine_time, single = best_of(args.repeat, lambda: [engine.normalize(text, transliterate_flag)[0] for text in corpus])
+        batch_time, batch = best_of(args.repeat, lambda: engine.normalize_many(corpus, transliterate_flag))
+        assert single == expected and batch == expected, 'engine output differs from the original steps'
+
+        print(f'transliterate={transliterate_flag}')
+        for name, seconds in (('legacy', legacy_time), ('engine', engine_time), ('normalize_many', batch_time)):
+            per_string = seconds / len(corpus) * 1e6
+            print(f'  {name:<15} {per_string:8.2f} us/string  {legacy_time / seconds:5.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+"""Per-stage time, memory and API calls of the sync on a synthetic library.
+
+Run from the repository root:
+
+    python benchmarks/bench_pipeline.py [--tracks 1000] [--latency 0.0] [--rate-limit-every 0] [--json out.json]
+
+The pipeline's functions run unchanged against the in-process fakes from
+``benchmarks/fakes.py``. They work in a temporary directory, so every run
+starts with cold caches. Memory is the tracemalloc peak of the main
+process above its level at the start of each stage; work done in
+``PARALLEL_WORKERS`` processes is not included, so ``--workers 1`` (the
+default) gives comparable numbers. Pass ``--no-memory`` for timings
+without tracemalloc overhead.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fakes import FakeSpotify, FakeTranslationBackend, FakeYTMusic  # noqa: E402
+from benchmarks.synthetic import generate_library  # noqa: E402
+from musiclikessync import adding, config, context, likes, matching, text  # noqa: E402
+from musiclikessync.search_executor import SearchExecutor  # noqa: E402
+from musiclikessync.translation import ArtistDictionary, ArtistTranslator  # noqa: E402
+
+
+class Stages:
+    """Collect wall time, tracemalloc peak and API calls per pipeline stage."""
+
+    def __init__(self, api_calls, memory=True):
+        self.api_calls = api_calls
+        self.memory = memory
+        self.results = []
+
+    @contextmanager
+    def __call__(self, name):
+        calls = self.api_calls()
+        if self.memory:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        yield
+        result = {'stage': name, 'seconds': time.perf_counter() - started, 'api_calls': self.api_calls() - calls}
+        if self.memory:
+            result['peak_mb'] = (tracemalloc.get_traced_memory()[1] - baseline) / 2 ** 20
+        self.results.append(result)
+
+
+def run_pipeline(ytmusic, sp, stages, workers=1, search_workers=8, cascade=None):
+    """Run the batch pipeline stage by stage and return a summary of its outcome."""
+    with stages('fetch_likes'):
+        youtube_likes = likes.fetch_youtube_music_likes(ytmusic)
+        spotify_likes = likes.fetch_spotify_likes(sp)
+
+    with stages('normalize_text'):
+        featured = [artist for title in youtube_likes['title'] for artist in text.extract_featured_artists(title)[1]]
+        text.prefetch_translations(list(youtube_likes['artist']) + featured)
+        for title in youtube_likes['title']:
+            text.normalize_text(text.extract_featured_artists(title)[0])
+        for artist in youtube_likes['artist']:
+            text.normalize_text(artist, transliterate_flag=True, translate_flag=True)
+
+    with stages('clean_missing_songs'):
+        added_songs = likes.load_added_songs()
+        library_index = likes.build_library_index(spotify_likes, added_songs)
+        missing_songs = likes.clean_missing_songs(youtube_likes, library_index)
+
+    executor = SearchExecutor(sp.search, max_workers=search_workers, requests_per_second=1e6)
+    with stages('query_spotify_for_tracks'):
+        search_results = matching.query_spotify_for_tracks(sp, missing_songs.to_dict('records'),
+                                                           executor=executor, cascade=cascade)
+
+    with stages('calculate_similarity'):
+        scored = matching.calculate_similarity(search_results, workers=workers)
+
+    with stages('determine_best_matches'):
+        best_matches = matching.determine_best_matches(scored, workers=workers)
+
+    with stages('add_tracks_to_spotify'):
+        entries = adding.add_tracks_to_spotify(sp, library_index)
+
+    return {
+        'youtube_likes': len(youtube_likes),
+        'spotify_likes': len(spotify_likes),
+        'searched': len(missing_songs),
+        'selected': sum(1 for match in best_matches if match['status'] == 'selected'),
+        'added': sum(1 for entry in entries if entry['status'] == 'added'),
+        'rate_limited': sp.rate_limited,
+    }
+
+
+def benchmark(tracks=1000, seed=1, latency=0.0, rate_limit_every=0, retry_after=0.01, workers=1,
+              search_workers=8, cascade=None, memory=True):
+    """Generate a library, run the pipeline on it in a temporary directory and return the measurements."""
+    library = generate_library(tracks, seed)
+    ytmusic = FakeYTMusic(library['youtube_likes'], latency)
+    sp = FakeSpotify(library['catalog'], library['spotify_likes'], latency, rate_limit_every, retry_after)
+    translation_backend = FakeTranslationBackend(latency)
+
+    cwd = os.getcwd()
+    parallel_workers = config.PARALLEL_WORKERS
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        if memory:
+            tracemalloc.start()
+        try:
+            config.PARALLEL_WORKERS = workers
+            context.artist_translator = ArtistTranslator(translation_backend, ArtistDictionary(config.ARTIST_DICTIONARY_PATH))
+            stages = Stages(lambda: sum(sp.calls.values()) + ytmusic.calls + translation_backend.calls, memory)
+            summary = run_pipeline(ytmusic, sp, stages, workers, search_workers, cascade)
+        finally:
+            # Closed while the working directory is still the temporary one
+            context.close()
+            config.PARALLEL_WORKERS = parallel_workers
+            if memory:
+                tracemalloc.stop()
+            os.chdir(cwd)
+    return {'stages': stages.results, 'summary': summary}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tracks', type=int, default=1000, help='YouTube Music likes in the synthetic library')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every fake API call')
+    parser.add_argument('--rate-limit-every', type=int, default=0, help='answer every Nth Spotify call with a 429')
+    parser.add_argument('--retry-after', type=float, default=0.01)
+    parser.add_argument('--workers', type=int, default=1, help='PARALLEL_WORKERS for the CPU-bound stages')
+    parser.add_argument('--search-workers', type=int, default=8)
+    parser.add_argument('--no-cascade', action='store_true', help='run every query of each song')
+    parser.add_argument('--no-memory', action='store_true', help='skip tracemalloc')
+    parser.add_argument('--json', help='also write the measurements to this file')
+    args = parser.parse_args()
+    # Per-song log lines would drown the table; failures are still shown
+    logging.basicConfig(level=logging.ERROR)
+
+    measurements = benchmark(args.tracks, args.seed, args.latency, args.rate_limit_every, args.retry_after,
+                             args.workers, args.search_workers, False if args.no_cascade else None,
+                             not args.no_memory)
+
+    print(f'{"stage":<26} {"seconds":>9} {"peak MB":>9} {"API calls":>10}')
+    for result in measurements['stages']:
+        peak = f'{result["peak_mb"]:9.1f}' if 'peak_mb' in result else f'{"-":>9}'
+        print(f'{result["stage"]:<26} {result["seconds"]:9.3f} {peak} {result["api_calls"]:10d}')
+    print('summary:', measurements['summary'])
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(dict(measurements, arguments=vars(args)), f, indent=4)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+"""In-process stand-ins for YTMusic, spotipy.Spotify and the translation backend.
+
+Every fake can sleep a fixed ``latency`` per call to model network round
+trips. The Spotify fake can also answer every ``rate_limit_every``-th
+request with a 429 carrying ``Retry-After``. Call counters let a
+benchmark report API usage next to the timings.
+"""
+
+import re
+import threading
+import time
+
+from spotipy.exceptions import SpotifyException
+
+_QUERY_FIELD_PATTERN = re.compile(r'(track|artist|album):')
+_TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def _tokens(text):
+    return set(_TOKEN_PATTERN.findall(text.lower()))
+
+
+class FakeYTMusic:
+    """``get_liked_songs`` over a list of tracks, newest first, and ``search``/``rate_song`` over a catalogue.
+
+    Search returns the catalogue songs every word of whose title (without
+    a bracketed suffix such as ``(feat. ...)``) is in the query; a liked
+    song goes to the front of the likes.
+    """
+
+    def __init__(self, tracks, latency=0.0, catalog=()):
+        self.tracks = list(tracks)
+        self.latency = latency
+        self.catalog = {track['videoId']: track for track in catalog}
+        self.calls = 0
+        self.searches = 0
+        self.ratings = []
+        self._lock = threading.Lock()
+        self._index = {}
+        for track in catalog:
+            for token in _tokens(self._main_title(track)):
+                self._index.setdefault(token, []).append(track)
+
+    @staticmethod
+    def _main_title(track):
+        return track['title'].split(' (')[0]
+
+    def get_liked_songs(self, limit=100):
+        self.calls += 1
+        time.sleep(self.latency)
+        return {'tracks': self.tracks if limit is None else self.tracks[:limit]}
+
+    def search(self, query, filter=None, limit=20):
+        with self._lock:
+            self.searches += 1
+        time.sleep(self.latency)
+        tokens = _tokens(query)
+        candidates = {track['videoId']: track for token in tokens for track in self._index.get(token, [])}
+        songs = [track for track in candidates.values() if _tokens(self._main_title(track)) <= tokens]
+        return [dict(track, resultType='song') for track in songs[:limit]]
+
+    def rate_song(self, videoId, rating='INDIFFERENT'):
+        with self._lock:
+            self.ratings.append((videoId, rating))
+            if rating == 'LIKE' and videoId in self.catalog:
+                self.tracks.insert(0, self.catalog[videoId])
+        time.sleep(self.latency)
+        return {'actions': []}
+
+
+class FakeSpotify:
+    """The spotipy calls the sync makes, answered from a synthetic catalogue.
+
+    Search matches every word of the ``track:`` part of the query (or of
+    the whole query without field filters) against track titles, through
+    an inverted word index.
+    """
+
+    def __init__(self, catalog, saved_items=(), latency=0.0, rate_limit_every=0, retry_after=0.01):
+        self.catalog = {track['id']: track for track in catalog}
+        self.saved_items = list(saved_items)
+        self.latency = latency
+        self.rate_limit_every = rate_limit_every
+        self.retry_after = retry_after
+        self.calls = {}
+        self.rate_limited = 0
+        self._lock = threading.Lock()
+        self._index = {}
+        for track in catalog:
+            for token in _tokens(track['name']):
+                self._index.setdefault(token, []).append(track)
+
+    def _request(self, name):
+        with self._lock:
+            self.calls[name] = self.calls.get(name, 0) + 1
+            total = sum(self.calls.values())
+            limited = self.rate_limit_every and total % self.rate_limit_every == 0
+            if limited:
+                self.rate_limited += 1
+        time.sleep(self.latency)
+        if limited:
+            raise SpotifyException(429, -1, 'rate limited', headers={'Retry-After': str(self.retry_after)})
+
+    def search(self, q, limit=10, type='track'):
+        self._request('search')
+        if q.startswith('isrc:'):
+            return {'tracks': {'items': []}}
+        fields = _QUERY_FIELD_PATTERN.split(q)
+        title = fields[fields.index('track') + 1] if 'track' in fields else q
+        tokens = _tokens(title)
+        if not tokens:
+            return {'tracks': {'items': []}}
+        postings = [self._index.get(token, []) for token in tokens]
+        rarest = min(postings, key=len)
+        items = [track for track in rarest if tokens <= _tokens(track['name'])][:limit]
+        return {'tracks': {'items': items}}
+
+    def tracks(self, tracks, market=None):
+        self._request('tracks')
+        return {'tracks': [self.catalog.get(track_id) for track_id in tracks]}
+
+    def current_user_saved_tracks(self, limit=20, offset=0, market=None):
+        self._request('current_user_saved_tracks')
+        items = self.saved_items[offset:offset + limit]
+        has_next = offset + limit < len(self.saved_items)
+        return {'items': items, 'total': len(self.saved_items), 'limit': limit, 'offset': offset,
+                'next': 'next' if has_next else None}
+
+    def current_user_saved_tracks_add(self, tracks=None):
+        self._request('current_user_saved_tracks_add')
+        with self._lock:
+            self.saved_items[:0] = [{'added_at': None, 'track': self.catalog[track_id]}
+                                    for track_id in tracks if track_id in self.catalog]
+
+
+class FakeTranslationBackend:
+    """Translation backend that tags each text instead of calling Google."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+
+    def translate_batch(self, texts, language_code):
+        self.calls += 1
+        time.sleep(self.latency)
+        return [f'{text} {language_code}' for text in texts]
@@ -0,0 +1,115 @@
+"""Reproducible synthetic music libraries for the benchmarks.
+
+``generate_library`` builds a Spotify catalogue and, from it, a YouTube
+Music likes list and a Spotify likes list in the shapes the real APIs
+return. It includes Hebrew and Cyrillic artists, featured artists, mix
+suffixes and spelling drift between the services, so that every
+normalization and matching path is exercised.
+"""
+
+import random
+from datetime import datetime, timedelta, timezone
+
+WORDS = ['love', 'night', 'dance', 'summer', 'heart', 'fire', 'dream', 'city', 'light', 'baby', 'gold', 'river',
+         'rain', 'ocean', 'shadow', 'star', 'road', 'home', 'wild', 'echo', 'neon', 'storm', 'blue', 'silver']
+CYRILLIC_WORDS = ['Кино', 'группа', 'крови', 'звезда', 'ночь', 'лето', 'море', 'город', 'солнце']
+HEBREW_WORDS = ['עומר', 'אדם', 'שיר', 'אהבה', 'לילה', 'ים', 'אור', 'חלום']
+SUFFIXES = [' - Remix', ' - Original Mix', ' - Edit', ' - Extended Mix']
+
+
+def _name(rnd, words, low=1, high=3):
+    return ' '.join(rnd.choice(words) for _ in range(rnd.randint(low, high))).title()
+
+
+def _artist(rnd, index):
+    roll = rnd.random()
+    if roll < 0.08:
+        return f'{_name(rnd, CYRILLIC_WORDS, 1, 2)} {index}'
+    if roll < 0.13:
+        return f'{_name(rnd, HEBREW_WORDS, 1, 2)} {index}'
+    return f'{_name(rnd, WORDS, 1, 2)} {index}'
+
+
+def generate_catalog(size, seed=1):
+    """Return ``size`` Spotify track objects with unique IDs and titles."""
+    rnd = random.Random(seed)
+    artists = [_artist(rnd, index) for index in range(max(1, size // 8))]
+    catalog = []
+    for index in range(size):
+        title = f'{_name(rnd, WORDS)} {index}'
+        if rnd.random() < 0.1:
+            title += rnd.choice(SUFFIXES)
+        track_artists = [rnd.choice(artists)]
+        if rnd.random() < 0.1:
+            track_artists.append(rnd.choice(artists))
+        catalog.append({
+            'id': f'{index:022d}',
+            'name': title,
+            'artists': [{'name': artist} for artist in track_artists],
+            'album': {'name': f'{_name(rnd, WORDS, 1, 2)} Album'},
+        })
+    return catalog
+
+
+def youtube_track(track, rnd, video_id):
+    """Render a catalogue track the way YouTube Music lists it, with some spelling drift."""
+    title = track['name']
+    artists = [artist['name'] for artist in track['artists']]
+    if len(artists) > 1:
+        title = f'{title} (feat. {artists[1]})'
+    roll = rnd.random()
+    if roll < 0.05:
+        title = title.upper()
+    elif roll < 0.1:
+        title += '!'
+    return {
+        'videoId': video_id,
+        'title': title,
+        'artists': [{'name': artists[0]}],
+        'album': None if rnd.random() < 0.2 else {'name': track['album']['name']},
+    }
+
+
+def saved_item(track, added_at):
+    return {'added_at': added_at.strftime('%Y-%m-%dT%H:%M:%SZ'), 'track': track}
+
+
+def generate_library(tracks, seed=1, spotify_overlap=0.5, unknown=0.1):
+    """Generate a catalogue and the likes of one user.
+
+    Parameters:
+        tracks (int): Number of YouTube Music likes.
+        seed (int): Random seed; the same arguments always give the same library.
+        spotify_overlap (float): Share of the YouTube likes already liked on Spotify.
+        unknown (float): Share of the YouTube likes missing from the Spotify catalogue.
+
+    Returns:
+        dict: ``catalog`` (searchable Spotify tracks), ``youtube_likes``
+        (``get_liked_songs`` tracks, newest first), ``spotify_likes``
+        (saved-tracks items, newest first) and ``youtube_catalog`` (the
+        catalogue as YouTube Music lists it, searchable for the reverse
+        sync; the liked songs keep their videoIds).
+    """
+    rnd = random.Random(seed)
+    catalog = generate_catalog(tracks * 2, seed)
+    liked = rnd.sample(catalog, tracks)
+
+    youtube_likes = []
+    for index, track in enumerate(liked):
+        if rnd.random() < unknown:
+            track = dict(track, name=f'{_name(rnd, WORDS)} unreleased {index}')
+        youtube_likes.append(youtube_track(track, rnd, f'yt{index:09d}'))
+
+    spotify_liked = [track for track in liked if rnd.random() < spotify_overlap]
+    spotify_liked += rnd.sample(catalog, tracks // 4)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    spotify_likes = [saved_item(track, start - timedelta(minutes=position))
+                     for position, track in enumerate(dict((track['id'], track) for track in spotify_liked).values())]
+
+    # A generator of its own keeps the other lists the same as before the catalogue existed
+    catalog_rnd = random.Random(seed + 1)
+    video_ids = {track['id']: youtube_like['videoId'] for track, youtube_like in zip(liked, youtube_likes)}
+    youtube_catalog = [youtube_track(track, catalog_rnd, video_ids.get(track['id'], f'ytc{index:09d}'))
+                       for index, track in enumerate(catalog)]
+    return {'catalog': catalog, 'youtube_likes': youtube_likes, 'spotify_likes': spotify_likes,
+            'youtube_catalog': youtube_catalog}
@@ -0,0 +1 @@
+"""Helpers for syncing YouTube Music likes into Spotify."""
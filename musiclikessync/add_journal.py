@@ -0,0 +1,74 @@
+"""Write-ahead journal of the tracks added to Spotify.
+
+Before each batch of IDs is sent, an intent record listing them is
+appended to the added-songs log. The batch's log entries follow as soon
+as the API call returns. With the JSON Lines store every append is
+fsynced, so an interrupted run loses at most the batch in flight. The
+log is always stored as JSON Lines (``JOURNAL_FORMAT``).
+
+``compact`` runs when the log is loaded. It returns the entries without
+intent records and duplicates, and it reports IDs whose batch never
+completed. Saving a track twice is harmless, so those tracks are simply
+retried. Every batch leaves an intent record behind, so the log is only
+rewritten once the dropped records outnumber ``COMPACT_RATIO`` times the
+entries kept: rewriting costs a pass over the whole log, which is
+amortized over the runs that appended the dropped records.
+"""
+
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+INTENT_EVENT = 'write_intent'
+
+# The journal only appends, so it is kept as JSON Lines whatever STORAGE_FORMAT is:
+# the json store would rewrite the whole log for every batch
+JOURNAL_FORMAT = 'jsonl'
+
+# Dropped records per kept entry above which the log is rewritten
+COMPACT_RATIO = 0.5
+
+
+def is_intent(record):
+    return record.get('event') == INTENT_EVENT
+
+
+class AddJournal:
+    """Append-only add log on top of a data store (see ``storage``)."""
+
+    def __init__(self, store, compact_ratio=COMPACT_RATIO):
+        self.store = store
+        self.compact_ratio = compact_ratio
+
+    def begin(self, spotify_ids):
+        """Record that ``spotify_ids`` are about to be saved."""
+        if spotify_ids:
+            self.store.append([{'event': INTENT_EVENT, 'spotify_ids': list(spotify_ids)}])
+
+    def record(self, log_entries):
+        """Append the entries of attempted tracks; entries of tracks not attempted are not kept."""
+        entries = [entry for entry in log_entries if entry['status'] != 'not attempted']
+        if entries:
+            self.store.append(entries)
+
+    def compact(self):
+        """Return the log entries without intent records or duplicates, rewriting the log once enough are dropped."""
+        records = self.store.read() if self.store.exists() else []
+        entries = []
+        seen = set()
+        unconfirmed = {}
+        for record in records:
+            if is_intent(record):
+                unconfirmed.update(dict.fromkeys(record['spotify_ids']))
+                continue
+            unconfirmed.pop(record.get('spotify_id'), None)
+            key = json.dumps(record, sort_keys=True, ensure_ascii=False)
+            if key not in seen:
+                seen.add(key)
+                entries.append(record)
+        if unconfirmed:
+            logger.warning(f"{len(unconfirmed)} tracks from an interrupted batch have no outcome and will be retried")
+        if len(records) - len(entries) > self.compact_ratio * len(entries):
+            self.store.write(entries)
+        return entries
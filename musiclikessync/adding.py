@@ -0,0 +1,219 @@
+"""Adding the selected tracks to the Spotify library, in batches or streamed."""
+
+import logging
+import time
+
+from . import config
+from .add_journal import AddJournal
+from .context import data_store, run_metrics
+from .library_index import LibraryIndex
+from .library_writer import SPOTIFY_MAX_IDS_PER_CALL, AdaptivePacer, BatchedLibraryWriter
+from .likes import added_songs_log
+from .matching import _score_items, _select_best_chunk, count_pruned, default_search_executor, prepare_song, search_song
+from .providers import SpotifyProvider
+from .streaming import background, batched, bounded_map
+
+logger = logging.getLogger(__name__)
+
+# Songs processed, seconds until the first batch was added and total seconds
+stream_stats = {'songs': 0}
+
+
+def check_if_already_added(spotify_id, added_songs):
+    """Check if a track with the given spotify_id is already in the library index or added songs list."""
+    if isinstance(added_songs, LibraryIndex):
+        return spotify_id in added_songs
+    if 'spotify_id' not in added_songs.columns:
+        return False
+    return spotify_id in set(added_songs['spotify_id'])
+
+
+def library_writer(provider):
+    """Return a writer saving tracks to ``provider``'s library in batches of its size."""
+    return BatchedLibraryWriter(provider.save, batch_size=provider.write_batch_size,
+                                pacer=AdaptivePacer(sleep=run_metrics.sleeper('write_throttle_wait')))
+
+
+def default_library_writer(sp):
+    return library_writer(SpotifyProvider(sp))
+
+
+def pending_spotify_id(match, library_index):
+    """Return the ID of a selected track that still needs adding, else None."""
+    spotify_id = match['best_variant'].get('spotify_id')
+    if match['status'] == 'selected' and spotify_id and not check_if_already_added(spotify_id, library_index):
+        return spotify_id
+    return None
+
+
+def add_matches(matches, library_index, writer, journal=None):
+    """Add the selected tracks among ``matches`` and return one log entry per match.
+
+    Matches are processed in consecutive groups needing one library write
+    each; with ``journal`` (an ``AddJournal``) every group's IDs are
+    journaled before the write and its log entries right after it.
+    """
+    log_entries = []
+    for group in _write_groups(matches, library_index, writer.batch_size):
+        log_entries.extend(_add_group(group, library_index, writer, journal))
+    return log_entries
+
+
+def _write_groups(matches, library_index, batch_size):
+    group, group_ids = [], set()
+    for match in matches:
+        spotify_id = pending_spotify_id(match, library_index)
+        if spotify_id and spotify_id not in group_ids and len(group_ids) >= batch_size:
+            yield group
+            group, group_ids = [], set()
+        if spotify_id:
+            group_ids.add(spotify_id)
+        group.append(match)
+    if group:
+        yield group
+
+
+def _add_group(matches, library_index, writer, journal=None):
+    # Collect every selected track that still needs adding and add them in one batch
+    pending_ids = [spotify_id for spotify_id in (pending_spotify_id(match, library_index) for match in matches) if spotify_id]
+    if journal is not None:
+        journal.begin(pending_ids)
+    outcomes = writer.write(pending_ids)
+    library_index.update(track_id for track_id, (status, _) in outcomes.items() if status == 'added')
+
+    log_entries = []
+    for match in matches:
+        spotify_id = match['best_variant'].get('spotify_id')
+        if match['status'] == 'selected' and spotify_id:
+            if spotify_id in outcomes:
+                status, reason = outcomes[spotify_id]
+                if status == 'added':
+                    logger.info(f"Added: {match['original_title']} by {match['original_artist']} - {reason}")
+                else:
+                    logger.error(f"Failed to add: {match['original_title']} by {match['original_artist']} - {reason}")
+            else:
+                status = 'not added'
+                reason = 'Track already added'
+                logger.info(f"Already added: {match['original_title']} by {match['original_artist']} - {reason}")
+        else:
+            status = 'not attempted'
+            reason = 'Track not selected due to low similarity score or missing Spotify ID'
+            logger.warning(f"Not attempted: {match['original_title']} by {match['original_artist']} - {reason}")
+
+        # Prepare the log entry
+        log_entries.append({
+            "original_title": match['original_title'],
+            "original_artist": match['original_artist'],
+            "original_album": match['original_album'],
+            "query_title": match['best_variant'].get('query_title'),
+            "query_artist": match['best_variant'].get('query_artist'),
+            "query_album": match['best_variant'].get('query_album'),
+            "spotify_title": match['best_variant'].get('spotify_title'),
+            "spotify_artist": match['best_variant'].get('spotify_artist'),
+            "spotify_album": match['best_variant'].get('spotify_album'),
+            "spotify_id": spotify_id,
+            "similarity_score": match['best_variant'].get('similarity_score', 0),  # Ensure default if not available
+            "status": status,
+            "reason": reason
+        })
+
+    if journal is not None:
+        journal.record(log_entries)
+    return log_entries
+
+
+def added_songs_journal(store_name='added_songs_to_spotify'):
+    """Return the write-ahead journal kept in the added-songs log."""
+    return AddJournal(added_songs_log(store_name))
+
+
+@run_metrics.timed()
+def add_tracks_to_spotify(sp, library_index, writer=None):
+    """Add selected tracks to Spotify from best matches and log each attempt.
+
+    ``library_index`` (a ``LibraryIndex``, or the added-songs DataFrame)
+    answers whether a track is already in the library and is updated with
+    every track added. Tracks are saved in batches of up to 50 IDs through
+    ``writer`` (a ``BatchedLibraryWriter`` by default), which paces, retries
+    and bisects failing batches; each match still gets its own log entry.
+    Entries are journaled as every batch completes, so an interrupted run
+    keeps the record of the tracks it already added.
+
+    Returns the log entries of this run, including tracks not attempted.
+    """
+    run_entries = []
+    try:
+        match_store = data_store('match_results')
+        if not match_store.exists():
+            raise FileNotFoundError(match_store.path)
+        matches = match_store.read()
+
+        if writer is None:
+            writer = default_library_writer(sp)
+        if not isinstance(library_index, LibraryIndex):
+            library_index = LibraryIndex(library_index['spotify_id'] if 'spotify_id' in library_index.columns else ())
+
+        run_entries = add_matches(matches, library_index, writer, added_songs_journal())
+
+        logger.info(f"Library writes: {writer.stats()}")
+
+    except FileNotFoundError:
+        logger.error("Match results file not found.")
+    except Exception as e:
+        logger.error(f"Failed to add tracks: {e}")
+
+    return run_entries
+
+
+def score_song(song_result):
+    """Score one song's variants in this process, recording the throughput in the run metrics."""
+    unscored = sum(1 for variant in song_result.variants if variant.similarity_score is None)
+    with run_metrics.timer('score_variants', items=unscored):
+        _score_items([song_result])
+    count_pruned([song_result])
+    return song_result
+
+
+@run_metrics.timed()
+def stream_sync(sp, songs, library_index, max_results=50, executor=None, writer=None,
+                buffer_size=None, batch_size=SPOTIFY_MAX_IDS_PER_CALL):
+    """Sync ``songs`` through a chain of generators with bounded buffers.
+
+    Songs are searched concurrently on ``executor``'s workers, scored and
+    selected as they arrive, and added in batches of ``batch_size`` while
+    later songs are still being searched, so memory no longer grows with
+    the number of songs. No stage runs more than ``buffer_size`` songs
+    (``STREAM_BUFFER_SIZE`` by default) ahead of the next. The search and
+    match results are not stored; the added-songs log is appended to
+    after every batch. A track selected for several songs is added with
+    the first batch and logged as already added afterwards.
+
+    Returns the log entries of this run, including tracks not attempted.
+    """
+    if executor is None:
+        executor = default_search_executor(sp)
+    if writer is None:
+        writer = default_library_writer(sp)
+    if buffer_size is None:
+        buffer_size = config.STREAM_BUFFER_SIZE
+
+    started = time.monotonic()
+    prepared_songs = (prepare_song(song) for song in songs)
+    song_results = bounded_map(lambda prepared: search_song(executor, prepared, max_results), prepared_songs,
+                               max_workers=executor.max_workers, max_pending=buffer_size)
+    scored_results = (score_song(song_result) for song_result in song_results)
+    matches = (best_match for song_result in scored_results for best_match in _select_best_chunk([song_result]))
+
+    run_entries = []
+    journal = added_songs_journal()
+    try:
+        for batch in batched(background(matches, buffer_size), batch_size):
+            log_entries = add_matches(batch, library_index, writer, journal)
+            if 'first_batch_seconds' not in stream_stats:
+                stream_stats['first_batch_seconds'] = time.monotonic() - started
+            stream_stats['songs'] += len(batch)
+            run_entries.extend(log_entries)
+    finally:
+        stream_stats['seconds'] = time.monotonic() - started
+        logger.info(f"Library writes: {writer.stats()}")
+    return run_entries
@@ -0,0 +1,131 @@
+"""Syncing many accounts in one run, from a manifest of account pairs.
+
+A manifest is a JSON file listing the YouTube Music / Spotify account
+pairs to sync::
+
+    {"accounts": [
+        {"name": "alice",
+         "spotify_credentials": "./Auth/alice/spotify_credentials.json",
+         "ytmusic_auth": "./Auth/alice/headers_auth.json",
+         "data_dir": "data/accounts/alice"}
+    ]}
+
+Only ``name`` is required; the paths default to ``./Auth/<name>/`` and
+``BATCH_DATA_DIR/<name>``. ``run_batch`` syncs up to
+``BATCH_ACCOUNT_WORKERS`` accounts at once, each in its own thread. Every
+account has its own API clients, likes, match results, sync state and
+search rate limiter (see ``context.use_account``). The normalization
+cache, artist translations and search cache are shared, so an artist or
+query one account already resolved costs the others nothing. A
+``FairScheduler`` shares ``BATCH_REQUESTS_PER_SECOND`` Spotify requests
+between the accounts in turn.
+"""
+
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import config, context
+from .context import run_metrics
+from .pipeline import SyncRun
+from .scheduler import FairScheduler, ScheduledClient
+
+logger = logging.getLogger(__name__)
+
+
+class Account:
+    """One account pair of a batch.
+
+    Parameters:
+        name (str): Unique name, used for the default paths and in the run report.
+        spotify_credentials_path (str): Spotify app credentials of the account.
+        ytmusic_auth_path (str): Saved YouTube Music headers of the account.
+        data_dir (str): Directory of the account's likes, logs and state.
+        clients (dict): ``ytmusic`` and ``sp`` clients to use instead of
+            creating them from the credentials (e.g. fakes).
+    """
+
+    def __init__(self, name, spotify_credentials_path=None, ytmusic_auth_path=None, data_dir=None, clients=None):
+        self.name = name
+        self.spotify_credentials_path = spotify_credentials_path or os.path.join('.', 'Auth', name, 'spotify_credentials.json')
+        self.ytmusic_auth_path = ytmusic_auth_path or os.path.join('.', 'Auth', name, 'headers_auth.json')
+        self.data_dir = data_dir or os.path.join(config.BATCH_DATA_DIR, name)
+        self.clients = dict(clients or {})
+        # The account's own objects while it is synced, see context.use_account
+        self.objects = {}
+
+
+def load_manifest(path):
+    """Read the accounts of a manifest file."""
+    with open(path, encoding='utf-8') as f:
+        manifest = json.load(f)
+    accounts = []
+    for entry in manifest.get('accounts', []):
+        if not entry.get('name'):
+            raise ValueError(f"Account without a name in {path}: {entry}")
+        accounts.append(Account(entry['name'], entry.get('spotify_credentials'), entry.get('ytmusic_auth'), entry.get('data_dir')))
+    names = [account.name for account in accounts]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Duplicate account names in {path}: {', '.join(duplicates)}")
+    return accounts
+
+
+def sync_account(account, scheduler, dry_run=False):
+    """Sync one account in this thread, its Spotify calls scheduled by ``scheduler``; return its summary."""
+    started = time.monotonic()
+    with context.use_account(account):
+        for name, client in account.clients.items():
+            service = 'spotify' if name == 'sp' else name
+            account.objects[name] = run_metrics.instrument(client, f'{service}:{account.name}')
+        run = SyncRun(context.ytmusic, ScheduledClient(context.sp, scheduler, account.name))
+        entries = run.sync(dry_run=dry_run)
+        if run.best_matches:
+            matched = sum(1 for best_match in run.best_matches if best_match['status'] == 'selected')
+        else:
+            matched = sum(1 for entry in entries if entry['status'] != 'not attempted')
+        return {
+            'youtube_likes': len(run.youtube_likes),
+            'missing': len(run.missing_songs),
+            'matched': matched,
+            'added': sum(1 for entry in entries if entry['status'] == 'added'),
+            'seconds': time.monotonic() - started,
+        }
+
+
+def run_batch(accounts, dry_run=False, workers=None, requests_per_second=None):
+    """Sync ``accounts`` concurrently and return a summary per account, in order.
+
+    ``workers`` (``BATCH_ACCOUNT_WORKERS`` by default) accounts are synced
+    at once, sharing ``requests_per_second`` (``BATCH_REQUESTS_PER_SECOND``)
+    Spotify requests. An account that fails is reported with its error and
+    does not stop the others. With several accounts at once the CPU-bound
+    stages run in each account's thread, as forking worker processes from
+    several threads is not safe.
+    """
+    workers = workers or config.BATCH_ACCOUNT_WORKERS
+    scheduler = FairScheduler(requests_per_second or config.BATCH_REQUESTS_PER_SECOND)
+
+    def sync(account):
+        try:
+            return dict(account=account.name, **sync_account(account, scheduler, dry_run))
+        except Exception as e:
+            logger.exception(f"Sync of account {account.name} failed")
+            return {'account': account.name, 'error': repr(e)}
+
+    parallel_workers = config.PARALLEL_WORKERS
+    if workers > 1:
+        config.PARALLEL_WORKERS = 1
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(sync, accounts))
+    finally:
+        config.PARALLEL_WORKERS = parallel_workers
+
+    requests = scheduler.stats()
+    for result in results:
+        result.update(requests.get(result['account'], {'requests': 0, 'wait_seconds': 0.0}))
+        run_metrics.set_section(f"account_{result['account']}", result)
+    return results
@@ -0,0 +1,262 @@
+"""Reverse (Spotify -> YouTube Music) and bidirectional syncs.
+
+``ReverseSyncRun`` likes the Spotify likes missing from YouTube Music on
+YouTube Music. It runs the same search, score, select and add stages as
+``SyncRun`` through ``providers.YouTubeMusicProvider``, keeping its
+results in data sets of its own (``match_results_ytmusic``,
+``added_songs_to_ytmusic``, ...).
+
+``BidirectionalSync`` fetches both libraries, diffs them once
+(``library_diff``: each library is normalized once and indexed by
+normalized (title, artist)), then runs the two directions concurrently.
+Pairs spelled differently on the two services are found once, by the
+forward direction's prematch and identity resolution, and dropped from
+the reverse delta. Both directions share the normalization cache, the
+artist translations, the search cache and the identity store, in which
+each records the pairs it matched, so neither searches for a pair the
+other already knows.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from . import config, context
+from .adding import add_matches, added_songs_journal, library_writer
+from .context import data_store, run_metrics
+from .library_index import LibraryIndex
+from .likes import added_songs_log, load_added_songs, read_or_fetch_spotify_likes, read_or_fetch_youtube_likes
+from .matching import (calculate_similarity, determine_best_matches, new_song_result, prematch_songs, prepare_song,
+                       query_tracks)
+from .pipeline import SyncRun
+from .providers import YouTubeMusicProvider
+from .text import normalize_column
+
+logger = logging.getLogger(__name__)
+
+YOUTUBE_ADDED_STORE = 'added_songs_to_ytmusic'
+REVERSE_MATCH_STORE = 'match_results_ytmusic'
+
+# Songs liked on YouTube Music, and songs resolved without searching, by the reverse sync
+reverse_stats = {'songs': 0, 'prematched': 0, 'identities': 0, 'searched': 0, 'liked': 0}
+
+
+def _song_keys(songs, title='title', artist='artist'):
+    return list(zip(normalize_column(songs[title].fillna('')), normalize_column(songs[artist].fillna(''))))
+
+
+def _library_index(track_ids, song_keys, added_songs):
+    """Index a library and the log of the songs added to it by ID and normalized (title, artist)."""
+    library_index = LibraryIndex(track_ids, song_keys)
+    added_keys = ()
+    if {'original_title', 'original_artist'} <= set(added_songs.columns):
+        added_keys = _song_keys(added_songs, 'original_title', 'original_artist')
+    library_index.update(added_songs.get('spotify_id', ()), added_keys)
+    return library_index
+
+
+@run_metrics.timed()
+def library_diff(youtube_likes, spotify_likes, added_to_spotify, added_to_youtube):
+    """Diff the two libraries in one pass.
+
+    Parameters:
+        youtube_likes (pd.DataFrame): YouTube Music likes with title, artist, album and videoId columns.
+        spotify_likes (pd.DataFrame): Spotify likes with title, artist, album and spotify_id columns.
+        added_to_spotify (pd.DataFrame): The log of songs added to Spotify.
+        added_to_youtube (pd.DataFrame): The log of songs liked on YouTube Music.
+
+    Returns:
+        tuple: The Spotify and YouTube Music ``LibraryIndex``, the YouTube
+            likes missing from Spotify and the Spotify likes missing from
+            YouTube Music.
+    """
+    youtube_keys = _song_keys(youtube_likes)
+    spotify_keys = _song_keys(spotify_likes)
+    spotify_index = _library_index(spotify_likes.get('spotify_id', ()), spotify_keys, added_to_spotify)
+    youtube_index = _library_index(youtube_likes.get('videoId', ()), youtube_keys, added_to_youtube)
+    youtube_only = youtube_likes.loc[[key not in spotify_index.song_keys for key in youtube_keys]].copy()
+    spotify_only = spotify_likes.loc[[key not in youtube_index.song_keys for key in spotify_keys]].copy()
+    return spotify_index, youtube_index, youtube_only, spotify_only
+
+
+def record_reverse_identities(songs, entries, source='reverse'):
+    """Remember the videoId every Spotify like was matched to with confidence, keyed like the forward matches."""
+    spotify_ids = {}
+    for title, artist, album, spotify_id in zip(songs['title'], songs['artist'], songs['album'], songs['spotify_id']):
+        if isinstance(spotify_id, str) and spotify_id:
+            spotify_ids.setdefault((title, artist, album), spotify_id)
+
+    identities = {}
+    for entry in entries:
+        video_id = entry.get('spotify_id') or entry.get('best_variant', {}).get('spotify_id')
+        if not video_id or entry.get('status') == 'not attempted':
+            continue
+        spotify_id = spotify_ids.get((entry['original_title'], entry['original_artist'], entry['original_album']))
+        if spotify_id:
+            identities[video_id] = spotify_id
+    identity_store = context.identity_store
+    known = identity_store.lookup(identities)
+    identity_store.record({video_id: spotify_id for video_id, spotify_id in identities.items()
+                           if known.get(video_id) != spotify_id}, source)
+
+
+class ReverseSyncRun:
+    """One Spotify -> YouTube Music sync, step by step, like ``SyncRun``.
+
+    ``find_missing`` takes the Spotify likes missing from YouTube Music,
+    e.g. from ``library_diff``; ``youtube_likes``, ``added_songs`` (the log
+    of the songs liked by earlier runs) and ``library_index`` describe the
+    YouTube Music library.
+    """
+
+    def __init__(self, ytmusic, youtube_likes, added_songs, library_index):
+        self.provider = YouTubeMusicProvider(ytmusic)
+        self.youtube_likes = youtube_likes
+        self.added_songs = added_songs
+        self.library_index = library_index
+        self.missing_songs = None
+        self.songs_to_search = None
+        self.identity_matches = []
+        self.best_matches = []
+        self.entries = []
+
+    def find_missing(self, missing_songs, prematch=True):
+        """Resolve the songs that need no search and return the songs left to search.
+
+        With ``prematch`` (and ``PREMATCH``) songs matching a YouTube Music
+        like locally are dropped; songs whose videoId the identity store
+        knows are matched without searching.
+        """
+        reverse_stats['songs'] += len(missing_songs)
+        if prematch and config.PREMATCH and not missing_songs.empty:
+            # The YouTube Music library in the layout prematch_songs reads
+            library = self.youtube_likes.rename(columns={'videoId': 'spotify_id'})
+            songs = missing_songs
+            missing_songs, prematched_songs = prematch_songs(songs, library, self.added_songs,
+                                                             store_name='prematch_results_ytmusic')
+            reverse_stats['prematched'] += len(prematched_songs)
+            if config.IDENTITY_RESOLUTION:
+                record_reverse_identities(songs, prematched_songs, source='prematch')
+        self.missing_songs = missing_songs
+
+        self.songs_to_search, self.identity_matches = missing_songs, []
+        if config.IDENTITY_RESOLUTION and not missing_songs.empty:
+            self.songs_to_search, self.identity_matches = self.resolve_identities(missing_songs)
+        return self.songs_to_search
+
+    def resolve_identities(self, songs):
+        """Match the songs whose Spotify ID the identity store knows the videoId of."""
+        video_ids = context.identity_store.lookup_videos(songs['spotify_id'])
+        matches = []
+        for song in songs.to_dict('records'):
+            video_id = video_ids.get(song['spotify_id'])
+            if video_id is None:
+                continue
+            song, normalized_title, normalized_artist, normalized_album, _ = prepare_song(song, self.provider)
+            song_result = new_song_result(song, normalized_title, normalized_artist, normalized_album)
+            variant = song_result.add_tracks([{'id': video_id, 'name': song['title'], 'artists': [{'name': song['artist']}],
+                                               'album': {'name': song['album']}}])[0]
+            variant.similarity_score = 1.0
+            matches.append({
+                "original_title": song_result.title,
+                "original_artist": song_result.artist,
+                "original_album": song_result.album,
+                "best_variant": variant.to_dict(song_result),
+                "status": "selected",
+                "reason": "Resolved by track identity"
+            })
+        reverse_stats['identities'] += len(matches)
+        return songs.loc[[spotify_id not in video_ids for spotify_id in songs['spotify_id']]].copy(), matches
+
+    def match(self):
+        """Search YouTube Music for the songs left to search and store the matches in data/match_results_ytmusic."""
+        songs = self.songs_to_search.head(config.SEARCH_LIMIT).to_dict('records')
+        reverse_stats['searched'] += len(songs)
+        search_results = query_tracks(self.provider, songs, store_name='search_results_ytmusic')
+        search_results_with_scores = calculate_similarity(search_results)
+        self.best_matches = determine_best_matches(search_results_with_scores, resolved=self.identity_matches,
+                                                   store_name=REVERSE_MATCH_STORE)
+        return self.best_matches
+
+    def add(self):
+        """Like the selected songs in data/match_results_ytmusic on YouTube Music and return the log entries."""
+        match_store = data_store(REVERSE_MATCH_STORE)
+        if not match_store.exists():
+            logger.error("Reverse match results file not found.")
+            return self.entries
+        writer = library_writer(self.provider)
+        self.entries = add_matches(match_store.read(), self.library_index, writer, added_songs_journal(YOUTUBE_ADDED_STORE))
+        logger.info(f"YouTube Music writes: {writer.stats()}")
+        reverse_stats['liked'] += sum(1 for entry in self.entries if entry['status'] == 'added')
+        if config.IDENTITY_RESOLUTION:
+            record_reverse_identities(self.missing_songs, self.entries)
+        return self.entries
+
+    def match_and_add(self, dry_run=False):
+        """Match, and unless ``dry_run`` like the selected songs."""
+        self.match()
+        if dry_run:
+            return []
+        return self.add()
+
+
+class BidirectionalSync:
+    """Sync both ways from one diff of the two libraries.
+
+    Parameters:
+        ytmusic: YouTube Music client.
+        sp: Spotify client.
+        forward (bool): Add the YouTube Music likes missing from Spotify.
+        reverse (bool): Like the Spotify likes missing from YouTube Music.
+    """
+
+    def __init__(self, ytmusic, sp, forward=True, reverse=True):
+        self.ytmusic = ytmusic
+        self.sp = sp
+        self.directions = {'youtube_to_spotify': forward, 'spotify_to_youtube': reverse}
+        self.forward = None
+        self.reverse = None
+
+    def prepare(self, refresh=True):
+        """Fetch both libraries (or read the stored ones without ``refresh``), diff them and resolve what needs no search."""
+        youtube_likes = read_or_fetch_youtube_likes(self.ytmusic, refresh=refresh).drop_duplicates()
+        spotify_likes = read_or_fetch_spotify_likes(self.sp, refresh=refresh)
+        added_to_spotify = load_added_songs()
+        added_to_youtube = load_added_songs(added_songs_log(YOUTUBE_ADDED_STORE))
+        spotify_index, youtube_index, youtube_only, spotify_only = library_diff(
+            youtube_likes, spotify_likes, added_to_spotify, added_to_youtube)
+        print(f"Library diff: {len(youtube_only)} YouTube Music likes missing from Spotify, "
+              f"{len(spotify_only)} Spotify likes missing from YouTube Music")
+
+        paired_ids = set()
+        if self.directions['youtube_to_spotify']:
+            self.forward = SyncRun(self.ytmusic, self.sp)
+            self.forward.youtube_likes, self.forward.spotify_likes = youtube_likes, spotify_likes
+            self.forward.added_songs, self.forward.library_index = added_to_spotify, spotify_index
+            self.forward.find_missing(youtube_only)
+            # Spotify likes the forward direction paired with a YouTube Music like are on both services already
+            paired_ids = {match['best_variant'].get('spotify_id')
+                          for match in self.forward.prematched_songs + self.forward.identity_matches}
+        if self.directions['spotify_to_youtube']:
+            self.reverse = ReverseSyncRun(self.ytmusic, youtube_likes, added_to_youtube, youtube_index)
+            spotify_only = spotify_only.loc[[spotify_id not in paired_ids for spotify_id in spotify_only['spotify_id']]]
+            # Without the forward direction the reverse one has to look for those pairs itself
+            self.reverse.find_missing(spotify_only.copy(), prematch=self.forward is None)
+
+    def sync(self, dry_run=False, refresh=True):
+        """Prepare, then run the directions concurrently; return the log entries of each."""
+        self.prepare(refresh=refresh)
+        runs = {name: run for name, run in [('youtube_to_spotify', self.forward), ('spotify_to_youtube', self.reverse)]
+                if run is not None}
+        parallel_workers = config.PARALLEL_WORKERS
+        if len(runs) > 1:
+            # Forking worker processes from two threads is not safe
+            config.PARALLEL_WORKERS = 1
+        try:
+            with ThreadPoolExecutor(max_workers=len(runs) or 1) as pool:
+                futures = {name: pool.submit(run.match_and_add, dry_run) for name, run in runs.items()}
+                entries = {name: future.result() for name, future in futures.items()}
+        finally:
+            config.PARALLEL_WORKERS = parallel_workers
+        if self.reverse is not None:
+            run_metrics.set_section('reverse_sync', reverse_stats)
+        return entries
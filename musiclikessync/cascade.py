@@ -0,0 +1,63 @@
+"""Early-exit execution of a song's search queries.
+
+``generate_queries`` emits queries in order of expected precision. Rather
+than running all of them, ``QueryCascade`` runs them one at a time, scores
+each batch of hits immediately and stops as soon as a batch contains a
+variant above the selection threshold. The number of queries skipped is
+kept as a metric.
+"""
+
+import threading
+
+
+class QueryCascade:
+    """Run queries in order until one of them produces a selectable match.
+
+    Parameters:
+        threshold (float): Score a variant must exceed to stop the cascade; use the
+            same value as the selection in ``determine_best_matches``.
+    """
+
+    def __init__(self, threshold=0.8):
+        self.threshold = threshold
+        self.songs = 0
+        self.queries_planned = 0
+        self.queries_executed = 0
+        self.early_exits = 0
+        self._lock = threading.Lock()
+
+    def run(self, queries, execute, score):
+        """Execute ``queries`` in order and return the batches that were run.
+
+        ``execute(query)`` returns a batch of variants and ``score(batch)``
+        returns the best similarity score within that batch.
+        """
+        batches = []
+        stopped_early = False
+        for position, query in enumerate(queries):
+            batch = execute(query)
+            batches.append(batch)
+            if score(batch) > self.threshold:
+                stopped_early = position < len(queries) - 1
+                break
+        with self._lock:
+            self.songs += 1
+            self.queries_planned += len(queries)
+            self.queries_executed += len(batches)
+            self.early_exits += int(stopped_early)
+        return batches
+
+    @property
+    def queries_saved(self):
+        return self.queries_planned - self.queries_executed
+
+    def stats(self):
+        """Return the API-call savings of the cascade so far."""
+        return {
+            'songs': self.songs,
+            'queries_planned': self.queries_planned,
+            'queries_executed': self.queries_executed,
+            'queries_saved': self.queries_saved,
+            'early_exits': self.early_exits,
+            'savings_ratio': self.queries_saved / self.queries_planned if self.queries_planned else 0.0,
+        }
@@ -0,0 +1,256 @@
+"""Command line entry point: ``python -m musiclikessync <command>``.
+
+Commands:
+
+* ``fetch``: fetch the likes of both services into data/.
+* ``match``: find the Spotify track of every like missing from Spotify and
+  store the matches in data/match_results.
+* ``select``: select the stored matches again with another ``--threshold``,
+  without searching or scoring; ``--review`` lists the candidates of the
+  matches left unselected.
+* ``add``: add the selected matches to the Spotify library; with
+  ``--dry-run``, list the tracks that would be added.
+* ``sync``: all of the above; with ``--dry-run``, stop before adding.
+  ``--direction to-youtube`` likes the Spotify likes missing from YouTube
+  Music instead, and ``--direction both`` syncs both ways at once (see
+  ``musiclikessync.bidirectional``).
+* ``report``: print the report of the last run.
+* ``batch MANIFEST``: sync every account pair of a manifest concurrently
+  (see ``musiclikessync.batch``).
+
+Each command imports only what it needs: ``report``, ``select`` and
+``add --dry-run`` read data/ without importing pandas or creating an API
+client, and the clients are created from ./Auth/ only by the commands
+that call them.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+
+from . import config, context
+from .add_journal import JOURNAL_FORMAT
+
+
+def _apply_options(args):
+    """Override the settings in ``config`` with the options given on the command line."""
+    if getattr(args, 'full', False):
+        config.INCREMENTAL_SYNC = False
+    if getattr(args, 'streaming', False):
+        config.STREAMING_MODE = True
+    if getattr(args, 'threshold', None) is not None:
+        config.SELECTION_THRESHOLD = args.threshold
+    if getattr(args, 'limit', None) is not None:
+        config.SEARCH_LIMIT = args.limit
+    if getattr(args, 'accounts', None) is not None:
+        config.BATCH_ACCOUNT_WORKERS = args.accounts
+    if args.workers is not None:
+        config.PARALLEL_WORKERS = args.workers
+    if args.storage_format is not None:
+        config.STORAGE_FORMAT = args.storage_format
+
+
+def _configure_logging():
+    logging.basicConfig(filename=config.LOG_PATH, level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+
+def _sync_run():
+    from .pipeline import SyncRun
+    _configure_logging()
+    return SyncRun(context.ytmusic, context.sp)
+
+
+def _finish():
+    from .pipeline import write_run_report
+    write_run_report()
+
+
+def fetch(args):
+    run = _sync_run()
+    youtube_likes, spotify_likes = run.load_likes(refresh=args.refresh)
+    print(f"{len(youtube_likes)} YouTube Music likes to process, {len(spotify_likes)} Spotify likes")
+    _finish()
+
+
+def match(args):
+    run = _sync_run()
+    run.find_missing()
+    best_matches = run.match()
+    selected = sum(1 for best_match in best_matches if best_match['status'] == 'selected')
+    print(f"{len(run.missing_songs)} likes missing from Spotify, {selected} matches selected")
+    _finish()
+
+
+def select(args):
+    from .selection import reselect_matches
+    match_store = context.data_store('match_results')
+    if not match_store.exists():
+        print("No match results; run match first", file=sys.stderr)
+        return 1
+    best_matches = reselect_matches(match_store.read(), config.SELECTION_THRESHOLD)
+    match_store.write(best_matches)
+    if args.review:
+        for best_match in best_matches:
+            if best_match['status'] != 'selected' and best_match.get('candidates'):
+                print(f"{best_match['original_title']} by {best_match['original_artist']}:")
+                for candidate in best_match['candidates']:
+                    print(f"  {candidate['similarity_score']:.2f} {candidate['spotify_title']} by {candidate['spotify_artist']} "
+                          f"({candidate['spotify_id']})")
+    selected = sum(1 for best_match in best_matches if best_match['status'] == 'selected')
+    print(f"{selected} of {len(best_matches)} matches selected above {config.SELECTION_THRESHOLD}")
+
+
+def pending_matches():
+    """Return the selected matches in data/match_results whose track is not in the added-songs log."""
+    match_store = context.data_store('match_results')
+    if not match_store.exists():
+        return []
+    added_ids = {entry.get('spotify_id') for entry in context.data_store('added_songs_to_spotify', JOURNAL_FORMAT)
+                 if entry.get('status') in ('added', 'not added')}
+    pending = []
+    for best_match in match_store:
+        spotify_id = best_match['best_variant'].get('spotify_id')
+        if best_match['status'] == 'selected' and spotify_id and spotify_id not in added_ids:
+            added_ids.add(spotify_id)
+            pending.append(best_match)
+    return pending
+
+
+def add(args):
+    if args.dry_run:
+        pending = pending_matches()
+        for best_match in pending:
+            best_variant = best_match['best_variant']
+            print(f"{best_match['original_title']} by {best_match['original_artist']} -> "
+                  f"{best_variant.get('spotify_title')} by {best_variant.get('spotify_artist')} "
+                  f"({best_variant.get('similarity_score', 0):.2f})")
+        print(f"{len(pending)} tracks would be added")
+        return
+    entries = _sync_run().add()
+    print(f"{sum(1 for entry in entries if entry['status'] == 'added')} tracks added")
+    _finish()
+
+
+def sync(args):
+    if args.direction != 'to-spotify':
+        return sync_both_ways(args)
+    run = _sync_run()
+    entries = run.sync(dry_run=args.dry_run)
+    if args.dry_run:
+        selected = sum(1 for best_match in run.best_matches if best_match['status'] == 'selected')
+        print(f"Dry run: {selected} matches selected, nothing added")
+    else:
+        print(f"{sum(1 for entry in entries if entry['status'] == 'added')} tracks added")
+    _finish()
+
+
+def sync_both_ways(args):
+    from .bidirectional import BidirectionalSync
+    _configure_logging()
+    run = BidirectionalSync(context.ytmusic, context.sp, forward=args.direction == 'both')
+    entries = run.sync(dry_run=args.dry_run)
+    for direction, service in [('youtube_to_spotify', 'Spotify'), ('spotify_to_youtube', 'YouTube Music')]:
+        if direction not in entries:
+            continue
+        if args.dry_run:
+            best_matches = (run.forward if direction == 'youtube_to_spotify' else run.reverse).best_matches
+            selected = sum(1 for best_match in best_matches if best_match['status'] == 'selected')
+            print(f"Dry run: {selected} matches selected for {service}, nothing added")
+        else:
+            print(f"{sum(1 for entry in entries[direction] if entry['status'] == 'added')} tracks added to {service}")
+    _finish()
+
+
+def batch(args):
+    from .batch import load_manifest, run_batch
+    _configure_logging()
+    results = run_batch(load_manifest(args.manifest), dry_run=args.dry_run)
+    for result in results:
+        if 'error' in result:
+            print(f"{result['account']}: failed - {result['error']}")
+        else:
+            print(f"{result['account']}: {result['missing']} likes missing from Spotify, {result['matched']} matched, "
+                  f"{result['added']} added, {result['requests']} Spotify requests")
+    _finish()
+    return 1 if any('error' in result for result in results) else 0
+
+
+def report(args):
+    path = args.path or config.RUN_REPORT_PATH
+    if not os.path.exists(path):
+        print(f"No run report at {path}", file=sys.stderr)
+        return 1
+    with open(path, encoding='utf-8') as f:
+        run_report = json.load(f)
+    print(f"Run started {run_report['started_at']}, {run_report['duration_seconds']:.1f} s")
+    for stage, timer in run_report['stages'].items():
+        print(f"  {stage:<28} {timer['calls']:>6} calls {timer['seconds']:>9.3f} s")
+    for service, methods in run_report['api'].items():
+        for method, stats in methods.items():
+            print(f"  {service}.{method:<28} {stats['calls']:>6} calls {stats['errors']:>4} errors "
+                  f"{stats['rate_limited']:>4} rate limited")
+    for name, stats in run_report['stats'].items():
+        print(f"  {name}: {stats}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m musiclikessync',
+                                     description='Sync YouTube Music likes into Spotify.')
+    parser.add_argument('--workers', type=int, help='worker processes for the CPU-bound stages (PARALLEL_WORKERS)')
+    parser.add_argument('--storage-format', choices=['json', 'jsonl', 'parquet'], help='format of the files in data/')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    def add_parser(name, handler, help):
+        subparser = subparsers.add_parser(name, help=help, description=help)
+        subparser.set_defaults(handler=handler)
+        return subparser
+
+    def add_sync_options(subparser):
+        subparser.add_argument('--full', action='store_true', help='process every like instead of only new ones (INCREMENTAL_SYNC off)')
+
+    subparser = add_parser('fetch', fetch, 'Fetch the likes of both services.')
+    add_sync_options(subparser)
+    subparser.add_argument('--refresh', action='store_true', help='with --full, fetch again even if the likes are stored')
+
+    subparser = add_parser('match', match, 'Find the Spotify track of every like missing from Spotify.')
+    add_sync_options(subparser)
+    subparser.add_argument('--limit', type=int, help='most songs to search (SEARCH_LIMIT)')
+
+    subparser = add_parser('select', select, 'Select the stored matches again, without searching.')
+    subparser.add_argument('--threshold', type=float, help=f'score a match must exceed (default {config.SELECTION_THRESHOLD})')
+    subparser.add_argument('--review', action='store_true', help='list the candidates of the matches not selected')
+
+    subparser = add_parser('add', add, 'Add the selected matches to the Spotify library.')
+    add_sync_options(subparser)
+    subparser.add_argument('--dry-run', action='store_true', help='list the tracks that would be added')
+
+    subparser = add_parser('sync', sync, 'Fetch, match and add.')
+    add_sync_options(subparser)
+    subparser.add_argument('--limit', type=int, help='most songs to search (SEARCH_LIMIT)')
+    subparser.add_argument('--streaming', action='store_true', help='stream songs through search and add (STREAMING_MODE)')
+    subparser.add_argument('--dry-run', action='store_true', help='match without adding anything')
+    subparser.add_argument('--direction', choices=['to-spotify', 'to-youtube', 'both'], default='to-spotify',
+                           help='add YouTube Music likes to Spotify (default), Spotify likes to YouTube Music, or both')
+
+    subparser = add_parser('batch', batch, 'Sync every account pair of a manifest concurrently.')
+    add_sync_options(subparser)
+    subparser.add_argument('manifest', help='JSON file listing the accounts')
+    subparser.add_argument('--accounts', type=int, help='accounts synced at once (BATCH_ACCOUNT_WORKERS)')
+    subparser.add_argument('--limit', type=int, help='most songs to search per account (SEARCH_LIMIT)')
+    subparser.add_argument('--streaming', action='store_true', help='stream songs through search and add (STREAMING_MODE)')
+    subparser.add_argument('--dry-run', action='store_true', help='match without adding anything')
+
+    subparser = add_parser('report', report, 'Print the report of the last run.')
+    subparser.add_argument('--path', help=f'run report to print (default {config.RUN_REPORT_PATH})')
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    _apply_options(args)
+    try:
+        return args.handler(args) or 0
+    finally:
+        context.close()
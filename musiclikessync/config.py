@@ -0,0 +1,96 @@
+"""Settings of the sync, read by the pipeline stages each time they run.
+
+Change them before running a stage, e.g. ``config.STREAMING_MODE = True``
+in the notebook; the command line sets some of them from its options.
+Objects built from a setting (the caches, ``query_cascade``, ``scorer``)
+read it when ``context`` first creates them.
+"""
+
+from .parallel import default_workers
+
+# Credentials of the Spotify app and the saved YouTube Music headers
+SPOTIFY_CREDENTIALS_PATH = './Auth/spotify_credentials.json'
+YTMUSIC_AUTH_PATH = './Auth/headers_auth.json'
+SPOTIFY_SCOPE = 'user-library-read user-library-modify'
+
+# Keep-alive connections per host shared by all API clients; None sizes the pools for
+# the most concurrent requests any stage sends (SEARCH_WORKERS, LIBRARY_FETCH_WORKERS)
+HTTP_POOL_MAXSIZE = None
+
+LOG_PATH = 'migration.log'
+
+# Format of the likes, search results and match logs under data/: 'json' (indented array),
+# 'jsonl' (JSON Lines with an offset index, appended in place) or 'parquet' (needs pyarrow)
+STORAGE_FORMAT = 'jsonl'
+
+# Stage timers, API call statistics and cache hit rates of a run, written to RUN_REPORT_PATH at the end.
+# Set METRICS_TEXTFILE to a file in node_exporter's textfile collector directory to export them to Prometheus too.
+RUN_REPORT_PATH = 'data/run_report.json'
+METRICS_TEXTFILE = None
+
+# Number of Spotify likes pages requested concurrently
+LIBRARY_FETCH_WORKERS = 4
+SPOTIFY_LIKES_CHECKPOINT_PATH = 'data/spotify_likes.checkpoint.jsonl'
+
+# Fetch only likes added since the last run and push only unprocessed YouTube likes through the pipeline
+INCREMENTAL_SYNC = True
+SYNC_STATE_PATH = 'data/sync_state.sqlite'
+
+# Normalized strings are memoized in memory and in data/ so reruns skip
+# repeated regex, transliteration and translation work.
+NORMALIZATION_CACHE_PATH = 'data/normalization_cache.sqlite'
+
+# Artist names already translated in earlier runs are served from this
+# dictionary; new ones are translated in batches.
+ARTIST_DICTIONARY_PATH = 'data/artist_dictionary.json'
+
+# Worker processes for the normalize, score and best-match stages (1 keeps everything in-process)
+PARALLEL_WORKERS = default_workers()
+
+# Concurrency and rate limit for Spotify searches
+SEARCH_WORKERS = 8
+SEARCH_REQUESTS_PER_SECOND = 10
+# Rate limit for the YouTube Music searches of the reverse sync (Spotify -> YouTube Music)
+YTMUSIC_SEARCH_REQUESTS_PER_SECOND = 5
+
+# Search responses are cached per (query, limit); empty responses expire sooner
+SEARCH_CACHE_PATH = 'data/search_cache.sqlite'
+SEARCH_CACHE_TTL = 30 * 24 * 60 * 60
+SEARCH_CACHE_NEGATIVE_TTL = 7 * 24 * 60 * 60
+
+# Most songs searched in one run; the rest stay pending for the next run
+SEARCH_LIMIT = 10000
+
+# Score a best variant must exceed to be selected for adding
+SELECTION_THRESHOLD = 0.8
+
+# Best variants kept per song as the candidates of its match in data/match_results; a song's
+# variants are scored only until these are known
+SELECTION_TOP_K = 5
+
+# Stop searching a song as soon as one query yields a selectable match
+SEARCH_CASCADE = True
+
+# 'difflib' reproduces the historical scores exactly; 'rapidfuzz' (or 'auto', rapidfuzz when installed)
+# is faster, but its scores can be higher, so a few more matches clear SELECTION_THRESHOLD
+SCORING_ENGINE = 'difflib'
+
+# Resolve likes already in the Spotify library under a slightly different spelling without searching
+PREMATCH = True
+# Stricter than SELECTION_THRESHOLD: a local match skips the Spotify search entirely
+PREMATCH_THRESHOLD = 0.9
+
+# Resolve likes whose videoId was matched before (or that carry an ISRC) with batched track lookups instead of searches
+IDENTITY_RESOLUTION = True
+IDENTITY_STORE_PATH = 'data/track_identities.sqlite'
+
+# Stream each song through normalize -> search -> score -> select -> add instead of running the stages one after another
+STREAMING_MODE = False
+# Number of songs any stage may run ahead of the next one
+STREAM_BUFFER_SIZE = 64
+
+# Batch mode (python -m musiclikessync batch MANIFEST): accounts synced at once, Spotify requests per second
+# shared by all of them, and where accounts without a data_dir in the manifest keep their files
+BATCH_ACCOUNT_WORKERS = 4
+BATCH_REQUESTS_PER_SECOND = 20
+BATCH_DATA_DIR = 'data/accounts'
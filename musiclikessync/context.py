@@ -0,0 +1,260 @@
+"""Caches, stores and API clients shared by the pipeline stages, created on first use.
+
+Each object is built the first time it is read as an attribute of this
+module (``context.search_cache``, ``context.sp``), so importing a stage,
+or running a command that does not need an object, neither opens its
+sqlite file nor imports ytmusicapi, spotipy or the translation packages.
+Settings in ``config`` are read when an object is created. The API
+clients share the keep-alive connection pools of ``context.transport``.
+
+Objects can be replaced by assignment, e.g. ``context.sp = FakeSpotify(...)``;
+inside ``use_account`` an assignment replaces the account's own object.
+``close`` closes every object created or assigned so far and forgets it,
+so the next access builds it again (e.g. in another working directory);
+it also runs at exit.
+
+A thread syncing one account of a batch enters ``use_account``. Until it
+leaves, the objects in ``ACCOUNT_OBJECTS`` (API clients, state stores,
+search rate limiter) are that account's own, created from its credentials
+in its data directory, and ``data_store``/``data_path`` point there too.
+The caches, the translator and the scorer stay shared by all accounts.
+"""
+
+import atexit
+import os
+import sys
+import threading
+import types
+from contextlib import contextmanager
+
+from . import config
+from .metrics import RunMetrics
+
+# Stage timers, API call statistics and cache hit rates of this run
+run_metrics = RunMetrics()
+
+_lock = threading.RLock()
+_local = threading.local()
+
+# The shared objects created or assigned so far. They are kept out of the
+# module globals so every read goes through get() and finds the current
+# account's own objects inside use_account.
+_objects = {}
+
+# Objects every account of a batch has its own of
+ACCOUNT_OBJECTS = ('ytmusic', 'sp', 'sync_state', 'identity_store', 'search_limiter', 'ytmusic_search_limiter')
+
+
+def current_account():
+    """Return the account this thread is syncing, or None outside a batch."""
+    return getattr(_local, 'account', None)
+
+
+@contextmanager
+def use_account(account):
+    """Use ``account``'s own objects and data directory in this thread until the block ends.
+
+    ``account`` needs ``name``, ``data_dir``, ``spotify_credentials_path``,
+    ``ytmusic_auth_path`` and an ``objects`` dict, e.g. ``batch.Account``.
+    Its objects are closed when the block ends.
+    """
+    previous = current_account()
+    _local.account = account
+    try:
+        yield account
+    finally:
+        try:
+            _close(account.objects)
+        finally:
+            _local.account = previous
+
+
+def data_path(path):
+    """Return ``path``, a file under data/ in ``config``, in the current account's data directory."""
+    account = current_account()
+    if account is None:
+        return path
+    return os.path.join(account.data_dir, os.path.basename(path))
+
+
+def data_store(name, storage_format=None):
+    """Return the store of a data set under data/ (in ``STORAGE_FORMAT`` by default), migrating files written in another format."""
+    from .storage import open_store
+    account = current_account()
+    return open_store(os.path.join(account.data_dir if account is not None else 'data', name),
+                      storage_format or config.STORAGE_FORMAT)
+
+
+def _service(name):
+    # API calls of each account are reported separately
+    account = current_account()
+    return f'{name}:{account.name}' if account is not None else name
+
+
+def _transport():
+    from .transport import Transport
+    pool_maxsize = config.HTTP_POOL_MAXSIZE or max(config.SEARCH_WORKERS, config.LIBRARY_FETCH_WORKERS)
+    return Transport(pool_maxsize=pool_maxsize)
+
+
+def _ytmusic():
+    from .transport import ytmusic_client
+    account = current_account()
+    auth_path = account.ytmusic_auth_path if account is not None else config.YTMUSIC_AUTH_PATH
+    return run_metrics.instrument(ytmusic_client(auth_path, get('transport')), _service('ytmusic'))
+
+
+def _sp():
+    from .transport import spotify_client
+    account = current_account()
+    credentials_path = account.spotify_credentials_path if account is not None else config.SPOTIFY_CREDENTIALS_PATH
+    sp = spotify_client(credentials_path, config.SPOTIFY_SCOPE, get('transport'))
+    return run_metrics.instrument(sp, _service('spotify'))
+
+
+def _normalization_cache():
+    from .normalization_cache import NormalizationCache
+    return NormalizationCache(config.NORMALIZATION_CACHE_PATH)
+
+
+def _artist_translator():
+    from .translation import ArtistDictionary, ArtistTranslator, GoogleTranslateBackend
+    backend = GoogleTranslateBackend(session=get('transport').session)
+    return ArtistTranslator(run_metrics.instrument(backend, 'translator'),
+                            ArtistDictionary(config.ARTIST_DICTIONARY_PATH))
+
+
+def _normalization_engine():
+    # Precompiled normalization steps shared by normalize_text and normalize_column
+    from .normalization import NormalizationEngine
+    return NormalizationEngine(get('artist_translator'))
+
+
+def _search_cache():
+    from .search_cache import SearchCache
+    return SearchCache(config.SEARCH_CACHE_PATH, ttl=config.SEARCH_CACHE_TTL,
+                       negative_ttl=config.SEARCH_CACHE_NEGATIVE_TTL)
+
+
+def _query_cascade():
+    from .cascade import QueryCascade
+    return QueryCascade(config.SELECTION_THRESHOLD)
+
+
+def _scorer():
+    from .scoring import get_scorer
+    return get_scorer(config.SCORING_ENGINE)
+
+
+def _sync_state():
+    from .state_store import SyncStateStore
+    return SyncStateStore(data_path(config.SYNC_STATE_PATH))
+
+
+def _identity_store():
+    from .identity import IdentityStore
+    return IdentityStore(data_path(config.IDENTITY_STORE_PATH))
+
+
+def _search_limiter():
+    # The search request budget; waits for it are reported in the run metrics
+    from .search_executor import TokenBucket
+    return TokenBucket(config.SEARCH_REQUESTS_PER_SECOND, config.SEARCH_WORKERS,
+                       sleep=run_metrics.sleeper('search_throttle_wait'))
+
+
+def _ytmusic_search_limiter():
+    # YouTube Music searches of the reverse sync have a budget of their own
+    from .search_executor import TokenBucket
+    return TokenBucket(config.YTMUSIC_SEARCH_REQUESTS_PER_SECOND, config.SEARCH_WORKERS,
+                       sleep=run_metrics.sleeper('search_throttle_wait'))
+
+
+_FACTORIES = {
+    'transport': _transport,
+    'ytmusic': _ytmusic,
+    'sp': _sp,
+    'normalization_cache': _normalization_cache,
+    'artist_translator': _artist_translator,
+    'normalization_engine': _normalization_engine,
+    'search_cache': _search_cache,
+    'query_cascade': _query_cascade,
+    'scorer': _scorer,
+    'sync_state': _sync_state,
+    'identity_store': _identity_store,
+    'search_limiter': _search_limiter,
+    'ytmusic_search_limiter': _ytmusic_search_limiter,
+}
+
+# How each object is released by close(); the others need nothing
+_CLOSERS = {
+    'normalization_cache': lambda cache: cache.close(),
+    'artist_translator': lambda translator: translator.dictionary.save(),
+    'search_cache': lambda cache: cache.close(),
+    'sync_state': lambda state: state.close(),
+    'identity_store': lambda store: store.close(),
+    'transport': lambda transport: transport.close(),
+}
+
+
+def _namespace(name):
+    account = current_account()
+    if account is not None and name in ACCOUNT_OBJECTS:
+        return account.objects
+    return _objects
+
+
+def get(name):
+    """Return the shared object ``name`` (the current account's own for ``ACCOUNT_OBJECTS``), creating it on first use."""
+    if name not in _FACTORIES:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    namespace = _namespace(name)
+    with _lock:
+        if name not in namespace:
+            namespace[name] = _FACTORIES[name]()
+        return namespace[name]
+
+
+def __getattr__(name):
+    return get(name)
+
+
+def peek(name):
+    """Return the shared object ``name`` if it exists, without creating it."""
+    return _namespace(name).get(name)
+
+
+def _close(namespace):
+    with _lock:
+        for name in reversed(list(_FACTORIES)):
+            if name in namespace:
+                value = namespace.pop(name)
+                if name in _CLOSERS:
+                    _CLOSERS[name](value)
+
+
+def close():
+    """Close and forget every shared object created so far."""
+    _close(_objects)
+
+
+class _ContextModule(types.ModuleType):
+    """Store assigned objects like created ones, in the current account's objects or the shared ones."""
+
+    def __setattr__(self, name, value):
+        if name not in _FACTORIES:
+            super().__setattr__(name, value)
+            return
+        with _lock:
+            _namespace(name)[name] = value
+
+    def __delattr__(self, name):
+        if name not in _FACTORIES:
+            super().__delattr__(name)
+            return
+        with _lock:
+            _namespace(name).pop(name, None)
+
+
+sys.modules[__name__].__class__ = _ContextModule
+atexit.register(close)
@@ -0,0 +1,186 @@
+"""Resolve YouTube likes to Spotify tracks by identity instead of text search.
+
+``IdentityStore`` keeps a persistent ``videoId -> spotify_id`` mapping
+filled from earlier confident matches. ``IdentityResolver`` looks each
+like up in that mapping (or, for records that carry an ISRC, runs a
+single ``isrc:`` search) and confirms all candidate IDs with batched
+``sp.tracks`` calls of up to 50 IDs. A like resolved this way costs a
+fiftieth of one request instead of up to seven searches plus scoring.
+IDs Spotify no longer returns are dropped from the mapping, and those
+likes fall back to the normal search. The reverse sync looks the mapping
+up by Spotify ID (``lookup_videos``) and records its own matches in it,
+so a pair either direction matched is never searched again.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+SPOTIFY_MAX_TRACKS_PER_CALL = 50
+
+
+class IdentityStore:
+    """SQLite-backed mapping of YouTube videoIds to Spotify track IDs."""
+
+    def __init__(self, path='data/track_identities.sqlite', clock=time.time):
+        self.path = path
+        self._clock = clock
+        self._lock = threading.Lock()
+        if path != ':memory:':
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                'CREATE TABLE IF NOT EXISTS identities ('
+                ' video_id TEXT PRIMARY KEY, spotify_id TEXT NOT NULL, source TEXT, resolved_at REAL)'
+            )
+            self._db.execute('CREATE INDEX IF NOT EXISTS identities_spotify_id ON identities (spotify_id)')
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM identities').fetchone()[0]
+
+    def lookup(self, video_ids):
+        """Return ``{video_id: spotify_id}`` for the known ``video_ids``."""
+        video_ids = list(dict.fromkeys(video_id for video_id in video_ids if video_id))
+        found = {}
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for start in range(0, len(video_ids), 500):
+                chunk = video_ids[start:start + 500]
+                placeholders = ', '.join('?' for _ in chunk)
+                found.update(self._db.execute(
+                    f'SELECT video_id, spotify_id FROM identities WHERE video_id IN ({placeholders})', chunk
+                ).fetchall())
+        return found
+
+    def lookup_videos(self, spotify_ids):
+        """Return ``{spotify_id: video_id}`` for the known ``spotify_ids``, the latest resolved videoId of each."""
+        spotify_ids = list(dict.fromkeys(spotify_id for spotify_id in spotify_ids if spotify_id))
+        found = {}
+        with self._lock:
+            for start in range(0, len(spotify_ids), 500):
+                chunk = spotify_ids[start:start + 500]
+                placeholders = ', '.join('?' for _ in chunk)
+                found.update(self._db.execute(
+                    f'SELECT spotify_id, video_id FROM identities WHERE spotify_id IN ({placeholders}) ORDER BY resolved_at',
+                    chunk
+                ).fetchall())
+        return found
+
+    def record(self, identities, source):
+        """Store ``{video_id: spotify_id}`` pairs learned from ``source`` (e.g. 'search' or 'isrc')."""
+        now = self._clock()
+        with self._lock, self._db:
+            self._db.executemany(
+                'INSERT OR REPLACE INTO identities (video_id, spotify_id, source, resolved_at) VALUES (?, ?, ?, ?)',
+                [(video_id, spotify_id, source, now) for video_id, spotify_id in identities.items()
+                 if video_id and spotify_id],
+            )
+
+    def forget(self, video_ids):
+        with self._lock, self._db:
+            self._db.executemany('DELETE FROM identities WHERE video_id = ?', [(video_id,) for video_id in video_ids])
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def fetch_tracks(tracks, track_ids, batch_size=SPOTIFY_MAX_TRACKS_PER_CALL):
+    """Look up ``track_ids`` with ``tracks`` (``sp.tracks``), ``batch_size`` IDs per call.
+
+    Returns ``{track_id: track}`` for the IDs Spotify returned, and the set
+    of IDs it confirmed do not exist. A batch that fails is left out of
+    both, so its IDs are neither trusted nor forgotten.
+    """
+    track_ids = list(dict.fromkeys(track_ids))
+    found = {}
+    missing = set()
+    for start in range(0, len(track_ids), batch_size):
+        chunk = track_ids[start:start + batch_size]
+        try:
+            response = tracks(chunk)
+        except Exception as e:
+            logger.warning('Track lookup of %d IDs failed: %s', len(chunk), e)
+            continue
+        for track_id, track in zip(chunk, response.get('tracks') or []):
+            if track and track.get('id'):
+                found[track_id] = track
+            else:
+                missing.add(track_id)
+    return found, missing
+
+
+def _text(value):
+    # Missing values read from a DataFrame are NaN rather than None
+    return value if isinstance(value, str) and value else None
+
+
+class IdentityResolver:
+    """Resolve songs to Spotify tracks from stored identities and ISRCs.
+
+    Parameters:
+        store (IdentityStore): The persistent videoId mapping.
+        tracks (callable): ``sp.tracks``.
+        search (callable): Optional ``(query, limit) -> response`` used for
+            ``isrc:`` lookups, e.g. ``SearchExecutor.search``.
+    """
+
+    def __init__(self, store, tracks, search=None, batch_size=SPOTIFY_MAX_TRACKS_PER_CALL):
+        self.store = store
+        self._tracks = tracks
+        self._search = search
+        self.batch_size = batch_size
+        self.counts = {'songs': 0, 'known': 0, 'isrc': 0, 'resolved': 0, 'stale': 0}
+
+    def _search_isrc(self, isrc):
+        try:
+            items = self._search(f'isrc:{isrc}', 1)['tracks']['items']
+        except Exception as e:
+            logger.warning('ISRC search for %s failed: %s', isrc, e)
+            return None
+        return items[0]['id'] if items else None
+
+    def resolve(self, songs):
+        """Return the Spotify track of each song, or None where it has to be searched."""
+        songs = list(songs)
+        self.counts['songs'] += len(songs)
+        video_ids = [_text(song.get('videoId')) for song in songs]
+        known = self.store.lookup(video_ids)
+        self.counts['known'] += sum(1 for video_id in video_ids if video_id in known)
+
+        candidates = []
+        isrc_identities = {}
+        for song, video_id in zip(songs, video_ids):
+            spotify_id = known.get(video_id) if video_id else None
+            isrc = _text(song.get('isrc'))
+            if spotify_id is None and isrc and self._search is not None:
+                spotify_id = self._search_isrc(isrc)
+                if spotify_id:
+                    self.counts['isrc'] += 1
+                    if video_id:
+                        isrc_identities[video_id] = spotify_id
+            candidates.append(spotify_id)
+
+        found, missing = fetch_tracks(self._tracks, [spotify_id for spotify_id in candidates if spotify_id],
+                                      self.batch_size)
+        stale = [video_id for video_id, spotify_id in known.items() if spotify_id in missing]
+        if stale:
+            self.store.forget(stale)
+            self.counts['stale'] += len(stale)
+        self.store.record({video_id: spotify_id for video_id, spotify_id in isrc_identities.items()
+                           if spotify_id in found}, 'isrc')
+
+        resolved = [found.get(spotify_id) if spotify_id else None for spotify_id in candidates]
+        self.counts['resolved'] += sum(1 for track in resolved if track is not None)
+        return resolved
+
+    def stats(self):
+        return dict(self.counts, identities=len(self.store))
@@ -0,0 +1,69 @@
+"""Fetch only the likes added since the previous sync.
+
+Both services list likes newest first: YouTube Music's ``get_liked_songs``
+and Spotify's saved tracks (ordered by ``added_at``). Fetching can
+therefore stop at the first like the state store already knows about,
+or at the first Spotify track older than the stored ``added_at`` cursor.
+"""
+
+from .state_store import song_key
+
+
+def youtube_song_record(song):
+    """Convert a ``get_liked_songs`` track into the record format used throughout the sync."""
+    title = song.get('title', 'Unknown Title')
+    artist_name = song['artists'][0]['name'] if song.get('artists') and len(song['artists']) > 0 else 'Unknown Artist'
+    album = song.get('album')
+    album_name = album['name'] if album else 'Unknown Album'
+    return {
+        'title': title,
+        'artist': artist_name,
+        'album': album_name,
+        'videoId': song.get('videoId'),
+    }
+
+
+def spotify_track_record(item):
+    """Convert a saved-tracks item into the record format used throughout the sync."""
+    track = item['track']
+    return {
+        'title': track['name'],
+        'artist': track['artists'][0]['name'],
+        'album': track['album']['name'],
+        'spotify_id': track['id'],
+        'added_at': item.get('added_at'),
+    }
+
+
+def fetch_new_youtube_likes(ytmusic, known_keys, initial_limit=100, growth=4):
+    """Return likes newer than the newest known one, newest first.
+
+    The request limit starts small and grows until a known like shows up
+    or the whole list has been returned, so a daily sync downloads a
+    single page.
+    """
+    limit = initial_limit
+    while True:
+        tracks = ytmusic.get_liked_songs(limit=limit)['tracks']
+        songs = [youtube_song_record(track) for track in tracks]
+        for position, song in enumerate(songs):
+            if song_key(song) in known_keys:
+                return songs[:position]
+        if len(tracks) < limit:
+            return songs
+        limit *= growth
+
+
+def fetch_new_spotify_likes(sp, since=None, page_size=50):
+    """Return saved tracks added at or after ``since`` (an ``added_at`` timestamp), newest first."""
+    new_tracks = []
+    offset = 0
+    while True:
+        page = sp.current_user_saved_tracks(limit=page_size, offset=offset)
+        for item in page['items']:
+            if since is not None and item.get('added_at') and item['added_at'] < since:
+                return new_tracks
+            new_tracks.append(spotify_track_record(item))
+        if not page.get('next'):
+            return new_tracks
+        offset += page_size
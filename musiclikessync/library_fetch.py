@@ -0,0 +1,135 @@
+"""Fetch complete liked-song libraries from Spotify and YouTube Music.
+
+Spotify's saved tracks are read with the largest page size the API
+accepts. The first page reports the total, after which the remaining
+pages are requested by offset on a small thread pool. Every page is
+appended to a checkpoint file as soon as it arrives, so an interrupted
+fetch resumes with the missing pages only.
+
+YouTube Music is asked for its liked songs without a limit, so libraries
+larger than any fixed cap are no longer truncated.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .incremental import spotify_track_record, youtube_song_record
+
+logger = logging.getLogger(__name__)
+
+SPOTIFY_SAVED_TRACKS_PAGE_SIZE = 50
+
+
+class PageCheckpoint:
+    """Append-only JSON Lines file of the pages fetched so far.
+
+    The first line describes the fetch (page size, total, start time); each
+    further line holds one page's records. A checkpoint with another page
+    size or older than ``max_age`` seconds is discarded.
+    """
+
+    def __init__(self, path, max_age=24 * 60 * 60, clock=time.time):
+        self.path = path
+        self.max_age = max_age
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    def load(self, page_size):
+        """Return ``(total, {offset: records})`` from an existing checkpoint, or ``(None, {})``."""
+        if not os.path.exists(self.path):
+            return None, {}
+        pages = {}
+        with open(self.path, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        try:
+            header = json.loads(lines[0])
+        except (IndexError, ValueError):
+            return None, {}
+        if header.get('page_size') != page_size or self._clock() - header.get('started_at', 0) > self.max_age:
+            return None, {}
+        for line in lines[1:]:
+            try:
+                page = json.loads(line)
+            except ValueError:  # A page cut off by the interruption
+                continue
+            pages[page['offset']] = page['records']
+        return header.get('total'), pages
+
+    def start(self, page_size, total):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock, open(self.path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'page_size': page_size, 'total': total, 'started_at': self._clock()}) + '\n')
+
+    def save(self, offset, records):
+        line = json.dumps({'offset': offset, 'records': records}, ensure_ascii=False)
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def fetch_spotify_saved_tracks(sp, page_size=SPOTIFY_SAVED_TRACKS_PAGE_SIZE, workers=4, checkpoint=None):
+    """Return every saved track as a record, newest first.
+
+    Parameters:
+        sp (spotipy.Spotify): Authenticated client.
+        page_size (int): Tracks per request (50 is the API maximum).
+        workers (int): Number of pages requested concurrently.
+        checkpoint (PageCheckpoint): Optional checkpoint to resume from and record progress in.
+    """
+    total, pages = checkpoint.load(page_size) if checkpoint is not None else (None, {})
+    if pages:
+        logger.info(f"Resuming Spotify likes fetch: {len(pages)} pages already fetched")
+
+    def fetch_page(offset):
+        page = sp.current_user_saved_tracks(limit=page_size, offset=offset)
+        return page['total'], [spotify_track_record(item) for item in page['items']]
+
+    def fetch_and_save(offset):
+        records = fetch_page(offset)[1]
+        if checkpoint is not None:
+            checkpoint.save(offset, records)
+        return records
+
+    if total is None:
+        # The first page tells how many pages remain
+        total, pages[0] = fetch_page(0)
+        if checkpoint is not None:
+            checkpoint.start(page_size, total)
+            checkpoint.save(0, pages[0])
+
+    missing_offsets = [offset for offset in range(0, total, page_size) if offset not in pages]
+    if missing_offsets:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            futures = {pool.submit(fetch_and_save, offset): offset for offset in missing_offsets}
+            for future in as_completed(futures):
+                pages[futures[future]] = future.result()
+
+    # Tracks liked while fetching shift the offsets; keep the first occurrence of each
+    tracks = []
+    seen_ids = set()
+    for offset in sorted(pages):
+        for record in pages[offset]:
+            if record['spotify_id'] not in seen_ids:
+                seen_ids.add(record['spotify_id'])
+                tracks.append(record)
+
+    if checkpoint is not None:
+        checkpoint.clear()
+    return tracks
+
+
+def fetch_youtube_liked_songs(ytmusic):
+    """Return every liked song as a record, newest first."""
+    liked_songs = ytmusic.get_liked_songs(limit=None)
+    return [youtube_song_record(song) for song in liked_songs['tracks']]
@@ -0,0 +1,42 @@
+"""Hashed index of tracks already present in the Spotify library.
+
+The index is built once from the Spotify likes and the added-songs log and
+is updated as tracks are added, so "already there?" checks are O(1) set
+lookups instead of scans over DataFrame columns.
+"""
+
+
+class LibraryIndex:
+    """Sets of Spotify IDs and normalized ``(title, artist)`` keys."""
+
+    def __init__(self, spotify_ids=(), song_keys=()):
+        self.spotify_ids = set()
+        self.song_keys = set()
+        self.update(spotify_ids, song_keys)
+
+    def add(self, spotify_id=None, song_key=None):
+        """Record one track by Spotify ID and/or normalized ``(title, artist)`` key."""
+        if spotify_id:
+            self.spotify_ids.add(spotify_id)
+        if song_key is not None:
+            self.song_keys.add(tuple(song_key))
+
+    def update(self, spotify_ids=(), song_keys=()):
+        """Record many tracks at once; empty IDs are ignored."""
+        self.spotify_ids.update(spotify_id for spotify_id in spotify_ids if spotify_id and isinstance(spotify_id, str))
+        self.song_keys.update(tuple(key) for key in song_keys)
+
+    def has_id(self, spotify_id):
+        return spotify_id in self.spotify_ids
+
+    def has_song(self, normalized_title, normalized_artist):
+        return (normalized_title, normalized_artist) in self.song_keys
+
+    def __contains__(self, spotify_id):
+        return spotify_id in self.spotify_ids
+
+    def __len__(self):
+        return len(self.spotify_ids)
+
+    def stats(self):
+        return {'spotify_ids': len(self.spotify_ids), 'song_keys': len(self.song_keys)}
@@ -0,0 +1,124 @@
+"""Batched writes to the Spotify library.
+
+``BatchedLibraryWriter`` saves tracks in chunks of up to 50 IDs (the
+maximum ``current_user_saved_tracks_add`` accepts). Requests are spaced by
+an ``AdaptivePacer`` that reacts to what the API reports (``Retry-After``
+on 429s) instead of sleeping a fixed interval, transient failures are
+retried, and chunks rejected for other reasons are bisected so a single
+bad ID does not fail its 49 neighbours.
+"""
+
+import logging
+import time
+
+from .search_executor import is_retryable, retry_after_seconds
+
+logger = logging.getLogger(__name__)
+
+SPOTIFY_MAX_IDS_PER_CALL = 50
+
+
+class AdaptivePacer:
+    """Space out write requests based on the responses observed so far.
+
+    Successful requests shrink the delay towards ``min_delay``; rate-limit
+    responses block until ``Retry-After`` has passed and double the delay
+    used afterwards.
+    """
+
+    def __init__(self, min_delay=0.0, initial_delay=0.0, max_delay=30.0, clock=time.monotonic, sleep=time.sleep):
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.delay = initial_delay
+        self._clock = clock
+        self._sleep = sleep
+        self._next_request = 0.0
+        self.total_wait = 0.0
+
+    def wait(self):
+        """Sleep until the next request is allowed."""
+        wait = self._next_request - self._clock()
+        if wait > 0:
+            self.total_wait += wait
+            self._sleep(wait)
+
+    def success(self):
+        self.delay = max(self.min_delay, self.delay / 2)
+        self._next_request = self._clock() + self.delay
+
+    def rate_limited(self, retry_after=None):
+        self.delay = min(self.max_delay, max(self.delay * 2, 0.5))
+        self._next_request = self._clock() + (retry_after if retry_after is not None else self.delay)
+
+    def failure(self):
+        self.delay = min(self.max_delay, max(self.delay * 2, 0.5))
+        self._next_request = self._clock() + self.delay
+
+
+class BatchedLibraryWriter:
+    """Add tracks in chunks, pacing and retrying requests and isolating bad IDs.
+
+    Parameters:
+        add (callable): Called with a list of IDs, e.g.
+            ``lambda ids: sp.current_user_saved_tracks_add(tracks=ids)``.
+        batch_size (int): IDs per request, at most 50 for Spotify.
+        max_retries (int): Retries of a chunk after rate limits or transient errors.
+    """
+
+    def __init__(self, add, batch_size=SPOTIFY_MAX_IDS_PER_CALL, max_retries=5, pacer=None):
+        self._add = add
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.pacer = pacer if pacer is not None else AdaptivePacer()
+        self.calls = 0
+        self.rate_limited = 0
+
+    def write(self, track_ids):
+        """Add ``track_ids`` and return ``{track_id: (status, reason)}``.
+
+        ``status`` is ``'added'`` or ``'failed'``, with the same reasons the
+        add log has always used.
+        """
+        unique_ids = list(dict.fromkeys(track_ids))
+        outcomes = {}
+        for start in range(0, len(unique_ids), self.batch_size):
+            self._write_chunk(unique_ids[start:start + self.batch_size], outcomes)
+        return outcomes
+
+    def _write_chunk(self, chunk, outcomes):
+        error = None
+        for attempt in range(self.max_retries + 1):
+            self.pacer.wait()
+            self.calls += 1
+            try:
+                response = self._add(chunk)
+            except Exception as e:
+                error = e
+                if not is_retryable(e):
+                    break
+                if getattr(e, 'http_status', None) == 429:
+                    self.rate_limited += 1
+                    retry_after = retry_after_seconds(e)
+                    logger.warning(f"Rate limited while adding {len(chunk)} tracks, retrying after {retry_after or self.pacer.delay}s")
+                    self.pacer.rate_limited(retry_after)
+                else:
+                    self.pacer.failure()
+                continue
+            self.pacer.success()
+            status = 'added' if response is None else 'failed'
+            reason = 'Successfully added' if response is None else 'Failed to add'
+            for track_id in chunk:
+                outcomes[track_id] = (status, reason)
+            return
+
+        if len(chunk) > 1 and not is_retryable(error):
+            # Split the chunk to find the IDs the API rejects
+            middle = len(chunk) // 2
+            self._write_chunk(chunk[:middle], outcomes)
+            self._write_chunk(chunk[middle:], outcomes)
+            return
+        for track_id in chunk:
+            outcomes[track_id] = ('failed', str(error))
+
+    def stats(self):
+        return {'calls': self.calls, 'rate_limited': self.rate_limited, 'wait_seconds': self.pacer.total_wait}
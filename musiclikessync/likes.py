@@ -0,0 +1,218 @@
+"""Loading both libraries and finding the YouTube Music likes missing from Spotify."""
+
+import pandas as pd
+
+from . import config, context
+from .add_journal import JOURNAL_FORMAT, AddJournal
+from .context import data_store, run_metrics
+from .incremental import fetch_new_spotify_likes, fetch_new_youtube_likes
+from .library_fetch import PageCheckpoint, fetch_spotify_saved_tracks, fetch_youtube_liked_songs
+from .library_index import LibraryIndex
+from .state_store import song_key
+from .text import normalize_column
+
+
+# Fetch liked songs from YouTube Music
+@run_metrics.timed()
+def fetch_youtube_music_likes(ytmusic):
+    return pd.DataFrame(fetch_youtube_liked_songs(ytmusic))
+
+
+def _fetch_all_spotify_likes(sp, checkpoint_path=None):
+    checkpoint = PageCheckpoint(checkpoint_path or context.data_path(config.SPOTIFY_LIKES_CHECKPOINT_PATH))
+    return fetch_spotify_saved_tracks(sp, workers=config.LIBRARY_FETCH_WORKERS, checkpoint=checkpoint)
+
+
+# Fetch liked songs from Spotify
+@run_metrics.timed()
+def fetch_spotify_likes(sp, checkpoint_path=None):
+    """Fetch all Spotify likes in parallel pages, resuming an interrupted fetch from its checkpoint."""
+    return pd.DataFrame(_fetch_all_spotify_likes(sp, checkpoint_path))
+
+
+def read_or_fetch_youtube_likes(ytmusic, store=None, refresh=False):
+    """Read YouTube likes from the data store or fetch and save them if they were never fetched (or ``refresh``)."""
+    store = store or data_store('youtube_likes')
+    if store.exists() and not refresh:
+        return store.read_frame()
+    else:
+        data = fetch_youtube_music_likes(ytmusic)
+        store.write(data.to_dict('records'))
+        return data
+
+
+def read_or_fetch_spotify_likes(sp, store=None, refresh=False):
+    """Read Spotify likes from the data store or fetch and save them if they were never fetched (or ``refresh``)."""
+    store = store or data_store('spotify_likes')
+    if store.exists() and not refresh:
+        return store.read_frame()
+    else:
+        data = fetch_spotify_likes(sp)
+        store.write(data.to_dict('records'))
+        return data
+
+
+@run_metrics.timed()
+def read_incremental_likes(ytmusic, sp, state=None):
+    """Fetch new likes into the state store and return (pending YouTube likes, all Spotify likes).
+
+    On the first run, when every like is new, the whole libraries are
+    fetched like a full sync does: Spotify's in parallel pages with a
+    resumable checkpoint.
+    """
+    state = state or context.sync_state
+    known_song_keys = state.known_song_keys()
+    if known_song_keys:
+        new_youtube_likes = fetch_new_youtube_likes(ytmusic, known_song_keys)
+    else:
+        new_youtube_likes = fetch_youtube_liked_songs(ytmusic)
+    # Record oldest first so pending likes come back in the order they were liked
+    state.record_youtube_likes(reversed(new_youtube_likes))
+
+    since = state.get_cursor('spotify_added_at')
+    if since is not None:
+        new_spotify_likes = fetch_new_spotify_likes(sp, since=since)
+    else:
+        new_spotify_likes = _fetch_all_spotify_likes(sp)
+    state.record_spotify_likes(new_spotify_likes)
+    if new_spotify_likes and new_spotify_likes[0].get('added_at'):
+        state.set_cursor('spotify_added_at', new_spotify_likes[0]['added_at'])
+
+    print(f"Incremental sync: {len(new_youtube_likes)} new YouTube likes, {len(new_spotify_likes)} new Spotify likes")
+    youtube_likes = pd.DataFrame(state.pending_youtube_likes(), columns=['title', 'artist', 'album', 'videoId'])
+    spotify_likes = pd.DataFrame(state.spotify_likes(), columns=['title', 'artist', 'album', 'spotify_id', 'added_at'])
+    return youtube_likes, spotify_likes
+
+
+@run_metrics.timed()
+def record_sync_outcomes(state, processed_likes, missing_songs, log_entries):
+    """Store the outcome of every processed YouTube like in the state store.
+
+    Likes filtered out before searching are recorded as already in the
+    library; likes that were searched get the status of their add-log
+    entry. Likes without an outcome (e.g. beyond the search limit) stay
+    pending for the next run.
+    """
+    entry_outcomes = {
+        (entry['original_title'], entry['original_artist'], entry['original_album']): (entry['status'], entry['spotify_id'])
+        for entry in log_entries
+    }
+    missing = set(zip(missing_songs['title'], missing_songs['artist'], missing_songs['album']))
+
+    outcomes = {}
+    for song in processed_likes.to_dict('records'):
+        key = (song['title'], song['artist'], song['album'])
+        if key not in missing:
+            outcomes[song_key(song)] = ('already in library', None)
+        elif key in entry_outcomes:
+            outcomes[song_key(song)] = entry_outcomes[key]
+    state.record_outcomes(outcomes)
+
+
+def added_songs_log(store_name='added_songs_to_spotify'):
+    """Return the store of an added-songs log, kept as JSON Lines (see ``add_journal``)."""
+    return data_store(store_name, JOURNAL_FORMAT)
+
+
+# Load previously added songs from the data store if it exists
+@run_metrics.timed()
+def load_added_songs(added_songs_store=None):
+    """Load songs that were successfully added in previous runs.
+
+    Ensures the returned DataFrame always contains the columns
+    ``title``, ``artist``, ``album`` and ``spotify_id`` so that other
+    functions can rely on their presence.  When the log does not
+    exist, an empty DataFrame with these columns is returned.
+    """
+
+    required_columns = ['title', 'artist', 'album', 'spotify_id']
+    added_songs_store = added_songs_store or added_songs_log()
+
+    if added_songs_store.exists():
+        # Compact the journal: drop write intents and entries logged twice
+        successfully_added_songs = pd.DataFrame(AddJournal(added_songs_store).compact())
+
+        # Ensure all required columns are present even if the log is
+        # missing some of them.
+        for col in required_columns:
+            if col not in successfully_added_songs.columns:
+                successfully_added_songs[col] = None
+    else:
+        successfully_added_songs = pd.DataFrame(columns=required_columns)
+
+    return successfully_added_songs
+
+
+@run_metrics.timed()
+def build_library_index(spotify_likes, added_songs, ref_col_map=None):
+    """
+    Index the user's Spotify likes and the added-songs log once, so that later
+    membership checks by Spotify ID or normalized (title, artist) are O(1).
+
+    Parameters:
+        spotify_likes (pd.DataFrame): Spotify likes with title, artist and spotify_id columns.
+        added_songs (pd.DataFrame): Songs from the added-songs log.
+        ref_col_map (dict): Title/artist column names in added_songs.
+
+    Returns:
+        LibraryIndex: Index that add_tracks_to_spotify keeps up to date.
+    """
+    if ref_col_map is None:
+        ref_col_map = {'title': 'original_title', 'artist': 'original_artist'}
+
+    library_index = LibraryIndex()
+    library_index.update(
+        spotify_likes.get('spotify_id', ()),
+        zip(normalize_column(spotify_likes['title'].fillna('')), normalize_column(spotify_likes['artist'].fillna('')))
+    )
+    song_keys = ()
+    if all(col in added_songs.columns for col in ref_col_map.values()):
+        song_keys = zip(normalize_column(added_songs[ref_col_map['title']].fillna('')),
+                        normalize_column(added_songs[ref_col_map['artist']].fillna('')))
+    library_index.update(added_songs.get('spotify_id', ()), song_keys)
+    return library_index
+
+
+@run_metrics.timed()
+def clean_missing_songs(missing_songs, reference_songs, ref_col_map=None):
+    """
+    Optimized function to exclude songs from missing_songs that have been successfully added to Spotify
+    or are already in the user's Spotify likes using a common normalization function.
+
+    Parameters:
+        missing_songs (pd.DataFrame): DataFrame of songs to be checked.
+        reference_songs (pd.DataFrame or LibraryIndex): Reference songs for comparison.
+        ref_col_map (dict): Optional dictionary to map reference column names to missing_songs' column names.
+
+    Returns:
+        pd.DataFrame: Filtered DataFrame of missing songs.
+    """
+    if ref_col_map is None:
+        ref_col_map = {'title': 'title', 'artist': 'artist'}
+    is_index = isinstance(reference_songs, LibraryIndex)
+
+    # Check if the required columns exist
+    if not all(col in missing_songs.columns for col in ['title', 'artist']) or \
+       (not is_index and not all(col in reference_songs.columns for col in ref_col_map.values())):
+        raise KeyError("Required columns are missing in the input DataFrames")
+
+    # Normalize titles and artists for comparison
+    for col in ['title', 'artist']:
+        missing_songs[f'normalized_{col}'] = normalize_column(missing_songs[col])
+
+    if is_index:
+        reference_index = reference_songs.song_keys
+    else:
+        # Create an index of normalized titles and artists from reference songs for comparison
+        reference_index = set(zip(normalize_column(reference_songs[ref_col_map['title']]),
+                                  normalize_column(reference_songs[ref_col_map['artist']])))
+
+    # Filter with a vectorized membership test on the (title, artist) pairs
+    song_keys = pd.MultiIndex.from_arrays([missing_songs['normalized_title'], missing_songs['normalized_artist']])
+    mask = ~song_keys.isin(reference_index)
+    cleaned_songs = missing_songs.loc[mask].copy()
+
+    # Drop the normalized columns before returning
+    cleaned_songs.drop(columns=['normalized_title', 'normalized_artist'], inplace=True)
+
+    return cleaned_songs
@@ -0,0 +1,419 @@
+"""Finding the Spotify track of every missing like.
+
+Songs are resolved locally where possible (``prematch_songs`` against the
+library, ``resolve_identities`` by videoId or ISRC); the rest are
+searched, and each song's variants are scored until its ``SELECTION_TOP_K``
+best are known; the best one is selected. ``query_tracks`` searches any
+``providers`` service, so the reverse sync finds YouTube Music songs the
+same way.
+"""
+
+import logging
+
+from . import config, context
+from .context import data_store, run_metrics
+from .identity import IdentityResolver
+from .parallel import map_chunks
+from .prematch import CandidateIndex
+from .providers import SpotifyProvider, generate_queries
+from .results import SongResult
+from .scoring import QueryScorer, weighted_bound, weighted_scores
+from .search_executor import SearchExecutor
+from .selection import match_status, score_top_k
+from .text import extract_featured_artists, normalize_column, normalize_text
+
+logger = logging.getLogger(__name__)
+
+prematch_stats = {'songs': 0, 'candidates': 0, 'resolved': 0}
+identity_stats = {}
+selection_stats = {'songs': 0, 'variants': 0, 'pruned': 0}
+
+
+def search_executor(provider):
+    # Every search of a run (or of an account in a batch) on one service draws on the same rate limiter;
+    # waits for retry backoff are reported in the run metrics
+    return SearchExecutor(provider.search, max_workers=config.SEARCH_WORKERS, limiter=context.get(provider.limiter),
+                          sleep=run_metrics.sleeper('search_backoff_wait'), cache=context.search_cache,
+                          cache_namespace=provider.cache_namespace)
+
+
+def default_search_executor(sp):
+    return search_executor(SpotifyProvider(sp))
+
+
+def new_song_result(song, normalized_title, normalized_artist, normalized_album):
+    """Create the empty result of a song; every query's hits are added to it."""
+    return SongResult(song.get('title', ''), song.get('artist', ''), song.get('album', ''),
+                      normalized_title, normalized_artist, normalized_album if normalized_album else 'Unknown Album')
+
+
+def prepare_song(song, provider=None):
+    """Normalize a song and generate its search queries (``provider``'s, Spotify's by default).
+
+    Returns:
+        tuple: (song, normalized_title, normalized_artist, normalized_album, queries)
+    """
+    main_title, featured_artists = extract_featured_artists(song.get('title', ''))
+
+    normalized_title = normalize_text(main_title, transliterate_flag=False)
+    normalized_artist = normalize_text(song.get('artist', ''), transliterate_flag=True, translate_flag=True)
+    normalized_album = normalize_text(song.get('album', '')) if song.get('album', 'Unknown Album') != 'Unknown Album' else None
+
+    # Normalize featured artists
+    normalized_featured_artists = [normalize_text(artist, transliterate_flag=True, translate_flag=True) for artist in featured_artists]
+
+    # Generate queries using the external function
+    generate = provider.queries if provider is not None else generate_queries
+    queries = generate(normalized_title, normalized_artist, normalized_album, normalized_featured_artists)
+    return song, normalized_title, normalized_artist, normalized_album, queries
+
+
+def search_song_cascade(executor, prepared, max_results=50):
+    """Run one prepared song's queries in order, stopping once a variant clears ``SELECTION_THRESHOLD``."""
+    song, normalized_title, normalized_artist, normalized_album, queries = prepared
+    song_result = new_song_result(song, normalized_title, normalized_artist, normalized_album)
+
+    def execute(query):
+        return song_result.add_response(executor.search(query, max_results))
+
+    def score(variants):
+        # Only the hits new to this song need scoring
+        with run_metrics.timer('score_variants', items=len(variants)):
+            _score_items([song_result])
+        # Variants left unscored cannot beat the song's best so far, which did not clear the threshold
+        return max((variant.similarity_score for variant in variants if variant.similarity_score is not None), default=0.0)
+
+    context.query_cascade.run(queries, execute, score)
+    return song_result
+
+
+def search_song(executor, prepared, max_results=50, cascade=None):
+    """Search one prepared song and return its ``SongResult``."""
+    if cascade is None:
+        cascade = config.SEARCH_CASCADE
+    if cascade:
+        return search_song_cascade(executor, prepared, max_results)
+    song, normalized_title, normalized_artist, normalized_album, queries = prepared
+    song_result = new_song_result(song, normalized_title, normalized_artist, normalized_album)
+    for query in queries:
+        song_result.add_response(executor.search(query, max_results))
+    return song_result
+
+
+def query_spotify_for_tracks(sp, songs, max_results=50, executor=None, cascade=None):
+    """Search Spotify for every song and collect all variants (see ``query_tracks``)."""
+    return query_tracks(SpotifyProvider(sp), songs, max_results, executor, cascade)
+
+
+def query_tracks(provider, songs, max_results=50, executor=None, cascade=None, store_name='search_results'):
+    """Search ``provider``'s service for every song and collect all variants.
+
+    Searches run concurrently through ``executor`` (a rate-limited
+    ``SearchExecutor`` backed by ``search_cache`` by default), so queries
+    answered in an earlier run cost no API call; the returned list keeps the order of
+    ``songs`` and of each song's queries. With ``cascade`` (defaults to
+    ``SEARCH_CASCADE``) each song's queries stop at the first one that
+    yields a variant above ``SELECTION_THRESHOLD``.
+
+    Returns one ``SongResult`` per song. A track returned by several of a
+    song's queries is kept once, with the position of its first hit.
+    The results are stored in data/``store_name``.
+    """
+    with run_metrics.timer(f'query_{provider.name}_for_tracks'):
+        return _query_tracks(provider, songs, max_results, executor, cascade, store_name)
+
+
+def _query_tracks(provider, songs, max_results, executor, cascade, store_name):
+    if executor is None:
+        executor = search_executor(provider)
+    if cascade is None:
+        cascade = config.SEARCH_CASCADE
+
+    prepared_songs = [prepare_song(song, provider) for song in songs]
+
+    if cascade:
+        # Songs are searched concurrently, each song's cascade runs in order
+        all_search_results = executor.map(lambda prepared: search_song_cascade(executor, prepared, max_results), prepared_songs)
+    else:
+        # Run every query concurrently; results come back in query order
+        all_queries = [query for prepared in prepared_songs for query in prepared[4]]
+        all_results = iter(executor.search_all(all_queries, max_results))
+        all_search_results = []
+        for song, normalized_title, normalized_artist, normalized_album, queries in prepared_songs:
+            song_result = new_song_result(song, normalized_title, normalized_artist, normalized_album)
+            for query in queries:
+                song_result.add_response(next(all_results))
+            all_search_results.append(song_result)
+
+    duplicates = sum(song_result.duplicates for song_result in all_search_results)
+    logger.info(f"Search: {duplicates} duplicate hits skipped")
+
+    # Optional: write results to a file or handle them as needed
+    data_store(store_name).write(song_result.to_dict() for song_result in all_search_results)
+
+    return all_search_results
+
+
+@run_metrics.timed()
+def calculate_similarity(search_results, workers=None):
+    """Calculate similarity scores for each track variant.
+
+    Each song's variants are scored by ``scorer`` until its
+    ``SELECTION_TOP_K`` best are known (see ``_score_items``); query
+    strings are normalized once per song rather than once per variant.
+    Variants already scored (e.g. by the search cascade) are kept as is.
+    Songs are sharded across ``workers`` processes (``PARALLEL_WORKERS``
+    by default); the list is updated in place and returned.
+    """
+    # Counted here because the scoring itself may run in worker processes
+    unscored = sum(1 for song_result in search_results for variant in song_result.variants if variant.similarity_score is None)
+    # Created before forking so that worker processes inherit them
+    context.get('scorer')
+    context.get('normalization_engine')
+    with run_metrics.timer('score_variants', items=unscored):
+        search_results[:] = map_chunks(_score_chunk, search_results, workers or config.PARALLEL_WORKERS, min_chunk_size=16)
+    return search_results
+
+
+def _score_chunk(search_results):
+    """Score one chunk of songs (runs in a worker process when parallel)."""
+    _score_items(search_results)
+
+    # Persist normalizations computed in this process
+    context.normalization_cache.flush()
+    return search_results
+
+
+def _score_items(search_results, k=None):
+    """Score the unscored variants of each ``SongResult`` in place.
+
+    With a scorer that ``prunes`` (difflib), a song with more than twice
+    ``k`` unscored variants (``SELECTION_TOP_K`` by default) has them
+    scored in batches, in descending order of the bound ``weighted_bound``
+    puts on their score. Once no unscored variant can enter the song's k
+    best, the rest keep a ``similarity_score`` of None: they could not
+    have been selected. Otherwise every variant is scored in one batch.
+    """
+    if k is None:
+        k = config.SELECTION_TOP_K
+    scorer = context.scorer
+    for song_result in search_results:
+        variants = song_result.variants
+        unscored = [position for position, variant in enumerate(variants) if variant.similarity_score is None]
+        if not unscored:
+            continue
+
+        # The query is the same for every variant of a song, so it is normalized once
+        with_album = song_result.album != 'Unknown Album'
+        query = (normalize_text(song_result.query_title), normalize_text(song_result.query_artist, transliterate_flag=True),
+                 normalize_text(song_result.query_album) if with_album else None)
+        fields = {}
+        for position in unscored:
+            variant = variants[position]
+            fields[position] = (normalize_text(variant.spotify_title), normalize_text(variant.spotify_artist, transliterate_flag=True),
+                                normalize_text(variant.spotify_album) if with_album else None)
+
+        if not scorer.prunes or len(unscored) <= 2 * k:
+            # Too few variants, or too cheap to score, for pruning to pay off
+            titles, artists, albums = zip(*(fields[position] for position in unscored))
+            scores = dict(zip(unscored, weighted_scores(scorer, query[0], list(titles), query[1], list(artists),
+                                                        query[2], list(albums) if with_album else None)))
+        else:
+            query_scorer = QueryScorer(scorer, query)
+            scores = score_top_k([(weighted_bound(query, fields[position]), position) for position in unscored],
+                                 lambda positions: query_scorer.scores([fields[position] for position in positions]), k,
+                                 scored=[(variant.similarity_score, position) for position, variant in enumerate(variants)
+                                         if variant.similarity_score is not None])
+        for position, score in scores.items():
+            variants[position].similarity_score = score
+    return search_results
+
+
+def count_pruned(search_results):
+    """Add the variants that selection skipped scoring to ``selection_stats``."""
+    for song_result in search_results:
+        selection_stats['songs'] += 1
+        selection_stats['variants'] += len(song_result.variants)
+        selection_stats['pruned'] += sum(1 for variant in song_result.variants if variant.similarity_score is None)
+
+
+def _select_best_chunk(search_results):
+    """Pick the best variant of each song in one chunk (runs in a worker process when parallel).
+
+    The song's ``SELECTION_TOP_K`` best variants are kept as its ``candidates``.
+    """
+    threshold = config.SELECTION_THRESHOLD
+    k = config.SELECTION_TOP_K
+    best_matches = []
+    for song_result in search_results:
+        best_variants = song_result.best_variants(k)
+        best_match = best_variants[0].to_dict(song_result) if best_variants else {'similarity_score': 0}
+        status, reason = match_status(best_match['similarity_score'], threshold)
+        best_matches.append({
+            "original_title": song_result.title,
+            "original_artist": song_result.artist,
+            "original_album": song_result.album,
+            "best_variant": best_match,
+            "status": status,
+            "reason": reason,
+            # The placeholder variant found for no query is no candidate
+            "candidates": [variant.to_candidate() for variant in best_variants if variant is not song_result.variants[0]]
+        })
+    return best_matches
+
+
+@run_metrics.timed()
+def determine_best_matches(search_results, workers=None, resolved=(), store_name='match_results'):
+    """Determine the best match for each track and store results in data/``store_name``.
+
+    ``resolved`` matches (e.g. from ``resolve_identities``) were found
+    without searching; they are stored and returned ahead of the others.
+    Each searched match keeps the song's best variants as ``candidates``
+    for ``reselect_matches`` and review.
+    """
+    count_pruned(search_results)
+    best_matches = list(resolved)
+    best_matches += map_chunks(_select_best_chunk, search_results, workers or config.PARALLEL_WORKERS, min_chunk_size=64)
+
+    # Store the best matches for further processing
+    data_store(store_name).write(best_matches)
+
+    return best_matches
+
+
+def library_tracks(spotify_likes, added_songs):
+    """Spotify likes and tracks saved by earlier runs, shaped like Spotify search result items."""
+    tracks = []
+    for like in spotify_likes.to_dict('records'):
+        tracks.append({'id': like.get('spotify_id'), 'name': like.get('title') or '',
+                       'artists': [{'name': like.get('artist') or ''}], 'album': {'name': like.get('album') or ''}})
+    for entry in added_songs.to_dict('records'):
+        if entry.get('status') in ('added', 'not added') and entry.get('spotify_title'):
+            tracks.append({'id': entry.get('spotify_id'), 'name': entry['spotify_title'],
+                           'artists': [{'name': entry.get('spotify_artist') or ''}], 'album': {'name': entry.get('spotify_album') or ''}})
+    return tracks
+
+
+def build_candidate_index(tracks):
+    """Block library tracks on the character trigrams of their normalized titles."""
+    candidate_index = CandidateIndex()
+    titles = normalize_column([track['name'] for track in tracks])
+    for track, normalized_title in zip(tracks, titles):
+        candidate_index.add(normalized_title, track)
+    return candidate_index
+
+
+@run_metrics.timed()
+def prematch_songs(missing_songs, spotify_likes, added_songs, threshold=None, store_name='prematch_results'):
+    """
+    Drop songs that match a library track locally, scored like calculate_similarity.
+
+    Parameters:
+        missing_songs (pd.DataFrame): Songs left after clean_missing_songs.
+        spotify_likes (pd.DataFrame): Spotify likes with title, artist, album and spotify_id columns.
+        added_songs (pd.DataFrame): Songs from the added-songs log.
+        threshold (float): Score above which a library track counts as the same song
+            (``PREMATCH_THRESHOLD`` by default).
+        store_name (str): Data set the local matches are stored in.
+
+    Returns:
+        tuple: The songs that still need a Spotify search, and the local matches.
+    """
+    if threshold is None:
+        threshold = config.PREMATCH_THRESHOLD
+    candidate_index = build_candidate_index(library_tracks(spotify_likes, added_songs))
+    if not len(candidate_index) or missing_songs.empty:
+        return missing_songs, []
+
+    keep = []
+    prematched = []
+    for song in missing_songs.to_dict('records'):
+        prepared = prepare_song(song)
+        song, normalized_title, normalized_artist, normalized_album, _ = prepared
+        song_result = new_song_result(song, normalized_title, normalized_artist, normalized_album)
+        variants = song_result.add_tracks(candidate_index.candidates(normalized_title))
+        # Only the best library track matters here
+        _score_items([song_result], k=1)
+        best_variant = max((variant for variant in variants if variant.similarity_score is not None),
+                           key=lambda x: x.similarity_score, default=None)
+
+        prematch_stats['songs'] += 1
+        prematch_stats['candidates'] += len(variants)
+        matched = best_variant is not None and best_variant.similarity_score > threshold
+        keep.append(not matched)
+        if matched:
+            prematch_stats['resolved'] += 1
+            logger.info(f"Already in library: {song['title']} by {song['artist']} - "
+                        f"matches {best_variant.spotify_title} by {best_variant.spotify_artist} ({best_variant.similarity_score:.2f})")
+            prematched.append({
+                "original_title": song_result.title,
+                "original_artist": song_result.artist,
+                "original_album": song_result.album,
+                "best_variant": best_variant.to_dict(song_result),
+            })
+
+    data_store(store_name).write(prematched)
+    return missing_songs.loc[keep].copy(), prematched
+
+
+@run_metrics.timed()
+def resolve_identities(sp, songs, executor=None):
+    """
+    Resolve songs to Spotify tracks by identity, skipping text search and scoring.
+
+    Parameters:
+        sp: Spotify client.
+        songs (pd.DataFrame): Songs to resolve; only rows with a known videoId or an isrc column resolve.
+        executor (SearchExecutor): Used for ``isrc:`` searches.
+
+    Returns:
+        tuple: The songs that still need a Spotify search, and selected matches for the resolved songs.
+    """
+    if songs.empty or ('videoId' not in songs.columns and 'isrc' not in songs.columns):
+        return songs, []
+    executor = executor or default_search_executor(sp)
+    resolver = IdentityResolver(context.identity_store, sp.tracks, executor.search)
+    records = songs.to_dict('records')
+    tracks = resolver.resolve(records)
+    identity_stats.update(resolver.stats())
+
+    matches = []
+    for song, track in zip(records, tracks):
+        if track is None:
+            continue
+        song, normalized_title, normalized_artist, normalized_album, _ = prepare_song(song)
+        song_result = new_song_result(song, normalized_title, normalized_artist, normalized_album)
+        variant = song_result.add_tracks([track])[0]
+        variant.similarity_score = 1.0
+        matches.append({
+            "original_title": song_result.title,
+            "original_artist": song_result.artist,
+            "original_album": song_result.album,
+            "best_variant": variant.to_dict(song_result),
+            "status": "selected",
+            "reason": "Resolved by track identity"
+        })
+    return songs.loc[[track is None for track in tracks]].copy(), matches
+
+
+def record_identities(songs, entries, source='search'):
+    """Remember the Spotify ID of every song that was matched with confidence, keyed by its videoId."""
+    if 'videoId' not in songs.columns:
+        return
+    video_ids = {}
+    for title, artist, album, video_id in zip(songs['title'], songs['artist'], songs['album'], songs['videoId']):
+        if isinstance(video_id, str) and video_id:
+            video_ids.setdefault((title, artist, album), video_id)
+
+    identities = {}
+    for entry in entries:
+        spotify_id = entry.get('spotify_id') or entry.get('best_variant', {}).get('spotify_id')
+        if not spotify_id or entry.get('status') == 'not attempted':
+            continue
+        video_id = video_ids.get((entry['original_title'], entry['original_artist'], entry['original_album']))
+        if video_id:
+            identities[video_id] = spotify_id
+    identity_store = context.identity_store
+    known = identity_store.lookup(identities)
+    identity_store.record({video_id: spotify_id for video_id, spotify_id in identities.items()
+                           if known.get(video_id) != spotify_id}, source)
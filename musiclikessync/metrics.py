@@ -0,0 +1,222 @@
+"""Timers, counters and API call statistics for one sync run.
+
+``RunMetrics`` collects:
+
+* timers around pipeline functions (``timed``/``timer``), with an optional
+  item count so throughput such as variants scored per second can be
+  reported. Timers may nest, e.g. ``clean_missing_songs`` includes the
+  ``normalize_column`` calls it makes;
+* time spent sleeping for rate limits and backoff (``sleeper``);
+* the calls, latency, errors and 429 responses of every method called on
+  a client wrapped with ``instrument`` (spotipy, ytmusicapi, the
+  translation backend);
+* named counters and snapshots of component stats such as cache hit rates
+  (``set_section``).
+
+``report`` returns the run as a JSON-serializable dict, written with
+``write_json``. ``write_prometheus`` writes the same numbers in the
+Prometheus text format for node_exporter's textfile collector.
+"""
+
+import functools
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from .search_executor import http_status
+
+_METRIC_NAME_PATTERN = re.compile(r'[^a-zA-Z0-9_]')
+
+
+def _new_timer():
+    return {'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0, 'items': 0}
+
+
+def _new_api_stats():
+    return {'calls': 0, 'errors': 0, 'rate_limited': 0, 'seconds': 0.0, 'max_seconds': 0.0}
+
+
+class InstrumentedClient:
+    """Proxy that records every public method call of ``client`` in ``metrics``."""
+
+    def __init__(self, client, service, metrics):
+        object.__setattr__(self, '_client', client)
+        object.__setattr__(self, '_service', service)
+        object.__setattr__(self, '_metrics', metrics)
+
+    def __getattr__(self, name):
+        attribute = getattr(self._client, name)
+        if name.startswith('_') or not callable(attribute):
+            return attribute
+        metrics, service, clock = self._metrics, self._service, self._metrics._clock
+
+        @functools.wraps(attribute)
+        def call(*args, **kwargs):
+            started = clock()
+            try:
+                result = attribute(*args, **kwargs)
+            except Exception as e:
+                metrics.record_call(service, name, clock() - started, e)
+                raise
+            metrics.record_call(service, name, clock() - started)
+            return result
+        return call
+
+    def __setattr__(self, name, value):
+        setattr(self._client, name, value)
+
+
+class RunMetrics:
+    """Thread-safe collector of timers, counters and API statistics."""
+
+    def __init__(self, clock=time.perf_counter, wall_clock=time.time):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._started = clock()
+        self.started_at = wall_clock()
+        self.timers = {}
+        self.counters = {}
+        self.api = {}
+        self.sections = {}
+
+    def add_time(self, name, seconds, items=0):
+        with self._lock:
+            timer = self.timers.setdefault(name, _new_timer())
+            timer['calls'] += 1
+            timer['seconds'] += seconds
+            timer['max_seconds'] = max(timer['max_seconds'], seconds)
+            timer['items'] += items
+
+    @contextmanager
+    def timer(self, name, items=0):
+        """Time the enclosed block under ``name``, crediting it with ``items`` processed items."""
+        started = self._clock()
+        try:
+            yield
+        finally:
+            self.add_time(name, self._clock() - started, items)
+
+    def timed(self, name=None):
+        """Decorator timing every call of a function (under its own name by default)."""
+        def decorate(fn):
+            timer_name = name or fn.__name__
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.timer(timer_name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def sleeper(self, name, sleep=time.sleep):
+        """Return a ``sleep`` replacement that records the time slept under ``name``."""
+        def timed_sleep(seconds):
+            self.add_time(name, seconds)
+            sleep(seconds)
+        return timed_sleep
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def record_call(self, service, method, seconds, error=None):
+        """Record one API call and whether it failed or was rate limited."""
+        with self._lock:
+            stats = self.api.setdefault(service, {}).setdefault(method, _new_api_stats())
+            stats['calls'] += 1
+            stats['seconds'] += seconds
+            stats['max_seconds'] = max(stats['max_seconds'], seconds)
+            if error is not None:
+                stats['errors'] += 1
+                if http_status(error) == 429:
+                    stats['rate_limited'] += 1
+
+    def instrument(self, client, service):
+        """Wrap ``client`` so that its method calls are recorded under ``service``."""
+        return InstrumentedClient(client, service, self)
+
+    def set_section(self, name, values):
+        """Attach a snapshot of component stats, e.g. ``search_cache.stats()``."""
+        with self._lock:
+            self.sections[name] = dict(values)
+
+    def report(self):
+        """Return the collected metrics as a JSON-serializable dict."""
+        with self._lock:
+            stages = {}
+            for name, timer in self.timers.items():
+                stages[name] = dict(timer)
+                if timer['items']:
+                    stages[name]['items_per_second'] = timer['items'] / timer['seconds'] if timer['seconds'] else 0.0
+            api = {}
+            for service, methods in self.api.items():
+                api[service] = {}
+                for method, stats in methods.items():
+                    api[service][method] = dict(stats, mean_seconds=stats['seconds'] / stats['calls'])
+            return {
+                'started_at': datetime.fromtimestamp(self.started_at, timezone.utc).isoformat(),
+                'duration_seconds': self._clock() - self._started,
+                'stages': stages,
+                'api': api,
+                'counters': dict(self.counters),
+                'stats': {name: dict(values) for name, values in self.sections.items()},
+            }
+
+    def write_json(self, path):
+        """Write ``report()`` to ``path``."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=4)
+
+    def prometheus_lines(self, prefix='musiclikessync'):
+        """Return the metrics in the Prometheus text exposition format."""
+        report = self.report()
+        metrics = {}
+
+        def add(name, kind, value, **labels):
+            metric = f'{prefix}_{_METRIC_NAME_PATTERN.sub("_", name)}'
+            label_text = ','.join(f'{key}="{_escape_label(label_value)}"' for key, label_value in labels.items())
+            metrics.setdefault((metric, kind), []).append(f'{metric}{{{label_text}}} {float(value)!r}'
+                                                          if labels else f'{metric} {float(value)!r}')
+
+        add('run_start_time_seconds', 'gauge', self.started_at)
+        add('run_duration_seconds', 'gauge', report['duration_seconds'])
+        for stage, timer in report['stages'].items():
+            add('stage_calls_total', 'counter', timer['calls'], stage=stage)
+            add('stage_seconds_total', 'counter', timer['seconds'], stage=stage)
+            add('stage_items_total', 'counter', timer['items'], stage=stage)
+        for service, methods in report['api'].items():
+            for method, stats in methods.items():
+                add('api_calls_total', 'counter', stats['calls'], service=service, method=method)
+                add('api_errors_total', 'counter', stats['errors'], service=service, method=method)
+                add('api_rate_limited_total', 'counter', stats['rate_limited'], service=service, method=method)
+                add('api_seconds_total', 'counter', stats['seconds'], service=service, method=method)
+        for name, value in report['counters'].items():
+            add(f'{name}_total', 'counter', value)
+        for section, values in report['stats'].items():
+            for key, value in values.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    add(f'{section}_{key}', 'gauge', value)
+
+        lines = []
+        for (metric, kind), samples in metrics.items():
+            lines.append(f'# TYPE {metric} {kind}')
+            lines.extend(samples)
+        return lines
+
+    def write_prometheus(self, path, prefix='musiclikessync'):
+        """Write the metrics for node_exporter's textfile collector, replacing ``path`` atomically."""
+        temporary_path = f'{path}.tmp'
+        with open(temporary_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(self.prometheus_lines(prefix)) + '\n')
+        os.replace(temporary_path, path)
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
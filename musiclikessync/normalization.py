@@ -0,0 +1,149 @@
+"""Precompiled text normalization used to compare YouTube Music and Spotify metadata.
+
+``NormalizationEngine`` produces exactly the output of the original
+``normalize_text`` steps:
+
+1. strip a trailing mix suffix;
+2. detect Hebrew or Russian script;
+3. optionally transliterate and translate;
+4. apply NFKC, lowercase and strip;
+5. remove punctuation and collapse whitespace.
+
+Every pattern is compiled once, and the available transliteration
+languages are looked up once. Cheap checks skip work most strings do not
+need:
+
+* ASCII text has no Hebrew or Cyrillic letters and is already NFKC.
+* Script detection is a single scan over the string.
+* The suffix pattern only runs when the text contains ``' - '``.
+* One scan finds whether any punctuation or non-single-space whitespace
+  is present. Only then do the punctuation and whitespace substitutions
+  run. A single substitution with a Python callback measured slower than
+  two C-level substitutions.
+
+``normalize_many`` normalizes a batch, handling each distinct string once
+and translating all non-English strings of the batch up front when the
+translator supports prefetching.
+"""
+
+import re
+import unicodedata
+
+SUFFIX_PATTERN = re.compile(r' - (Original Mix|Remix|Edit|Version|Extended Mix|Instrumental)$', re.IGNORECASE)
+
+_SCRIPT_PATTERN = re.compile('[\u0400-\u04FF\u0590-\u05FF]')  # Cyrillic or Hebrew
+_HEBREW_PATTERN = re.compile('[\u0590-\u05FF]')
+# Anything the cleanup would change: punctuation, or whitespace other than a single space
+_NEEDS_CLEANUP_PATTERN = re.compile(r'[^\w ]|  ')
+_PUNCTUATION_PATTERN = re.compile(r'[^\w\s]')
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+
+
+def strip_suffixes(text):
+    """Remove common suffixes such as ' - Original Mix' or ' - Remix'."""
+    if ' - ' not in text:
+        return text
+    return SUFFIX_PATTERN.sub('', text)
+
+
+def detect_language(text):
+    """Return 'he' for text containing Hebrew letters, 'ru' for Cyrillic, else 'en'."""
+    if text.isascii():
+        return 'en'
+    match = _SCRIPT_PATTERN.search(text)
+    if match is None:
+        return 'en'
+    if match.group() >= '\u0590':
+        return 'he'
+    # Hebrew anywhere in the text wins over Cyrillic
+    return 'he' if _HEBREW_PATTERN.search(text, match.end()) else 'ru'
+
+
+def clean_text(text):
+    """NFKC-normalize, lowercase, strip, remove punctuation and collapse whitespace."""
+    if not text.isascii():
+        text = unicodedata.normalize('NFKC', text)
+    text = text.lower().strip()
+    if _NEEDS_CLEANUP_PATTERN.search(text) is None:
+        return text
+    return _WHITESPACE_PATTERN.sub(' ', _PUNCTUATION_PATTERN.sub('', text))
+
+
+def _default_transliterator():
+    from transliterate import get_available_language_codes, translit
+    return (lambda text, language_code: translit(text, language_code, reversed=True),
+            frozenset(get_available_language_codes()))
+
+
+class NormalizationEngine:
+    """Normalize strings with optional transliteration and translation.
+
+    Parameters:
+        translator: Object with ``translate(text, language_code)`` and
+            optionally ``prefetch(pairs)`` (e.g. ``ArtistTranslator``); needed
+            only when translating.
+        transliterate (callable): ``(text, language_code) -> text``; defaults
+            to the ``transliterate`` package.
+        language_codes (iterable): Languages ``transliterate`` supports.
+    """
+
+    def __init__(self, translator=None, transliterate=None, language_codes=None):
+        self.translator = translator
+        self._transliterate = transliterate
+        self._language_codes = frozenset(language_codes) if language_codes is not None else None
+
+    def _load_transliterator(self):
+        default, codes = _default_transliterator()
+        if self._transliterate is None:
+            self._transliterate = default
+        if self._language_codes is None:
+            self._language_codes = codes
+
+    def prepare(self, text, transliterate_flag=False):
+        """Strip suffixes, detect the language and optionally transliterate.
+
+        Returns the detected language code and the text that is handed to
+        the translator when translation is requested.
+        """
+        text = strip_suffixes(text)
+        language_code = detect_language(text)
+        if not transliterate_flag or language_code == 'en':
+            return language_code, text
+        try:
+            if self._language_codes is None or self._transliterate is None:
+                self._load_transliterator()
+            if language_code in self._language_codes:
+                return language_code, self._transliterate(text, language_code)
+        except Exception as e:
+            print(f"Transliteration error for text '{text}': {e}")
+        return language_code, text
+
+    def normalize(self, text, transliterate_flag=False, translate_flag=False):
+        """Return the normalized text and whether it may be cached (False when translation failed)."""
+        language_code, prepared_text = self.prepare(text, transliterate_flag)
+        return self._finish(text, language_code, prepared_text, translate_flag)
+
+    def _finish(self, text, language_code, prepared_text, translate_flag):
+        cacheable = True
+        if translate_flag and language_code != 'en':
+            try:
+                prepared_text = self.translator.translate(prepared_text, language_code)
+            except Exception as e:
+                cacheable = False
+                print(f"Translation error for text '{text}': {e}")
+        return clean_text(prepared_text), cacheable
+
+    def normalize_batch(self, strings, transliterate_flag=False, translate_flag=False):
+        """Like ``normalize`` for every string, returning ``(normalized, cacheable)`` pairs in order."""
+        strings = list(strings)
+        prepared = {text: self.prepare(text, transliterate_flag) for text in dict.fromkeys(strings)}
+        if translate_flag and hasattr(self.translator, 'prefetch'):
+            self.translator.prefetch({(language_code, prepared_text)
+                                      for language_code, prepared_text in prepared.values() if language_code != 'en'})
+        results = {text: self._finish(text, language_code, prepared_text, translate_flag)
+                   for text, (language_code, prepared_text) in prepared.items()}
+        return [results[text] for text in strings]
+
+    def normalize_many(self, strings, transliterate_flag=False, translate_flag=False):
+        """Normalize a batch of strings, returning the normalized strings in order."""
+        return [normalized for normalized, _ in self.normalize_batch(strings, transliterate_flag, translate_flag)]
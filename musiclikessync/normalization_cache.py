@@ -0,0 +1,145 @@
+"""Persistent memoization for ``normalize_text``.
+
+Results are stored in two tiers: a bounded in-process LRU and an SQLite
+table on disk, so repeated runs skip every string that was already
+normalized (including the transliteration and translation round-trips).
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+def cache_key(text, transliterate_flag=False, translate_flag=False):
+    """Return the content-addressed key for a normalization request."""
+    payload = f"{int(bool(transliterate_flag))}{int(bool(translate_flag))}\x00{text}"
+    return hashlib.blake2b(payload.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class NormalizationCache:
+    """Two-tier (LRU + SQLite) cache keyed on (text, transliterate_flag, translate_flag).
+
+    Parameters:
+        path (str): SQLite file for the on-disk tier, or None to keep the cache in memory only.
+        max_entries (int): Size of the in-process LRU tier.
+        flush_every (int): Number of new entries buffered before they are committed to disk.
+    """
+
+    def __init__(self, path='data/normalization_cache.sqlite', max_entries=100000, flush_every=500):
+        self.path = path
+        self.max_entries = max_entries
+        self.flush_every = flush_every
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lru = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._connection = None
+        self._connection_pid = None
+        self._inherited_connections = []
+
+    def _db(self):
+        # Connections must not be shared with forked worker processes, so
+        # reopen lazily whenever the process id changes.
+        if self.path is None:
+            return None
+        if self._connection is None or self._connection_pid != os.getpid():
+            if self._connection is not None:
+                # Leave the parent's connection untouched (closing it here
+                # could interfere with the parent's locks)
+                self._inherited_connections.append(self._connection)
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS normalized (key TEXT PRIMARY KEY, value TEXT NOT NULL)'
+            )
+            self._connection_pid = os.getpid()
+        return self._connection
+
+    def _remember(self, key, value):
+        self._lru[key] = value
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def get(self, text, transliterate_flag=False, translate_flag=False):
+        """Return the cached normalization, or None when the string has not been seen."""
+        key = cache_key(text, transliterate_flag, translate_flag)
+        with self._lock:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                self.memory_hits += 1
+                return self._lru[key]
+            value = self._pending.get(key)
+            db = self._db()
+            if value is None and db is not None:
+                row = db.execute('SELECT value FROM normalized WHERE key = ?', (key,)).fetchone()
+                value = row[0] if row else None
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, value)
+            return value
+
+    def put(self, text, value, transliterate_flag=False, translate_flag=False):
+        """Store a normalization result in both tiers."""
+        key = cache_key(text, transliterate_flag, translate_flag)
+        with self._lock:
+            self._remember(key, value)
+            if self.path is None:
+                return
+            self._pending[key] = value
+            if len(self._pending) >= self.flush_every:
+                self._flush_locked()
+
+    def get_or_compute(self, text, compute, transliterate_flag=False, translate_flag=False):
+        """Return the cached value or compute, store and return it."""
+        value = self.get(text, transliterate_flag, translate_flag)
+        if value is None:
+            value = compute(text, transliterate_flag, translate_flag)
+            self.put(text, value, transliterate_flag, translate_flag)
+        return value
+
+    def _flush_locked(self):
+        db = self._db()
+        if db is None or not self._pending:
+            return
+        with db:
+            db.executemany(
+                'INSERT OR REPLACE INTO normalized (key, value) VALUES (?, ?)',
+                self._pending.items(),
+            )
+        self._pending.clear()
+
+    def flush(self):
+        """Commit buffered entries to the on-disk tier."""
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        """Flush pending entries and close the SQLite connection."""
+        with self._lock:
+            self._flush_locked()
+            if self._connection is not None:
+                if self._connection_pid == os.getpid():
+                    self._connection.close()
+                else:
+                    self._inherited_connections.append(self._connection)
+            self._connection = None
+
+    def stats(self):
+        """Return hit/miss counters for the current process."""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        hits = self.memory_hits + self.disk_hits
+        return {
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': hits / lookups if lookups else 0.0,
+        }
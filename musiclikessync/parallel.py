@@ -0,0 +1,62 @@
+"""Process-pool execution of the CPU-bound pipeline stages.
+
+``map_chunks`` splits a list into contiguous chunks, hands each chunk to a
+worker process and concatenates the results in the original order, so the
+output is identical to running ``fn`` over the whole list serially.
+
+Workers are started with the ``fork`` method: they inherit the already
+defined pipeline functions, caches and translation dictionary instead of
+re-importing the script. Where ``fork`` is unavailable (Windows) or the
+input is too small to amortize the process start-up, the work runs in
+the calling process.
+"""
+
+import math
+import os
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def can_fork():
+    import multiprocessing
+    return 'fork' in multiprocessing.get_all_start_methods()
+
+
+def chunk_size_for(item_count, workers, chunks_per_worker=4, min_chunk_size=1):
+    """Pick a chunk size giving each worker a few chunks (for load balancing) without tiny IPC round-trips."""
+    if item_count <= 0:
+        return min_chunk_size
+    return max(min_chunk_size, math.ceil(item_count / (workers * chunks_per_worker)))
+
+
+def chunked(items, size):
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+def map_chunks(fn, items, workers=None, chunk_size=None, min_chunk_size=1):
+    """Apply ``fn`` (list -> list of equal length) to chunks of ``items`` and concatenate the results in order.
+
+    Parameters:
+        fn (callable): Picklable function processing one chunk.
+        items (list): Work items.
+        workers (int): Number of processes; defaults to the number of CPUs.
+        chunk_size (int): Items per chunk; tuned by ``chunk_size_for`` when omitted.
+        min_chunk_size (int): Lower bound for the tuned chunk size.
+    """
+    items = list(items)
+    workers = workers or default_workers()
+    if chunk_size is None:
+        chunk_size = chunk_size_for(len(items), workers, min_chunk_size=min_chunk_size)
+    chunks = chunked(items, chunk_size)
+    if workers <= 1 or len(chunks) <= 1 or not can_fork():
+        return [result for chunk in chunks for result in fn(chunk)]
+
+    # Imported on first use so that importing the pipeline stays fast
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    context = multiprocessing.get_context('fork')
+    with ProcessPoolExecutor(max_workers=min(workers, len(chunks)), mp_context=context) as pool:
+        return [result for chunk_results in pool.map(fn, chunks) for result in chunk_results]
@@ -0,0 +1,198 @@
+"""The steps of a sync, as run by the notebook and the command line."""
+
+from . import config, context
+from .adding import add_matches, add_tracks_to_spotify, added_songs_journal, default_library_writer, stream_stats, stream_sync
+from .context import run_metrics
+from .likes import (build_library_index, clean_missing_songs, load_added_songs, read_incremental_likes,
+                    read_or_fetch_spotify_likes, read_or_fetch_youtube_likes, record_sync_outcomes)
+from .matching import (calculate_similarity, determine_best_matches, identity_stats, prematch_songs, prematch_stats,
+                       query_spotify_for_tracks, record_identities, resolve_identities, selection_stats)
+from .text import extract_featured_artists, normalize_column, prefetch_translations
+
+
+class SyncRun:
+    """One sync, step by step, keeping each step's results for inspection.
+
+    Every step runs the steps it depends on when they have not run yet,
+    so ``SyncRun(ytmusic, sp).add()`` loads the likes to index the
+    library first. ``sync`` runs them all.
+    """
+
+    def __init__(self, ytmusic, sp):
+        self.ytmusic = ytmusic
+        self.sp = sp
+        self.youtube_likes = None
+        self.spotify_likes = None
+        self.added_songs = None
+        self.library_index = None
+        self.missing_songs = None
+        self.prematched_songs = []
+        self.songs_to_search = None
+        self.identity_matches = []
+        self.best_matches = []
+        self.entries = []
+
+    def load_likes(self, refresh=False):
+        """Load the YouTube Music likes to process and all Spotify likes.
+
+        With ``INCREMENTAL_SYNC`` only likes added since the last run are
+        fetched; otherwise the likes stored under data/ are read, and
+        fetched when they were never stored or with ``refresh``.
+        """
+        if config.INCREMENTAL_SYNC:
+            self.youtube_likes, self.spotify_likes = read_incremental_likes(self.ytmusic, self.sp)
+        else:
+            self.youtube_likes = read_or_fetch_youtube_likes(self.ytmusic, refresh=refresh).drop_duplicates()
+            self.spotify_likes = read_or_fetch_spotify_likes(self.sp, refresh=refresh)
+        return self.youtube_likes, self.spotify_likes
+
+    def index_library(self):
+        """Index Spotify likes and previously added songs once for O(1) membership checks."""
+        if self.spotify_likes is None:
+            self.load_likes()
+        self.added_songs = load_added_songs()
+        self.library_index = build_library_index(self.spotify_likes, self.added_songs)
+        return self.library_index
+
+    def find_missing(self, missing_songs=None):
+        """Find the likes missing from Spotify and resolve those that need no search.
+
+        ``missing_songs`` skips the comparison with the library when the
+        caller already diffed the libraries. Returns the songs left to
+        search; ``prematched_songs`` and ``identity_matches`` hold the songs
+        resolved against the library and by track identity.
+        """
+        if self.library_index is None:
+            self.index_library()
+
+        # Drop songs already liked on Spotify or handled in an earlier run
+        if missing_songs is None:
+            missing_songs = clean_missing_songs(self.youtube_likes, self.library_index)
+
+        # Translate every non-English artist and featured artist in batches before normalizing
+        featured_artist_names = [artist for title in missing_songs['title'] for artist in extract_featured_artists(title)[1]]
+        prefetch_translations(list(missing_songs['artist']) + featured_artist_names)
+
+        # Resolve near-duplicates of library tracks locally so they are never searched
+        if config.PREMATCH:
+            missing_songs, self.prematched_songs = prematch_songs(missing_songs, self.spotify_likes, self.added_songs)
+            if config.IDENTITY_RESOLUTION:
+                record_identities(self.youtube_likes, self.prematched_songs, source='prematch')
+
+        # Ensure normalization is done before querying (streaming mode normalizes each song as it is searched)
+        if not config.STREAMING_MODE:
+            missing_songs['normalized_title'] = normalize_column(missing_songs['title'], transliterate_flag=False)
+            missing_songs['normalized_artist'] = normalize_column(missing_songs['artist'], transliterate_flag=True, translate_flag=True)
+            missing_songs['normalized_album'] = [
+                normalized if album != 'Unknown Album' else None
+                for album, normalized in zip(missing_songs['album'], normalize_column(missing_songs['album'], transliterate_flag=False))
+            ]
+        self.missing_songs = missing_songs
+
+        # Songs with a known Spotify identity are added without searching
+        self.songs_to_search, self.identity_matches = missing_songs, []
+        if config.IDENTITY_RESOLUTION:
+            self.songs_to_search, self.identity_matches = resolve_identities(self.sp, missing_songs)
+        return self.songs_to_search
+
+    def _search_batch(self):
+        return self.songs_to_search.head(config.SEARCH_LIMIT).to_dict('records')
+
+    def match(self):
+        """Search, score and select the best match of every song left to search.
+
+        The matches are stored in data/match_results after the identity
+        matches, ready for ``add``.
+        """
+        if self.songs_to_search is None:
+            self.find_missing()
+        search_results = query_spotify_for_tracks(self.sp, self._search_batch())
+        search_results_with_scores = calculate_similarity(search_results)
+        self.best_matches = determine_best_matches(search_results_with_scores, resolved=self.identity_matches)
+        return self.best_matches
+
+    def add(self):
+        """Add the selected tracks in data/match_results to Spotify and return the log entries."""
+        if self.library_index is None:
+            self.index_library()
+        self._added(add_tracks_to_spotify(self.sp, self.library_index))
+        return self.entries
+
+    def stream(self):
+        """Add the identity matches, then search, score, select and add each song as it flows through the pipeline."""
+        if self.songs_to_search is None:
+            self.find_missing()
+        entries = []
+        if self.identity_matches:
+            entries = add_matches(self.identity_matches, self.library_index, default_library_writer(self.sp), added_songs_journal())
+        self._added(entries + stream_sync(self.sp, self._search_batch(), self.library_index))
+        return self.entries
+
+    def _added(self, entries):
+        self.entries = entries
+        if config.IDENTITY_RESOLUTION:
+            record_identities(self.youtube_likes, entries)
+
+    def record_outcomes(self):
+        """Store the outcome of every processed like for the next incremental run."""
+        if config.INCREMENTAL_SYNC and self.missing_songs is not None:
+            record_sync_outcomes(context.sync_state, self.youtube_likes, self.missing_songs, self.entries)
+
+    def sync(self, dry_run=False):
+        """Run every step; with ``dry_run`` stop after matching, adding nothing to Spotify."""
+        self.find_missing()
+        return self.match_and_add(dry_run)
+
+    def match_and_add(self, dry_run=False):
+        """Run the steps after ``find_missing``; with ``dry_run`` stop after matching."""
+        if dry_run:
+            self.match()
+            return []
+        if config.STREAMING_MODE:
+            self.stream()
+        else:
+            self.match()
+            self.add()
+        self.record_outcomes()
+        return self.entries
+
+
+def component_stats():
+    """Return the stats of every component used in this run, by report section."""
+    sections = {}
+    normalization_cache = context.peek('normalization_cache')
+    if normalization_cache is not None:
+        normalization_cache.flush()
+        sections['normalization_cache'] = normalization_cache.stats()
+    for section, name in [('artist_translations', 'artist_translator'), ('search_cascade', 'query_cascade'),
+                          ('search_cache', 'search_cache'), ('sync_state', 'sync_state'), ('http_transport', 'transport')]:
+        component = context.peek(name)
+        if component is not None:
+            sections[section] = component.stats()
+    if prematch_stats['songs']:
+        sections['prematch'] = prematch_stats
+    if selection_stats['songs']:
+        sections['selection'] = selection_stats
+    if identity_stats:
+        sections['identity_resolution'] = identity_stats
+    if 'seconds' in stream_stats:
+        sections['streaming'] = stream_stats
+    return sections
+
+
+def write_run_report(path=None, textfile=None):
+    """Print the component stats and write them with the stage timings to the run report.
+
+    ``path`` and ``textfile`` default to ``RUN_REPORT_PATH`` and
+    ``METRICS_TEXTFILE``; returns the report path.
+    """
+    path = path or config.RUN_REPORT_PATH
+    textfile = textfile or config.METRICS_TEXTFILE
+    for name, stats in component_stats().items():
+        print(f"{name.replace('_', ' ').capitalize()}:", stats)
+        run_metrics.set_section(name, stats)
+    run_metrics.write_json(path)
+    if textfile:
+        run_metrics.write_prometheus(textfile)
+    print("Run report:", path)
+    return path
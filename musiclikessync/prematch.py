@@ -0,0 +1,63 @@
+"""Candidate lookup for matching YouTube likes against the local library.
+
+``CandidateIndex`` is a character n-gram blocking index over normalized
+titles. Looking up a title returns only the few library tracks that
+share a large part of its n-grams (by Dice coefficient), so each like is
+scored against a handful of candidates instead of the whole library.
+"""
+
+from collections import Counter
+
+
+def ngrams(text, n=3):
+    """Return the set of character n-grams of ``text`` padded with one space on each side."""
+    padded = f' {text} '
+    return {padded[start:start + n] for start in range(len(padded) - n + 1)}
+
+
+class CandidateIndex:
+    """Inverted n-gram index returning likely matches for a normalized title.
+
+    Parameters:
+        n (int): N-gram length.
+        max_candidates (int): Most candidates returned per lookup, best overlap first.
+        min_overlap (float): Minimum Dice coefficient between the n-gram sets.
+    """
+
+    def __init__(self, n=3, max_candidates=10, min_overlap=0.5):
+        self.n = n
+        self.max_candidates = max_candidates
+        self.min_overlap = min_overlap
+        self._postings = {}
+        self._items = []
+        self._sizes = []
+
+    def __len__(self):
+        return len(self._items)
+
+    def add(self, key, item):
+        """Index ``item`` under the normalized string ``key``."""
+        grams = ngrams(key, self.n)
+        position = len(self._items)
+        self._items.append(item)
+        self._sizes.append(len(grams))
+        for gram in grams:
+            self._postings.setdefault(gram, []).append(position)
+
+    def candidates(self, key):
+        """Return the indexed items whose keys overlap ``key`` enough, best first."""
+        grams = ngrams(key, self.n)
+        if not grams:
+            return []
+        shared = Counter()
+        for gram in grams:
+            postings = self._postings.get(gram)
+            if postings:
+                shared.update(postings)
+        scored = []
+        for position, count in shared.items():
+            overlap = 2 * count / (len(grams) + self._sizes[position])
+            if overlap >= self.min_overlap:
+                scored.append((overlap, position))
+        scored.sort(key=lambda entry: (-entry[0], entry[1]))
+        return [self._items[position] for _, position in scored[:self.max_candidates]]
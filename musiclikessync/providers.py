@@ -0,0 +1,131 @@
+"""The music services a sync searches and adds tracks to.
+
+Matching only needs three things from the service it adds to: the search
+queries of a song, a ``search(q, limit, type)`` returning Spotify-shaped
+responses (``{'tracks': {'items': [...]}}`` of tracks with ``id``,
+``name``, ``artists`` and ``album``), and a way to save tracks to the
+library. ``SpotifyProvider`` (YouTube Music -> Spotify) and
+``YouTubeMusicProvider`` (Spotify -> YouTube Music) supply them, so both
+directions share the search executor and cache, the scoring, the
+selection and the batched, journaled adds. In match results and add logs
+of the reverse direction the ``spotify_*`` fields describe the YouTube
+Music track, and ``spotify_id`` holds its videoId.
+"""
+
+from .library_writer import SPOTIFY_MAX_IDS_PER_CALL
+
+
+def generate_queries(normalized_title, normalized_artist, normalized_album, featured_artists):
+    """Build Spotify search queries for a song, ordered by expected precision.
+
+    The plain title/artist query comes first; variants that move featured
+    artists into the title or add album constraints follow. The search
+    cascade relies on this order when it stops early.
+    """
+    queries = []
+
+    # Ensure featured_artists is a list
+    if not isinstance(featured_artists, list):
+        featured_artists = [featured_artists]
+
+    # Concatenate featured artists to the main artist
+    all_artists = normalized_artist
+    if featured_artists:
+        all_artists += ' ' + ' '.join(featured_artists)
+
+    # Base query with title and artist
+    base_query = f"track:{normalized_title} artist:{all_artists}"
+    queries.append(base_query)
+
+    # Query with featured artists in the title
+    if featured_artists:
+        title_with_feat = f"{normalized_title} (feat. {' '.join(featured_artists)})"
+        queries.append(f"track:{title_with_feat} artist:{normalized_artist}")
+
+    # Queries with album if it exists
+    if normalized_album:
+        queries.append(f"{base_query} album:{normalized_album}")
+        if featured_artists:
+            queries.append(f"track:{title_with_feat} artist:{normalized_artist} album:{normalized_album}")
+
+            # Special case: featured artist in all fields
+            album_with_feat = f"{normalized_album} (feat. {' '.join(featured_artists)})"
+            queries.append(f"track:{normalized_title} artist:{all_artists} album:{album_with_feat}")
+            queries.append(f"track:{title_with_feat} artist:{all_artists} album:{normalized_album}")
+            queries.append(f"track:{title_with_feat} artist:{all_artists} album:{album_with_feat}")
+
+    return queries
+
+
+def youtube_queries(normalized_title, normalized_artist, normalized_album, featured_artists):
+    """Build YouTube Music search queries for a song, ordered by expected precision.
+
+    YouTube Music has no field filters, so each query is free text; the
+    album narrows the last one down.
+    """
+    if not isinstance(featured_artists, list):
+        featured_artists = [featured_artists]
+    base_query = f"{normalized_title} {normalized_artist}"
+    queries = [base_query]
+    if featured_artists:
+        queries.append(f"{base_query} {' '.join(featured_artists)}")
+    if normalized_album:
+        queries.append(f"{base_query} {normalized_album}")
+    return queries
+
+
+def youtube_track(result):
+    """Convert a ``ytmusic.search`` song result into a search response track."""
+    album = result.get('album')
+    return {
+        'id': result.get('videoId'),
+        'name': result.get('title') or '',
+        'artists': [{'name': artist.get('name') or ''} for artist in result.get('artists') or []],
+        'album': {'name': (album.get('name') or '') if album else ''},
+    }
+
+
+class SpotifyProvider:
+    """Search and save tracks in a Spotify library through a spotipy client."""
+
+    name = 'spotify'
+    # Spotify's queries always carry field filters, so they need no prefix in the shared search cache
+    cache_namespace = None
+    # Rate limiter of the searches, see context
+    limiter = 'search_limiter'
+    write_batch_size = SPOTIFY_MAX_IDS_PER_CALL
+
+    def __init__(self, sp):
+        self.sp = sp
+
+    queries = staticmethod(generate_queries)
+
+    def search(self, q, limit=10, type='track'):
+        return self.sp.search(q=q, limit=limit, type=type)
+
+    def save(self, track_ids):
+        return self.sp.current_user_saved_tracks_add(tracks=track_ids)
+
+
+class YouTubeMusicProvider:
+    """Search songs and like them on YouTube Music through a ytmusicapi client."""
+
+    name = 'ytmusic'
+    cache_namespace = 'ytmusic'
+    limiter = 'ytmusic_search_limiter'
+    # Songs are liked one request at a time
+    write_batch_size = 1
+
+    def __init__(self, ytmusic):
+        self.ytmusic = ytmusic
+
+    queries = staticmethod(youtube_queries)
+
+    def search(self, q, limit=10, type='track'):
+        results = self.ytmusic.search(q, filter='songs', limit=limit)
+        return {'tracks': {'items': [youtube_track(result) for result in results if result.get('videoId')][:limit]}}
+
+    def save(self, track_ids):
+        """Like every song; returns None like ``current_user_saved_tracks_add`` so the writer counts them added."""
+        for video_id in track_ids:
+            self.ytmusic.rate_song(video_id, 'LIKE')
@@ -0,0 +1,115 @@
+"""Compact in-memory model of Spotify search results.
+
+A song's original and query title/artist/album are the same for every
+hit of every query, so ``SongResult`` stores them once and keeps the hits
+as slotted ``Variant`` records holding only the Spotify fields and the
+score. A track returned by several queries is kept (and scored) once.
+``to_dict`` produces the legacy dict layout written to the JSON files.
+"""
+
+import heapq
+
+
+class Variant:
+    """One Spotify track found for a song."""
+
+    __slots__ = ('spotify_title', 'spotify_artist', 'spotify_album', 'spotify_id', 'similarity_score')
+
+    def __init__(self, spotify_title, spotify_artist, spotify_album, spotify_id, similarity_score=None):
+        self.spotify_title = spotify_title
+        self.spotify_artist = spotify_artist
+        self.spotify_album = spotify_album
+        self.spotify_id = spotify_id
+        self.similarity_score = similarity_score
+
+    @classmethod
+    def from_track(cls, track):
+        """Build a variant from a track object of a search response."""
+        return cls(track['name'], ', '.join(artist['name'] for artist in track['artists']),
+                   track['album']['name'], track['id'])
+
+    def to_dict(self, song_result):
+        """Return the legacy variant dict with the song's header fields."""
+        variant = {
+            'original_title': song_result.title,
+            'original_artist': song_result.artist,
+            'original_album': song_result.album,
+            'query_title': song_result.query_title,
+            'query_artist': song_result.query_artist,
+            'query_album': song_result.query_album,
+            'spotify_title': self.spotify_title,
+            'spotify_artist': self.spotify_artist,
+            'spotify_album': self.spotify_album,
+            'spotify_id': self.spotify_id,
+        }
+        if self.similarity_score is not None:
+            variant['similarity_score'] = self.similarity_score
+        return variant
+
+    def to_candidate(self):
+        """Return the Spotify fields and score, as stored in a match's candidates."""
+        return {
+            'spotify_title': self.spotify_title,
+            'spotify_artist': self.spotify_artist,
+            'spotify_album': self.spotify_album,
+            'spotify_id': self.spotify_id,
+            'similarity_score': self.similarity_score,
+        }
+
+
+class SongResult:
+    """All variants found for one song, led by a placeholder holding only the query details.
+
+    The placeholder keeps a song that no query found anything for in the
+    match results, as the first entry of its variants.
+    """
+
+    __slots__ = ('title', 'artist', 'album', 'query_title', 'query_artist', 'query_album',
+                 'variants', 'duplicates', '_seen_ids')
+
+    def __init__(self, title, artist, album, query_title, query_artist, query_album):
+        self.title = title
+        self.artist = artist
+        self.album = album
+        self.query_title = query_title
+        self.query_artist = query_artist
+        self.query_album = query_album
+        self.variants = [Variant('', '', '', '')]
+        self.duplicates = 0
+        self._seen_ids = set()
+
+    def add_tracks(self, tracks):
+        """Add the tracks of one search response, skipping IDs already present; return the new variants."""
+        added = []
+        for track in tracks:
+            track_id = track.get('id')
+            if track_id:
+                if track_id in self._seen_ids:
+                    self.duplicates += 1
+                    continue
+                self._seen_ids.add(track_id)
+            variant = Variant.from_track(track)
+            self.variants.append(variant)
+            added.append(variant)
+        return added
+
+    def add_response(self, result):
+        """Add the tracks of a ``sp.search`` response (which may be None or empty)."""
+        if result and 'tracks' in result and 'items' in result['tracks']:
+            return self.add_tracks(result['tracks']['items'])
+        return []
+
+    def best_variants(self, k):
+        """Return the ``k`` best scored variants, best first; among equal scores the first found ranks first."""
+        scored = [(position, variant) for position, variant in enumerate(self.variants) if variant.similarity_score is not None]
+        best = heapq.nsmallest(k, scored, key=lambda item: (-item[1].similarity_score, item[0]))
+        return [variant for _, variant in best]
+
+    def to_dict(self):
+        """Return the legacy ``{'title', 'artist', 'album', 'variants'}`` layout."""
+        return {
+            'title': self.title,
+            'artist': self.artist,
+            'album': self.album,
+            'variants': [variant.to_dict(self) for variant in self.variants],
+        }
@@ -0,0 +1,92 @@
+"""Fair sharing of one API request budget between the accounts of a batch.
+
+Each account's searches are paced by its own ``TokenBucket`` (and paused
+by its own 429 responses), but every account of a batch also draws on a
+central budget. ``FairScheduler`` grants that budget's requests to the
+waiting accounts in turn, so an account sending many concurrent requests
+cannot starve one that sends a few: while several accounts are waiting,
+each gets every n-th request. ``ScheduledClient`` makes every API call of
+one account's client wait for its turn.
+"""
+
+import functools
+import threading
+import time
+from collections import Counter
+
+
+class FairScheduler:
+    """Grant up to ``rate`` requests per second, round-robin between the accounts waiting.
+
+    Parameters:
+        rate (float): Requests per second shared by all accounts.
+        capacity (float): Requests that may be sent at once after an idle
+            period (``rate`` by default).
+    """
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        # Accounts with requests waiting, in turn order, with the number of their waiting requests
+        self._waiting = {}
+        self._condition = threading.Condition()
+        self.granted = Counter()
+        self.wait_seconds = Counter()
+
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, account):
+        """Block until it is ``account``'s turn and the budget has a request left."""
+        started = self._clock()
+        with self._condition:
+            # An account joins at the end of the turn order
+            self._waiting[account] = self._waiting.get(account, 0) + 1
+            while True:
+                self._refill()
+                if self._tokens >= 1 and next(iter(self._waiting)) == account:
+                    break
+                self._condition.wait(None if self._tokens >= 1 else (1 - self._tokens) / self.rate)
+            self._tokens -= 1
+            waiting = self._waiting.pop(account) - 1
+            if waiting:
+                # Served: go to the end of the turn order
+                self._waiting[account] = waiting
+            self.granted[account] += 1
+            self.wait_seconds[account] += self._clock() - started
+            self._condition.notify_all()
+
+    def stats(self):
+        """Return the requests granted to each account and the seconds they waited for them."""
+        with self._condition:
+            return {account: {'requests': self.granted[account], 'wait_seconds': self.wait_seconds[account]}
+                    for account in self.granted}
+
+
+class ScheduledClient:
+    """Proxy that makes every public method call of ``client`` wait for ``account``'s turn."""
+
+    def __init__(self, client, scheduler, account):
+        object.__setattr__(self, '_client', client)
+        object.__setattr__(self, '_scheduler', scheduler)
+        object.__setattr__(self, '_account', account)
+
+    def __getattr__(self, name):
+        attribute = getattr(self._client, name)
+        if name.startswith('_') or not callable(attribute):
+            return attribute
+        scheduler, account = self._scheduler, self._account
+
+        @functools.wraps(attribute)
+        def call(*args, **kwargs):
+            scheduler.acquire(account)
+            return attribute(*args, **kwargs)
+        return call
+
+    def __setattr__(self, name, value):
+        setattr(self._client, name, value)
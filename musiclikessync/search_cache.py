@@ -0,0 +1,137 @@
+"""Durable cache of Spotify search responses.
+
+Responses are keyed by the exact query string and result limit and kept
+in an SQLite table as zlib-compressed JSON holding only the track fields
+the matcher reads. Empty responses are cached as well (with their own,
+usually shorter, TTL) so songs that Spotify does not have are not
+searched again on every run.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+DAY = 24 * 60 * 60
+
+
+def slim_track(track):
+    """Keep only the track fields used for matching."""
+    return {
+        'id': track.get('id'),
+        'name': track.get('name'),
+        'artists': [{'name': artist.get('name')} for artist in track.get('artists') or []],
+        'album': {'name': (track.get('album') or {}).get('name')},
+    }
+
+
+def search_items(response):
+    """Return the track items of a search response (empty for missing/invalid responses)."""
+    if response and 'tracks' in response and 'items' in response['tracks']:
+        return [item for item in response['tracks']['items'] if item]
+    return []
+
+
+class SearchCache:
+    """SQLite-backed search cache with TTL and negative-result caching.
+
+    Parameters:
+        path (str): SQLite database file; ``':memory:'`` keeps it in memory.
+        ttl (float): Seconds a response with hits stays valid; None never expires.
+        negative_ttl (float): Seconds an empty response stays valid; None never expires.
+    """
+
+    def __init__(self, path='data/search_cache.sqlite', ttl=30 * DAY, negative_ttl=7 * DAY, clock=time.time):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._clock = clock
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self._lock = threading.Lock()
+        if path != ':memory:':
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS searches ('
+            ' query TEXT NOT NULL, result_limit INTEGER NOT NULL, stored_at REAL NOT NULL,'
+            ' item_count INTEGER NOT NULL, payload BLOB NOT NULL,'
+            ' PRIMARY KEY (query, result_limit)) WITHOUT ROWID'
+        )
+        self._db.commit()
+
+    def _is_fresh(self, stored_at, item_count):
+        ttl = self.ttl if item_count else self.negative_ttl
+        return ttl is None or self._clock() - stored_at <= ttl
+
+    def get(self, query, limit):
+        """Return the cached response for ``(query, limit)``, or None on a miss."""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT stored_at, item_count, payload FROM searches WHERE query = ? AND result_limit = ?',
+                (query, limit),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            stored_at, item_count, payload = row
+            if not self._is_fresh(stored_at, item_count):
+                self.expired += 1
+                self.misses += 1
+                return None
+            if item_count:
+                self.hits += 1
+            else:
+                self.negative_hits += 1
+        return {'tracks': {'items': json.loads(zlib.decompress(payload))}}
+
+    def put(self, query, limit, response):
+        """Store a search response; responses without hits are cached as negative results."""
+        items = [slim_track(item) for item in search_items(response)]
+        payload = zlib.compress(json.dumps(items, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+        with self._lock, self._db:
+            self._db.execute(
+                'INSERT OR REPLACE INTO searches (query, result_limit, stored_at, item_count, payload)'
+                ' VALUES (?, ?, ?, ?, ?)',
+                (query, limit, self._clock(), len(items), payload),
+            )
+
+    def purge_expired(self):
+        """Delete expired entries and return how many were removed."""
+        now = self._clock()
+        removed = 0
+        with self._lock, self._db:
+            if self.ttl is not None:
+                removed += self._db.execute(
+                    'DELETE FROM searches WHERE item_count > 0 AND stored_at < ?', (now - self.ttl,)
+                ).rowcount
+            if self.negative_ttl is not None:
+                removed += self._db.execute(
+                    'DELETE FROM searches WHERE item_count = 0 AND stored_at < ?', (now - self.negative_ttl,)
+                ).rowcount
+        return removed
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM searches').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def stats(self):
+        """Return hit (positive and negative), miss and expiry counters."""
+        lookups = self.hits + self.negative_hits + self.misses
+        return {
+            'hits': self.hits,
+            'negative_hits': self.negative_hits,
+            'misses': self.misses,
+            'expired': self.expired,
+            'hit_rate': (self.hits + self.negative_hits) / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,161 @@
+"""Concurrent, rate-limit-aware execution of Spotify searches.
+
+``SearchExecutor`` runs ``sp.search``-style calls on a bounded thread pool.
+Every request takes a token from a shared ``TokenBucket``; a 429 response
+pauses the whole bucket for the ``Retry-After`` interval so that no worker
+keeps hammering the API, and failed requests are retried with exponential
+backoff. Results are always returned in the order the queries were given.
+With a ``SearchCache`` attached, cached queries never reach the limiter.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Thread-safe token bucket that can be paused (e.g. for ``Retry-After``)."""
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available and the bucket is not paused."""
+        while True:
+            with self._lock:
+                now = self._clock()
+                if now < self._blocked_until:
+                    wait = self._blocked_until - now
+                else:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+            self._sleep(wait)
+
+    def pause(self, seconds):
+        """Refuse tokens to every caller for the next ``seconds`` seconds."""
+        with self._lock:
+            now = self._clock()
+            self._blocked_until = max(self._blocked_until, now + seconds)
+            self._tokens = 0.0
+            self._updated = max(now, self._blocked_until)
+
+
+def retry_after_seconds(error):
+    """Return the ``Retry-After`` delay carried by an HTTP error, if any."""
+    headers = getattr(error, 'headers', None) or {}
+    value = headers.get('Retry-After', headers.get('retry-after'))
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def http_status(error):
+    """Return the HTTP status of a spotipy or requests error, if it carries one."""
+    status = getattr(error, 'http_status', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return status
+
+
+def is_retryable(error):
+    """Whether a failed request is worth retrying (rate limits, server and network errors)."""
+    status = http_status(error)
+    if status is not None:
+        return status in RETRYABLE_STATUSES
+    # requests' connection errors and timeouts derive from OSError
+    return isinstance(error, OSError)
+
+
+class SearchExecutor:
+    """Run searches concurrently with bounded parallelism, rate limiting and retries.
+
+    Parameters:
+        search (callable): ``sp.search`` or any function accepting ``q``, ``limit`` and ``type``.
+        max_workers (int): Number of concurrent requests.
+        requests_per_second (float): Sustained request rate shared by all workers.
+        max_retries (int): Retries per request before the error is raised.
+        backoff (float): Initial backoff in seconds, doubled on each retry.
+        cache (SearchCache): Optional cache consulted before and filled after each request.
+        cache_namespace (str): Prefix of the cache keys, so services sharing one cache
+            keep their responses apart.
+    """
+
+    def __init__(self, search, max_workers=8, requests_per_second=10, max_retries=5,
+                 backoff=1.0, max_backoff=60.0, limiter=None, sleep=time.sleep, cache=None, cache_namespace=None):
+        self._search = search
+        self.cache = cache
+        self.cache_namespace = cache_namespace
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.limiter = limiter if limiter is not None else TokenBucket(requests_per_second, max_workers)
+        self._sleep = sleep
+        self._stats_lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.rate_limited = 0
+
+    def _count(self, name):
+        with self._stats_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def search(self, query, limit=50):
+        """Run one search, waiting for the rate limiter and retrying transient failures."""
+        cache_key = f'{self.cache_namespace}:{query}' if self.cache_namespace else query
+        if self.cache is not None:
+            cached = self.cache.get(cache_key, limit)
+            if cached is not None:
+                return cached
+        attempt = 0
+        while True:
+            self.limiter.acquire()
+            self._count('calls')
+            try:
+                result = self._search(q=query, limit=limit, type='track')
+            except Exception as e:
+                if not is_retryable(e) or attempt >= self.max_retries:
+                    raise
+                delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+                if getattr(e, 'http_status', None) == 429:
+                    self._count('rate_limited')
+                    retry_after = retry_after_seconds(e)
+                    self.limiter.pause(retry_after if retry_after is not None else delay)
+                else:
+                    self._sleep(delay)
+                attempt += 1
+                self._count('retries')
+            else:
+                if self.cache is not None:
+                    self.cache.put(cache_key, limit, result)
+                return result
+
+    def map(self, fn, items):
+        """Apply ``fn`` to ``items`` on the worker pool, preserving input order."""
+        items = list(items)
+        if self.max_workers <= 1 or len(items) <= 1:
+            return [fn(item) for item in items]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return list(pool.map(fn, items))
+
+    def search_all(self, queries, limit=50):
+        """Run every query and return the results in the same order."""
+        return self.map(lambda query: self.search(query, limit), queries)
+
+    def stats(self):
+        """Return request, retry and rate-limit counters."""
+        return {'calls': self.calls, 'retries': self.retries, 'rate_limited': self.rate_limited}
@@ -0,0 +1,95 @@
+"""Top-k selection of a song's variants with early termination.
+
+Selecting a song's match only needs its ``k`` best variants, so variants
+are scored in batches, in descending order of an upper bound on their
+score (see ``scoring.weighted_bound``), while a heap keeps the k best so
+far. Once the next variant's bound cannot beat the k-th best, no variant
+left can, and scoring stops. Ties go to the variant found first, as
+``max`` over all variants would pick it, so the selected match does not
+change.
+
+The k best variants are stored with each match as its ``candidates``, so
+matches can be selected again with another threshold (``reselect_matches``)
+without searching or scoring, and near misses can be reviewed.
+"""
+
+import heapq
+
+
+class TopK:
+    """The ``k`` best (score, position) pairs seen; among equal scores the lower position ranks first."""
+
+    def __init__(self, k):
+        self.k = k
+        self._heap = []
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, score, position):
+        entry = (score, -position)
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry > self._heap[0]:
+            heapq.heapreplace(self._heap, entry)
+
+    def admits(self, bound, position):
+        """Whether an item at ``position`` scoring at most ``bound`` could enter the k best."""
+        return len(self._heap) < self.k or (bound, -position) > self._heap[0]
+
+    def positions(self):
+        """Return the positions of the k best, best first."""
+        return [-position for _, position in sorted(self._heap, reverse=True)]
+
+
+def score_top_k(candidates, score_batch, k, scored=()):
+    """Score candidates best bound first until none left can enter the k best.
+
+    Parameters:
+        candidates (list): (bound, position) of the items to score.
+        score_batch (callable): Returns the scores of the items at a list of
+            positions; no score may exceed the item's bound.
+        k (int): Number of best items to find; the first batch holds k items.
+        scored (iterable): (score, position) of items scored before.
+
+    Returns:
+        dict: The score of every item scored, by position. Items left out
+            cannot be among the k best.
+    """
+    top = TopK(k)
+    for item_score, position in scored:
+        top.push(item_score, position)
+    ordered = sorted(candidates, key=lambda candidate: (-candidate[0], candidate[1]))
+    scores = {}
+    start, size = 0, k
+    while start < len(ordered):
+        bound, position = ordered[start]
+        if not top.admits(bound, position):
+            break
+        positions = [position for _, position in ordered[start:start + size]]
+        for position, item_score in zip(positions, score_batch(positions)):
+            scores[position] = item_score
+            top.push(item_score, position)
+        # Batches double in size, so a song needs few batches however many variants it has
+        start, size = start + size, size * 2
+    return scores
+
+
+def match_status(similarity_score, threshold):
+    """Return the (status, reason) of a match whose best variant scored ``similarity_score``."""
+    status = "selected" if similarity_score > threshold else "not selected"
+    reason = "High similarity score" if similarity_score >= threshold else "No match above threshold"
+    return status, reason
+
+
+def reselect_matches(matches, threshold):
+    """Select stored matches again with ``threshold``, without searching or scoring.
+
+    Only matches found by searching (those with ``candidates``) change;
+    matches resolved otherwise, e.g. by track identity, keep their status.
+    The matches are updated in place and returned.
+    """
+    for match in matches:
+        if 'candidates' in match:
+            match['status'], match['reason'] = match_status(match['best_variant'].get('similarity_score', 0), threshold)
+    return matches
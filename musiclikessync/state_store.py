@@ -0,0 +1,136 @@
+"""Local state database for incremental syncs.
+
+The store remembers every YouTube Music like it has seen and the outcome
+of processing it (added, already in the library, not selected, ...), a
+snapshot of the Spotify likes, and named cursors such as the newest
+Spotify ``added_at`` timestamp. A run then only fetches likes newer than
+what the store knows and only pushes unprocessed likes through the
+search, score and add stages.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+# Outcomes that are retried on the next run
+RETRY_OUTCOMES = ('failed',)
+
+
+def song_key(song):
+    """Return the stable key of a YouTube like: its videoId, else title/artist/album."""
+    video_id = song.get('videoId')
+    if video_id:
+        return video_id
+    return '\x1f'.join(str(song.get(field) or '') for field in ('title', 'artist', 'album'))
+
+
+class SyncStateStore:
+    """SQLite-backed record of processed likes, Spotify likes and sync cursors."""
+
+    def __init__(self, path='data/sync_state.sqlite', clock=time.time):
+        self.path = path
+        self._clock = clock
+        self._lock = threading.Lock()
+        if path != ':memory:':
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._db:
+            self._db.executescript(
+                'CREATE TABLE IF NOT EXISTS youtube_likes ('
+                ' song_key TEXT PRIMARY KEY, video_id TEXT, title TEXT, artist TEXT, album TEXT,'
+                ' first_seen REAL NOT NULL, outcome TEXT, spotify_id TEXT, processed_at REAL);'
+                'CREATE TABLE IF NOT EXISTS spotify_likes ('
+                ' spotify_id TEXT PRIMARY KEY, title TEXT, artist TEXT, album TEXT, added_at TEXT);'
+                'CREATE TABLE IF NOT EXISTS cursors (name TEXT PRIMARY KEY, value TEXT);'
+            )
+
+    def known_song_keys(self):
+        """Keys of every YouTube like recorded so far."""
+        with self._lock:
+            return {row[0] for row in self._db.execute('SELECT song_key FROM youtube_likes')}
+
+    def record_youtube_likes(self, songs):
+        """Insert likes not seen before and return them."""
+        now = self._clock()
+        new_songs = []
+        with self._lock, self._db:
+            for song in songs:
+                cursor = self._db.execute(
+                    'INSERT OR IGNORE INTO youtube_likes (song_key, video_id, title, artist, album, first_seen)'
+                    ' VALUES (?, ?, ?, ?, ?, ?)',
+                    (song_key(song), song.get('videoId'), song.get('title'), song.get('artist'), song.get('album'), now),
+                )
+                if cursor.rowcount:
+                    new_songs.append(song)
+        return new_songs
+
+    def pending_youtube_likes(self):
+        """Likes that were never processed or whose outcome should be retried, oldest first."""
+        placeholders = ', '.join('?' for _ in RETRY_OUTCOMES)
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT video_id, title, artist, album FROM youtube_likes'
+                f' WHERE outcome IS NULL OR outcome IN ({placeholders}) ORDER BY first_seen, rowid',
+                RETRY_OUTCOMES,
+            ).fetchall()
+        return [{'title': title, 'artist': artist, 'album': album, 'videoId': video_id}
+                for video_id, title, artist, album in rows]
+
+    def record_outcomes(self, outcomes):
+        """Store ``{song_key: (outcome, spotify_id)}`` for processed likes."""
+        now = self._clock()
+        with self._lock, self._db:
+            self._db.executemany(
+                'UPDATE youtube_likes SET outcome = ?, spotify_id = ?, processed_at = ? WHERE song_key = ?',
+                [(outcome, spotify_id, now, key) for key, (outcome, spotify_id) in outcomes.items()],
+            )
+
+    def outcome(self, key):
+        with self._lock:
+            row = self._db.execute('SELECT outcome, spotify_id FROM youtube_likes WHERE song_key = ?', (key,)).fetchone()
+        return tuple(row) if row else None
+
+    def record_spotify_likes(self, tracks):
+        """Insert or refresh Spotify likes (dicts with spotify_id, title, artist, album, added_at)."""
+        with self._lock, self._db:
+            self._db.executemany(
+                'INSERT OR REPLACE INTO spotify_likes (spotify_id, title, artist, album, added_at) VALUES (?, ?, ?, ?, ?)',
+                [(track['spotify_id'], track.get('title'), track.get('artist'), track.get('album'), track.get('added_at'))
+                 for track in tracks],
+            )
+
+    def spotify_likes(self):
+        """All known Spotify likes, newest first."""
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT title, artist, album, spotify_id, added_at FROM spotify_likes ORDER BY added_at DESC'
+            ).fetchall()
+        return [{'title': title, 'artist': artist, 'album': album, 'spotify_id': spotify_id, 'added_at': added_at}
+                for title, artist, album, spotify_id, added_at in rows]
+
+    def get_cursor(self, name, default=None):
+        with self._lock:
+            row = self._db.execute('SELECT value FROM cursors WHERE name = ?', (name,)).fetchone()
+        return row[0] if row else default
+
+    def set_cursor(self, name, value):
+        with self._lock, self._db:
+            self._db.execute('INSERT OR REPLACE INTO cursors (name, value) VALUES (?, ?)', (name, value))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def stats(self):
+        """Counts of YouTube likes per outcome (``pending`` for unprocessed) and of Spotify likes."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT COALESCE(outcome, 'pending'), COUNT(*) FROM youtube_likes GROUP BY 1"
+            ).fetchall()
+            spotify_count = self._db.execute('SELECT COUNT(*) FROM spotify_likes').fetchone()[0]
+        stats = dict(rows)
+        stats['spotify_likes'] = spotify_count
+        return stats
@@ -0,0 +1,272 @@
+"""Pluggable storage for the likes, search results and match logs under ``data/``.
+
+Every data set is addressed by a base path without extension (e.g.
+``data/match_results``) and stored in one of these formats:
+
+* ``json``: the historical indented JSON array. Every read loads the
+  whole file, and every append rewrites it.
+* ``jsonl``: one JSON record per line, plus a ``.idx`` sidecar holding
+  the byte offset of every line. Appends only write the new lines. The
+  record count and any single record are available without parsing the
+  rest of the file, and iteration streams one line at a time.
+* ``parquet``: columnar storage through pandas (requires ``pyarrow``).
+  Reading a subset of columns only loads those columns.
+
+Every format writes a whole data set to a temporary file that then
+replaces the old one, so an interrupted write keeps the previous data.
+
+``open_store`` migrates an existing file from another format the first
+time the data set is opened in the configured one. pandas is imported
+only when a data set is read as a DataFrame or written as Parquet.
+"""
+
+import json
+import os
+from array import array
+
+
+def _ensure_directory(path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+
+class JsonStore:
+    """A data set stored as an indented JSON array."""
+
+    extension = '.json'
+
+    def __init__(self, base_path):
+        self.path = base_path + self.extension
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def read(self):
+        """Return all records as a list."""
+        if not self.exists():
+            return []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def __iter__(self):
+        return iter(self.read())
+
+    def __len__(self):
+        return len(self.read())
+
+    def read_frame(self, columns=None):
+        """Return the records as a DataFrame, optionally restricted to ``columns``."""
+        import pandas as pd
+        frame = pd.DataFrame(self.read())
+        return frame.reindex(columns=columns) if columns is not None else frame
+
+    def write(self, records):
+        """Replace the data set with ``records``; an interrupted write leaves the old file intact."""
+        _ensure_directory(self.path)
+        temporary_path = self.path + '.tmp'
+        with open(temporary_path, 'w', encoding='utf-8') as f:
+            json.dump(list(records), f, ensure_ascii=False, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary_path, self.path)
+
+    def append(self, records):
+        """Add ``records`` at the end of the data set."""
+        self.write(self.read() + list(records))
+
+    def remove(self):
+        if self.exists():
+            os.remove(self.path)
+
+
+class JsonLinesStore(JsonStore):
+    """A data set stored as JSON Lines with a byte-offset index."""
+
+    extension = '.jsonl'
+
+    def __init__(self, base_path):
+        super().__init__(base_path)
+        self.index_path = self.path + '.idx'
+        self._offsets = None
+        self._size = None
+
+    def _rebuild_index(self):
+        offsets = array('Q')
+        with open(self.path, 'rb') as f:
+            position = 0
+            for line in f:
+                # A line without newline is a record cut off by an interrupted append
+                if line.strip() and line.endswith(b'\n'):
+                    offsets.append(position)
+                position += len(line)
+        with open(self.index_path, 'wb') as f:
+            offsets.tofile(f)
+        return offsets
+
+    def _index(self):
+        """Return the line offsets, rebuilding the sidecar when it does not match the data file."""
+        size = os.path.getsize(self.path)
+        if self._offsets is not None and self._size == size:
+            return self._offsets
+        offsets = array('Q')
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'rb') as f:
+                data = f.read()
+            offsets.frombytes(data[:len(data) - len(data) % offsets.itemsize])
+        # The index is valid when its last entry points at the last complete line
+        valid = bool(offsets) or size == 0
+        if offsets:
+            with open(self.path, 'rb') as f:
+                f.seek(offsets[-1])
+                line = f.readline()
+                valid = line.endswith(b'\n') and f.tell() == size
+        if not valid:
+            offsets = self._rebuild_index()
+        self._offsets, self._size = offsets, size
+        return offsets
+
+    def _truncate_incomplete_line(self):
+        """Drop a record cut off by an interrupted append and bring the index up to date."""
+        offsets = self._index()
+        end = 0
+        if offsets:
+            with open(self.path, 'rb') as f:
+                f.seek(offsets[-1])
+                end = offsets[-1] + len(f.readline())
+        if end != os.path.getsize(self.path):
+            os.truncate(self.path, end)
+            self._offsets = None
+            self._index()
+
+    def __len__(self):
+        return len(self._index()) if self.exists() else 0
+
+    def __getitem__(self, position):
+        """Return one record by position without reading the rest of the file."""
+        offsets = self._index()
+        with open(self.path, 'rb') as f:
+            f.seek(offsets[position])
+            return json.loads(f.readline())
+
+    def __iter__(self):
+        if not self.exists():
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip() and line.endswith('\n'):
+                    yield json.loads(line)
+
+    def read(self):
+        return list(self)
+
+    def read_frame(self, columns=None):
+        import pandas as pd
+        if columns is None:
+            return pd.DataFrame.from_records(iter(self))
+        return pd.DataFrame.from_records(({column: record.get(column) for column in columns} for record in self),
+                                         columns=columns)
+
+    def write(self, records):
+        _ensure_directory(self.path)
+        temporary_path = self.path + '.tmp'
+        offsets = array('Q')
+        with open(temporary_path, 'wb') as f:
+            for record in records:
+                offsets.append(f.tell())
+                f.write(json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n')
+        with open(self.index_path, 'wb') as f:
+            offsets.tofile(f)
+        os.replace(temporary_path, self.path)
+        self._offsets = None
+
+    def append(self, records):
+        _ensure_directory(self.path)
+        if self.exists():
+            self._truncate_incomplete_line()
+        offsets = array('Q')
+        with open(self.path, 'ab') as f:
+            for record in records:
+                offsets.append(f.tell())
+                f.write(json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n')
+            f.flush()
+            os.fsync(f.fileno())
+        with open(self.index_path, 'ab') as f:
+            offsets.tofile(f)
+        self._offsets = None
+
+    def remove(self):
+        super().remove()
+        if os.path.exists(self.index_path):
+            os.remove(self.index_path)
+        self._offsets = None
+
+
+class ParquetStore(JsonStore):
+    """A data set stored as a Parquet file (needs ``pyarrow``).
+
+    Nested values such as the variants of a search result are stored as
+    Parquet lists and structs.
+    """
+
+    extension = '.parquet'
+
+    def read_frame(self, columns=None):
+        import pandas as pd
+        if not self.exists():
+            return pd.DataFrame(columns=columns)
+        return pd.read_parquet(self.path, columns=columns)
+
+    def read(self):
+        if not self.exists():
+            return []
+        return [{key: _to_python(value) for key, value in record.items()}
+                for record in self.read_frame().to_dict('records')]
+
+    def __len__(self):
+        if not self.exists():
+            return 0
+        import pyarrow.parquet
+        return pyarrow.parquet.ParquetFile(self.path).metadata.num_rows
+
+    def write(self, records):
+        _ensure_directory(self.path)
+        import pandas as pd
+        temporary_path = self.path + '.tmp'
+        pd.DataFrame(list(records)).to_parquet(temporary_path, index=False)
+        os.replace(temporary_path, self.path)
+
+
+def _to_python(value):
+    """Convert the numpy arrays pyarrow returns for nested columns back to lists."""
+    if hasattr(value, 'tolist') and not isinstance(value, (str, bytes)):
+        value = value.tolist()
+    if isinstance(value, list):
+        return [_to_python(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _to_python(item) for key, item in value.items()}
+    return value
+
+
+STORAGE_FORMATS = {'json': JsonStore, 'jsonl': JsonLinesStore, 'parquet': ParquetStore}
+
+
+def open_store(base_path, storage_format='jsonl', migrate=True):
+    """Return the store of ``base_path`` in ``storage_format``.
+
+    With ``migrate``, a data set that only exists in another format is
+    converted once; the old file is kept.
+    """
+    try:
+        store = STORAGE_FORMATS[storage_format](base_path)
+    except KeyError:
+        raise ValueError(f"Unknown storage format '{storage_format}'") from None
+    if migrate and not store.exists():
+        for other_format, store_class in STORAGE_FORMATS.items():
+            if other_format == storage_format:
+                continue
+            other = store_class(base_path)
+            if os.path.exists(other.path):
+                store.write(other.read())
+                break
+    return store
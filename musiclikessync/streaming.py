@@ -0,0 +1,98 @@
+"""Building blocks for the streaming sync pipeline.
+
+In streaming mode every song flows through normalize, search, score,
+select and add as a chain of generators instead of each stage
+materializing its full output before the next one starts. The helpers
+here bound how far any stage may run ahead of its consumer, so memory
+stays constant however many likes are synced and the first tracks are
+added while later songs are still being searched.
+"""
+
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+_DONE = object()
+
+
+def batched(iterable, size):
+    """Yield lists of up to ``size`` consecutive items."""
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def bounded_map(fn, iterable, max_workers=8, max_pending=None):
+    """Lazily apply ``fn`` to ``iterable`` on a thread pool, yielding results in input order.
+
+    At most ``max_pending`` calls (twice ``max_workers`` by default) are
+    submitted ahead of the consumer, so a slow consumer stops the input
+    from being read instead of letting results pile up.
+    """
+    if max_workers <= 1:
+        for item in iterable:
+            yield fn(item)
+        return
+    max_pending = max_pending or 2 * max_workers
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        try:
+            for item in iterable:
+                pending.append(pool.submit(fn, item))
+                if len(pending) >= max_pending:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def background(iterable, buffer_size=64):
+    """Consume ``iterable`` on a background thread through a queue of at most ``buffer_size`` items.
+
+    Upstream stages keep working while the consumer blocks (e.g. on a
+    library write). Exceptions raised upstream are re-raised in the
+    consumer; closing the generator early stops the producer thread.
+    """
+    buffer = queue.Queue(maxsize=buffer_size)
+    stopped = threading.Event()
+
+    def put(item):
+        while not stopped.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+        except BaseException as e:
+            put((_DONE, e))
+        else:
+            put((_DONE, None))
+
+    thread = threading.Thread(target=produce, name='stream-producer', daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = buffer.get()
+            if item is _DONE:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stopped.set()
+        thread.join()
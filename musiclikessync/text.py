@@ -0,0 +1,104 @@
+"""Text normalization of song titles, artists and albums.
+
+Importing this module is cheap: the normalization cache, the artist
+translator and the transliteration tables are created by ``context`` the
+first time a string is normalized. ``extract_featured_artists`` needs
+none of them.
+"""
+
+import re
+from functools import partial
+
+from . import config, context
+from .context import run_metrics
+from .parallel import map_chunks
+
+# Matches 'feat' or 'ft.' only when followed by artists
+_FEATURED_PATTERN = re.compile(r"\s\((feat\.?|ft\.?|freq\.?|featuring)\s+(.+?)\)$", re.IGNORECASE)
+
+
+def extract_featured_artists(title):
+    """Extract featured artists from the title if 'feat', 'ft.', or similar are found."""
+    match = _FEATURED_PATTERN.search(title)
+    if match:
+        main_title = title[:match.start()].strip()
+        featured_artists = match.group(2).split(',')
+        featured_artists = [artist.strip() for artist in featured_artists]
+        return main_title, featured_artists
+    return title, []
+
+
+def _transliterate(text, transliterate_flag=False):
+    """Strip suffixes, detect the language and optionally transliterate.
+
+    Returns the detected language code and the text that is handed to the
+    translator when translation is requested.
+    """
+    return context.normalization_engine.prepare(text, transliterate_flag)
+
+
+@run_metrics.timed()
+def prefetch_translations(texts, transliterate_flag=True):
+    """Collect all unique non-English strings and translate them in batches up front."""
+    requests = set()
+    for text in texts:
+        language_code, transliterated_text = _transliterate(text, transliterate_flag)
+        if language_code != 'en':
+            requests.add((language_code, transliterated_text))
+    return context.artist_translator.prefetch(requests)
+
+
+def _normalize_text(text, transliterate_flag=False, translate_flag=False):
+    """Normalize text without the cache.
+
+    Returns the normalized text and whether it is safe to cache, which is
+    not the case when the translation request failed.
+    """
+    return context.normalization_engine.normalize(text, transliterate_flag, translate_flag)
+
+
+def normalize_text(text, transliterate_flag=False, translate_flag=False):
+    """Normalize text for better matching by retaining Unicode characters, lowercasing, removing punctuation, and optionally transliterating and translating."""
+    normalization_cache = context.normalization_cache
+    cached = normalization_cache.get(text, transliterate_flag, translate_flag)
+    if cached is not None:
+        return cached
+    normalized_text, cacheable = _normalize_text(text, transliterate_flag, translate_flag)
+    if cacheable:
+        normalization_cache.put(text, normalized_text, transliterate_flag, translate_flag)
+    return normalized_text
+
+
+def _normalize_chunk(values, transliterate_flag=False, translate_flag=False):
+    """Normalize a chunk of strings in a worker process, returning ``(normalized, cacheable)`` pairs."""
+    return context.normalization_engine.normalize_batch(values, transliterate_flag, translate_flag)
+
+
+@run_metrics.timed()
+def normalize_column(values, transliterate_flag=False, translate_flag=False, workers=None):
+    """Normalize a sequence of strings, sharding cache misses across worker processes.
+
+    Returns a list in the order of ``values``; results are stored in the
+    normalization cache of the calling process.
+    """
+    normalization_cache = context.normalization_cache
+    values = list(values)
+    normalized = {}
+    misses = []
+    for value in dict.fromkeys(values):
+        cached = normalization_cache.get(value, transliterate_flag, translate_flag)
+        if cached is None:
+            misses.append(value)
+        else:
+            normalized[value] = cached
+
+    if misses:
+        # Created before forking so that worker processes inherit it with the prefetched translations
+        context.get('normalization_engine')
+    normalize_chunk = partial(_normalize_chunk, transliterate_flag=transliterate_flag, translate_flag=translate_flag)
+    results = map_chunks(normalize_chunk, misses, workers or config.PARALLEL_WORKERS, min_chunk_size=256)
+    for value, (normalized_text, cacheable) in zip(misses, results):
+        normalized[value] = normalized_text
+        if cacheable:
+            normalization_cache.put(value, normalized_text, transliterate_flag, translate_flag)
+    return [normalized[value] for value in values]
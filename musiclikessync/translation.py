@@ -0,0 +1,193 @@
+"""Batched translation of non-English artist names.
+
+Translations are looked up in a persistent artist-name dictionary first;
+only unknown names reach the translation backend, grouped by source
+language into batches. Backends expose a single method,
+``translate_batch(texts, language_code)``, which returns one translation
+per input text.
+"""
+
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Google Translate still uses the legacy ISO code for Hebrew.
+GOOGLE_LANGUAGE_CODES = {'he': 'iw'}
+
+
+class GoogleTranslateBackend:
+    """Translate through deep_translator's Google endpoint.
+
+    A batch is sent as one newline-joined request; if Google does not
+    return the same number of lines, the batch falls back to one request
+    per text. With a ``session`` (e.g. ``Transport.session``) requests go
+    through its pooled keep-alive connections instead of deep_translator
+    opening a new connection for every request.
+    """
+
+    def __init__(self, target='en', max_chars=4500, session=None, url=None):
+        self.target = target
+        self.max_chars = max_chars
+        self.session = session
+        self.url = url
+
+    def _translator(self, language_code):
+        """Return a function translating one text from ``language_code``."""
+        source = GOOGLE_LANGUAGE_CODES.get(language_code, language_code)
+        if self.session is None:
+            from deep_translator import GoogleTranslator
+            return GoogleTranslator(source=source, target=self.target).translate
+
+        from .transport import GOOGLE_TRANSLATE_URL, google_translate
+        url = self.url or GOOGLE_TRANSLATE_URL
+        return lambda text: google_translate(self.session, text, source, self.target, url)
+
+    def _chunks(self, texts):
+        chunk, size = [], 0
+        for text in texts:
+            if chunk and size + len(text) + 1 > self.max_chars:
+                yield chunk
+                chunk, size = [], 0
+            chunk.append(text)
+            size += len(text) + 1
+        if chunk:
+            yield chunk
+
+    def translate_batch(self, texts, language_code):
+        translate = self._translator(language_code)
+        translations = []
+        for chunk in self._chunks(texts):
+            joined = translate('\n'.join(chunk))
+            lines = joined.split('\n') if joined else []
+            if len(lines) == len(chunk):
+                translations.extend(line.strip() for line in lines)
+            else:
+                translations.extend(translate(text) for text in chunk)
+        return translations
+
+
+class StubTranslationBackend:
+    """Local backend for tests; returns canned translations and records every batch."""
+
+    def __init__(self, translations=None):
+        self.translations = translations or {}
+        self.batches = []
+
+    def translate_batch(self, texts, language_code):
+        self.batches.append((language_code, list(texts)))
+        return [self.translations.get(text, text) for text in texts]
+
+
+class ArtistDictionary:
+    """Persistent ``{language_code: {text: translation}}`` mapping stored as JSON."""
+
+    def __init__(self, path='data/artist_dictionary.json'):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self._entries = json.load(f)
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._entries.values())
+
+    def __contains__(self, key):
+        language_code, text = key
+        return text in self._entries.get(language_code, {})
+
+    def get(self, language_code, text):
+        """Return the stored translation or None."""
+        with self._lock:
+            translation = self._entries.get(language_code, {}).get(text)
+            if translation is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return translation
+
+    def update(self, language_code, translations):
+        """Add ``{text: translation}`` pairs for one source language."""
+        with self._lock:
+            self._entries.setdefault(language_code, {}).update(translations)
+            self._dirty = True
+
+    def save(self):
+        """Write the dictionary to disk if it changed."""
+        with self._lock:
+            if not self.path or not self._dirty:
+                return
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, ensure_ascii=False, indent=4)
+            self._dirty = False
+
+
+class ArtistTranslator:
+    """Translate names via the dictionary, batching unknown names through a backend."""
+
+    def __init__(self, backend=None, dictionary=None, batch_size=50):
+        self.backend = backend if backend is not None else GoogleTranslateBackend()
+        self.dictionary = dictionary if dictionary is not None else ArtistDictionary()
+        self.batch_size = batch_size
+        self.backend_calls = 0
+
+    def prefetch(self, requests):
+        """Translate every unknown ``(language_code, text)`` pair in batches.
+
+        English pairs are ignored. Returns the number of newly translated
+        names; failed batches are logged and left for a later attempt.
+        """
+        pending = {}
+        for language_code, text in requests:
+            if language_code == 'en' or (language_code, text) in self.dictionary:
+                continue
+            pending.setdefault(language_code, set()).add(text)
+
+        translated = 0
+        for language_code, texts in pending.items():
+            texts = sorted(texts)
+            for start in range(0, len(texts), self.batch_size):
+                batch = texts[start:start + self.batch_size]
+                try:
+                    self.backend_calls += 1
+                    results = self.backend.translate_batch(batch, language_code)
+                except Exception as e:
+                    logger.error(f"Batch translation failed for {len(batch)} '{language_code}' names: {e}")
+                    continue
+                found = {text: result for text, result in zip(batch, results) if result is not None}
+                self.dictionary.update(language_code, found)
+                translated += len(found)
+        self.dictionary.save()
+        return translated
+
+    def translate(self, text, language_code):
+        """Translate a single name, asking the backend only on a dictionary miss."""
+        if language_code == 'en':
+            return text
+        translation = self.dictionary.get(language_code, text)
+        if translation is None:
+            self.backend_calls += 1
+            translation = self.backend.translate_batch([text], language_code)[0]
+            if translation is not None:
+                self.dictionary.update(language_code, {text: translation})
+        return translation
+
+    def stats(self):
+        """Return dictionary hit/miss counters and the number of backend calls."""
+        lookups = self.dictionary.hits + self.dictionary.misses
+        return {
+            'dictionary_size': len(self.dictionary),
+            'dictionary_hits': self.dictionary.hits,
+            'dictionary_misses': self.dictionary.misses,
+            'hit_rate': self.dictionary.hits / lookups if lookups else 0.0,
+            'backend_calls': self.backend_calls,
+        }
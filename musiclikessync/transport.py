@@ -0,0 +1,125 @@
+"""Keep-alive HTTP connection pools shared by the Spotify, YouTube Music and translation clients.
+
+Without a shared session every ``GoogleTranslator(...).translate`` call
+opened its own TCP/TLS connection, and spotipy and ytmusicapi each kept a
+default pool of 10 connections per host. ``Transport`` holds one
+``requests.Session`` for all clients, so a connection set up once is
+reused by every later request to the same host.
+
+Pools are sized for the number of threads using them: ``pool_maxsize``
+should be at least the number of concurrent requests to one host (e.g.
+``SEARCH_WORKERS``). With ``pool_block`` a thread waits for a free
+connection instead of opening an extra one that is closed after a single
+request. requests does not pipeline HTTP/1.1 requests, so concurrency
+comes from the pooled connections.
+
+Adapters with their own retry policy can be mounted for a URL prefix
+(``mount``); the Spotify API gets spotipy's retry of 5xx responses this
+way. 429s are not retried by the adapter: they reach spotipy as errors
+carrying the ``Retry-After`` header, so ``SearchExecutor`` can pause its
+shared token bucket, ``BatchedLibraryWriter`` can pace its writes and
+``RunMetrics`` can count them.
+"""
+
+import json
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+SPOTIFY_API_PREFIX = 'https://api.spotify.com/'
+GOOGLE_TRANSLATE_URL = 'https://translate.google.com/m'
+
+
+def spotify_retry(retries=3, status_retries=3, backoff_factor=0.3):
+    """The retry policy spotipy mounts on the sessions it creates itself, without retrying 429s."""
+    return Retry(total=retries, connect=None, read=False,
+                 allowed_methods=frozenset(['GET', 'POST', 'PUT', 'DELETE']),
+                 status=status_retries, backoff_factor=backoff_factor,
+                 status_forcelist=(500, 502, 503, 504), respect_retry_after_header=False)
+
+
+class Transport:
+    """One keep-alive session with bounded connection pools, shared by every API client.
+
+    Parameters:
+        pool_maxsize (int): Connections kept open per host; at least the
+            number of threads sending requests to one host.
+        pool_connections (int): Hosts whose pools are kept.
+        pool_block (bool): Wait for a free connection instead of opening
+            one beyond ``pool_maxsize``.
+    """
+
+    def __init__(self, pool_maxsize=10, pool_connections=8, pool_block=True):
+        self.pool_maxsize = pool_maxsize
+        self.pool_connections = pool_connections
+        self.pool_block = pool_block
+        self.session = requests.Session()
+        self.adapters = []
+        self.mount('https://')
+        self.mount('http://')
+
+    def mount(self, prefix, max_retries=0):
+        """Use a pooled adapter with ``max_retries`` for URLs starting with ``prefix``."""
+        adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize,
+                              max_retries=max_retries, pool_block=self.pool_block)
+        self.session.mount(prefix, adapter)
+        self.adapters.append(adapter)
+        return adapter
+
+    def stats(self):
+        """Connections opened and requests sent through the pools that are still open."""
+        connections = requests_sent = 0
+        for adapter in self.adapters:
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is not None:
+                    connections += pool.num_connections
+                    requests_sent += pool.num_requests
+        return {'connections': connections, 'requests': requests_sent,
+                'requests_per_connection': requests_sent / connections if connections else 0.0}
+
+    def close(self):
+        self.session.close()
+
+
+def spotify_client(credentials_path, scope, transport, prefix=SPOTIFY_API_PREFIX):
+    """Create a spotipy client and its OAuth manager on ``transport``'s session."""
+    import spotipy
+    from spotipy.oauth2 import SpotifyOAuth
+
+    with open(credentials_path) as f:
+        spotify_credentials = json.load(f)
+    transport.mount(prefix, max_retries=spotify_retry())
+    auth_manager = SpotifyOAuth(client_id=spotify_credentials['client_id'],
+                                client_secret=spotify_credentials['client_secret'],
+                                redirect_uri=spotify_credentials['redirect_uri'],
+                                scope=scope, requests_session=transport.session)
+    return spotipy.Spotify(auth_manager=auth_manager, requests_session=transport.session)
+
+
+def ytmusic_client(auth_path, transport):
+    """Create a YTMusic client on ``transport``'s session."""
+    from ytmusicapi import YTMusic
+    return YTMusic(auth_path, requests_session=transport.session)
+
+
+def google_translate(session, text, source, target='en', url=GOOGLE_TRANSLATE_URL, timeout=10):
+    """Translate ``text`` through the Google Translate mobile page, as deep_translator does, on ``session``.
+
+    Raises ``requests.HTTPError`` for error responses (e.g. 429) and
+    ``ValueError`` when the page holds no translation.
+    """
+    from bs4 import BeautifulSoup
+
+    text = text.strip()
+    if not text or source == target:
+        return text
+    response = session.get(url, params={'tl': target, 'sl': source, 'q': text}, timeout=timeout)
+    response.raise_for_status()
+    soup = BeautifulSoup(response.text, 'html.parser')
+    element = soup.find('div', {'class': 't0'}) or soup.find('div', {'class': 'result-container'})
+    if element is None:
+        raise ValueError(f"No translation found for '{text}'")
+    return element.get_text(strip=True)
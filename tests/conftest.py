@@ -0,0 +1,21 @@
+import pytest
+
+from benchmarks.fakes import FakeTranslationBackend
+from musiclikessync import config, context
+from musiclikessync.translation import ArtistDictionary, ArtistTranslator
+
+
+@pytest.fixture
+def fake_context(tmp_path, monkeypatch):
+    """Run in tmp_path with a fake translator and unthrottled searches.
+
+    Every setting is restored and the context closed afterwards.
+    """
+    monkeypatch.chdir(tmp_path)
+    for name in dir(config):
+        if name.isupper():
+            monkeypatch.setattr(config, name, getattr(config, name))
+    config.SEARCH_REQUESTS_PER_SECOND = config.YTMUSIC_SEARCH_REQUESTS_PER_SECOND = 1e6
+    context.artist_translator = ArtistTranslator(FakeTranslationBackend(), ArtistDictionary(config.ARTIST_DICTIONARY_PATH))
+    yield
+    context.close()
@@ -0,0 +1,186 @@
+"""A tiny local stand-in for the Spotify Web API used by the tests."""
+
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def fake_track(query, position):
+    """Build a deterministic search hit for ``query``."""
+    digest = hashlib.md5(f'{query}#{position}'.encode('utf-8')).hexdigest()[:22]
+    return {
+        'id': digest,
+        'name': f'{query} #{position}',
+        'artists': [{'name': 'Fake Artist'}],
+        'album': {'name': 'Fake Album'},
+    }
+
+
+def fake_saved_item(position):
+    """Build the ``position``-th (newest first) saved track of the fake library."""
+    return {
+        'added_at': f'2024-01-01T00:00:00Z#{position:06d}',
+        'track': {
+            'id': f'saved{position:06d}',
+            'name': f'Saved Song {position}',
+            'artists': [{'name': 'Fake Artist'}],
+            'album': {'name': 'Fake Album'},
+        },
+    }
+
+
+class FakeSpotifyServer:
+    """Serve ``/v1/search`` and ``/v1/me/tracks`` on localhost.
+
+    Every ``rate_limit_every``-th request is answered with 429 and a
+    ``Retry-After`` header, and each response is delayed by ``latency``
+    seconds. The saved-tracks library holds ``saved_tracks`` tracks; pages
+    starting at an offset in ``failing_offsets`` are answered with 500.
+    ``PUT`` requests (library writes) are rate limited the same way; the
+    IDs they save are collected in ``saved``. All received requests and
+    the number of accepted connections are recorded.
+    """
+
+    def __init__(self, results_per_query=3, rate_limit_every=0, retry_after='0', latency=0.0,
+                 saved_tracks=0, failing_offsets=()):
+        self.saved_tracks = saved_tracks
+        self.failing_offsets = set(failing_offsets)
+        self.results_per_query = results_per_query
+        self.latency = latency
+        self.rate_limit_every = rate_limit_every
+        self.retry_after = retry_after
+        self.requests = []
+        self.saved = []
+        self.rate_limited = 0
+        self.active = 0
+        self.max_active = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f'http://{host}:{port}/v1/'
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def search_response(self, query, limit):
+        count = min(limit, self.results_per_query)
+        return {'tracks': {'items': [fake_track(query, i) for i in range(count)]}}
+
+    def saved_tracks_response(self, limit, offset):
+        items = [fake_saved_item(position) for position in range(offset, min(offset + limit, self.saved_tracks))]
+        has_next = offset + limit < self.saved_tracks
+        return {
+            'items': items,
+            'limit': limit,
+            'offset': offset,
+            'total': self.saved_tracks,
+            'next': f'{self.url}me/tracks?offset={offset + limit}&limit={limit}' if has_next else None,
+        }
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                with fake._lock:
+                    fake.connections += 1
+
+            def _send(self, status, payload, headers=None):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                params = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+                with fake._lock:
+                    fake.requests.append((parsed.path, params))
+                    count = len(fake.requests)
+                    fake.active += 1
+                    fake.max_active = max(fake.max_active, fake.active)
+                try:
+                    time.sleep(fake.latency)
+                    if fake.rate_limit_every and count % fake.rate_limit_every == 0:
+                        with fake._lock:
+                            fake.rate_limited += 1
+                        self._send(429, {'error': {'status': 429, 'message': 'API rate limit exceeded'}},
+                                   {'Retry-After': fake.retry_after})
+                    elif parsed.path == '/v1/search':
+                        self._send(200, fake.search_response(params['q'], int(params.get('limit', 10))))
+                    elif parsed.path == '/v1/me/tracks':
+                        offset = int(params.get('offset', 0))
+                        if offset in fake.failing_offsets:
+                            self._send(500, {'error': {'status': 500, 'message': 'Server error'}})
+                        else:
+                            self._send(200, fake.saved_tracks_response(int(params.get('limit', 20)), offset))
+                    else:
+                        self._send(404, {'error': {'status': 404, 'message': 'Not found'}})
+                finally:
+                    with fake._lock:
+                        fake.active -= 1
+
+            def do_PUT(self):
+                parsed = urlparse(self.path)
+                params = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+                self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                with fake._lock:
+                    fake.requests.append((parsed.path, params))
+                    count = len(fake.requests)
+                if fake.rate_limit_every and count % fake.rate_limit_every == 0:
+                    with fake._lock:
+                        fake.rate_limited += 1
+                    self._send(429, {'error': {'status': 429, 'message': 'API rate limit exceeded'}},
+                               {'Retry-After': fake.retry_after})
+                    return
+                ids = [uri.rsplit(':', 1)[-1] for uri in params.get('uris', params.get('ids', '')).split(',') if uri]
+                with fake._lock:
+                    fake.saved.extend(ids)
+                self.send_response(200)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+        return Handler
+
+
+def spotify_client_for(server, transport):
+    """Build a client the way the pipeline does (``transport.spotify_client``), talking to ``server``.
+
+    The credentials and a valid OAuth token are written to the working
+    directory, so run it in a temporary one.
+    """
+    from musiclikessync.transport import spotify_client
+
+    scope = 'user-library-read user-library-modify'
+    with open('spotify_credentials.json', 'w') as f:
+        json.dump({'client_id': 'id', 'client_secret': 'secret', 'redirect_uri': 'http://127.0.0.1/callback'}, f)
+    with open('.cache', 'w') as f:
+        json.dump({'access_token': 'token', 'token_type': 'Bearer', 'expires_in': 3600, 'scope': scope,
+                   'expires_at': int(time.time()) + 3600, 'refresh_token': 'refresh'}, f)
+    host, port = server._server.server_address
+    sp = spotify_client('spotify_credentials.json', scope, transport, prefix=f'http://{host}:{port}/')
+    sp.prefix = server.url
+    return sp
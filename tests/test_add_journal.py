@@ -0,0 +1,74 @@
+from musiclikessync import config
+from musiclikessync.add_journal import AddJournal, is_intent
+from musiclikessync.adding import added_songs_journal
+from musiclikessync.likes import load_added_songs
+from musiclikessync.storage import JsonLinesStore, JsonStore
+
+
+def entry(spotify_id, status='added'):
+    return {'original_title': f'song {spotify_id}', 'spotify_id': spotify_id, 'status': status}
+
+
+def test_batches_are_journaled_around_each_write(tmp_path):
+    store = JsonLinesStore(str(tmp_path / 'added_songs_to_spotify'))
+    journal = AddJournal(store)
+
+    journal.begin(['a', 'b'])
+    journal.record([entry('a'), entry('b', 'not added'), entry(None, 'not attempted')])
+
+    records = store.read()
+    assert is_intent(records[0]) and records[0]['spotify_ids'] == ['a', 'b']
+    assert [record['spotify_id'] for record in records[1:]] == ['a', 'b']
+
+
+def test_compaction_drops_intents_and_duplicates(tmp_path, caplog):
+    store = JsonLinesStore(str(tmp_path / 'added_songs_to_spotify'))
+    journal = AddJournal(store)
+    journal.begin(['a'])
+    journal.record([entry('a')])
+    journal.record([entry('a')])
+    # A batch interrupted after its intent was written
+    journal.begin(['b', 'c'])
+
+    assert journal.compact() == [entry('a')]
+    assert store.read() == [entry('a')]
+    assert '2 tracks' in caplog.text
+
+    # Nothing left to compact, so the log is not rewritten
+    size = len(store)
+    assert journal.compact() == [entry('a')]
+    assert len(store) == size
+
+
+def test_compacting_a_missing_log(tmp_path):
+    assert AddJournal(JsonLinesStore(str(tmp_path / 'missing'))).compact() == []
+
+
+def test_log_is_rewritten_only_once_enough_records_are_dropped(tmp_path):
+    store = JsonLinesStore(str(tmp_path / 'added_songs_to_spotify'))
+    journal = AddJournal(store, compact_ratio=0.5)
+    for run in range(4):
+        ids = [f'{run}-{i}' for i in range(5)]
+        journal.begin(ids)
+        journal.record([entry(spotify_id) for spotify_id in ids])
+
+    # One intent record per batch: 4 dropped records for 20 entries
+    assert len(journal.compact()) == 20
+    assert len(store.read()) == 24
+
+    journal.record([entry(f'0-{i}') for i in range(5)] + [entry(f'1-{i}') for i in range(5)])
+    assert len(journal.compact()) == 20
+    assert len(store.read()) == 20
+
+
+def test_journal_appends_json_lines_whatever_the_storage_format(fake_context, tmp_path):
+    config.STORAGE_FORMAT = 'json'
+    # A log written in the json format by an earlier version
+    JsonStore(str(tmp_path / 'data' / 'added_songs_to_spotify')).write([entry('a')])
+
+    journal = added_songs_journal()
+    journal.begin(['b'])
+    journal.record([entry('b')])
+
+    assert JsonLinesStore(str(tmp_path / 'data' / 'added_songs_to_spotify')).read()[0] == entry('a')
+    assert list(load_added_songs()['spotify_id']) == ['a', 'b']
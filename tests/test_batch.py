@@ -0,0 +1,90 @@
+import json
+
+import pytest
+
+from benchmarks.fakes import FakeSpotify, FakeYTMusic
+from benchmarks.synthetic import generate_library
+from musiclikessync import context
+from musiclikessync.batch import Account, load_manifest, run_batch
+
+
+class FailingYTMusic:
+    def get_liked_songs(self, limit=None):
+        raise ConnectionError('YouTube Music unavailable')
+
+
+def fake_account(name, seed):
+    library = generate_library(30, seed=seed)
+    sp = FakeSpotify(library['catalog'], library['spotify_likes'])
+    return Account(name, clients={'ytmusic': FakeYTMusic(library['youtube_likes']), 'sp': sp}), sp
+
+
+def json_lines(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def test_accounts_sync_concurrently_into_their_own_data(fake_context, tmp_path):
+    (alice, alice_sp), (bob, bob_sp) = fake_account('alice', 1), fake_account('bob', 2)
+    saved = {'alice': len(alice_sp.saved_items), 'bob': len(bob_sp.saved_items)}
+    broken = Account('broken', clients={'ytmusic': FailingYTMusic(), 'sp': FakeSpotify([], [])})
+
+    results = run_batch([alice, broken, bob], workers=3, requests_per_second=1e6)
+
+    assert [result['account'] for result in results] == ['alice', 'broken', 'bob']
+    assert 'YouTube Music unavailable' in results[1]['error']
+    for result, sp in [(results[0], alice_sp), (results[2], bob_sp)]:
+        data_dir = tmp_path / 'data' / 'accounts' / result['account']
+        added = [entry for entry in json_lines(data_dir / 'added_songs_to_spotify.jsonl') if entry.get('status') == 'added']
+        assert result['added'] == len(added) == len(sp.saved_items) - saved[result['account']] > 0
+        # Every Spotify request of the account went through the scheduler
+        assert result['requests'] == sum(sp.calls.values())
+        assert (data_dir / 'match_results.jsonl').exists()
+        assert (data_dir / 'sync_state.sqlite').exists()
+    # Nothing was written to the single-account data directory
+    assert not (tmp_path / 'data' / 'match_results.jsonl').exists()
+    # The accounts' clients were closed with them; the caches they shared were not
+    assert context.peek('sp') is None
+    assert context.peek('search_cache') is not None and context.peek('normalization_cache') is not None
+
+    # The next run only processes new likes
+    again = run_batch([alice], requests_per_second=1e6)[0]
+    assert again['missing'] == 0 and again['added'] == 0
+
+
+def test_account_objects_are_not_shadowed_by_shared_ones(fake_context):
+    # e.g. set by the notebook or an earlier single-account run in this process
+    shared = generate_library(30, seed=3)
+    context.sp = shared_sp = FakeSpotify(shared['catalog'], shared['spotify_likes'])
+    context.ytmusic = shared_ytmusic = FakeYTMusic(shared['youtube_likes'])
+    alice, alice_sp = fake_account('alice', 1)
+    alice_ytmusic = alice.clients['ytmusic']
+    saved = len(alice_sp.saved_items)
+
+    result = run_batch([alice], requests_per_second=1e6)[0]
+
+    assert result['added'] == len(alice_sp.saved_items) - saved > 0
+    assert alice_ytmusic.calls > 0 and alice_sp.calls['search'] > 0
+    assert shared_ytmusic.calls == 0 and shared_sp.calls == {}
+    assert context.sp is shared_sp and context.ytmusic is shared_ytmusic
+
+
+def test_manifest_paths_default_from_the_name(tmp_path):
+    manifest = tmp_path / 'manifest.json'
+    manifest.write_text(json.dumps({'accounts': [
+        {'name': 'alice'},
+        {'name': 'bob', 'spotify_credentials': 'bob.json', 'data_dir': 'elsewhere'},
+    ]}))
+
+    alice, bob = load_manifest(manifest)
+
+    assert alice.spotify_credentials_path.endswith('alice/spotify_credentials.json')
+    assert alice.data_dir.endswith('accounts/alice')
+    assert (bob.spotify_credentials_path, bob.data_dir) == ('bob.json', 'elsewhere')
+
+    manifest.write_text(json.dumps({'accounts': [{'name': 'alice'}, {'name': 'alice'}]}))
+    with pytest.raises(ValueError, match='Duplicate'):
+        load_manifest(manifest)
+    manifest.write_text(json.dumps({'accounts': [{'spotify_credentials': 'x.json'}]}))
+    with pytest.raises(ValueError, match='without a name'):
+        load_manifest(manifest)
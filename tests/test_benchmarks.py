@@ -0,0 +1,44 @@
+import pytest
+from spotipy.exceptions import SpotifyException
+
+from benchmarks.bench_pipeline import benchmark
+from benchmarks.fakes import FakeSpotify
+from benchmarks.synthetic import generate_library
+
+
+def test_synthetic_library_is_reproducible():
+    library = generate_library(200, seed=3)
+
+    assert library == generate_library(200, seed=3)
+    assert len(library['youtube_likes']) == 200
+    titles = ' '.join(track['title'] for track in library['youtube_likes'])
+    artists = ' '.join(track['artists'][0]['name'] for track in library['youtube_likes'])
+    assert '(feat. ' in titles
+    assert any('Ѐ' <= char <= 'ӿ' for char in artists)
+    assert any('֐' <= char <= '׿' for char in artists)
+
+
+def test_fake_spotify_search_and_rate_limits():
+    library = generate_library(50)
+    track = library['catalog'][0]
+    sp = FakeSpotify(library['catalog'], rate_limit_every=2, retry_after=3)
+
+    items = sp.search(f"track:{track['name'].lower()} artist:whoever", limit=5)['tracks']['items']
+    assert track in items
+    with pytest.raises(SpotifyException) as error:
+        sp.search('anything')
+    assert error.value.http_status == 429 and error.value.headers == {'Retry-After': '3'}
+    assert sp.calls == {'search': 2} and sp.rate_limited == 1
+
+
+def test_pipeline_benchmark_runs_every_stage():
+    measurements = benchmark(tracks=60, rate_limit_every=10, retry_after=0, memory=False)
+
+    assert [result['stage'] for result in measurements['stages']] == [
+        'fetch_likes', 'normalize_text', 'clean_missing_songs', 'query_spotify_for_tracks',
+        'calculate_similarity', 'determine_best_matches', 'add_tracks_to_spotify',
+    ]
+    summary = measurements['summary']
+    assert 0 < summary['searched'] < summary['youtube_likes'] == 60
+    assert 0 < summary['added'] <= summary['selected']
+    assert summary['rate_limited'] > 0
@@ -0,0 +1,103 @@
+import pandas as pd
+import pytest
+
+from benchmarks.fakes import FakeSpotify, FakeYTMusic
+from benchmarks.synthetic import generate_library
+from musiclikessync import context
+from musiclikessync.bidirectional import BidirectionalSync, library_diff
+from musiclikessync.providers import YouTubeMusicProvider
+from musiclikessync.search_cache import SearchCache
+from musiclikessync.search_executor import SearchExecutor
+
+
+def test_youtube_music_provider_searches_and_likes():
+    song = {'videoId': 'v1', 'title': 'Wicked Games', 'artists': [{'name': 'Parra for Cuva'}], 'album': None}
+    ytmusic = FakeYTMusic([], catalog=[song])
+    provider = YouTubeMusicProvider(ytmusic)
+
+    response = provider.search('wicked games parra for cuva', limit=5)
+
+    assert response == {'tracks': {'items': [{'id': 'v1', 'name': 'Wicked Games', 'artists': [{'name': 'Parra for Cuva'}],
+                                              'album': {'name': ''}}]}}
+    assert provider.queries('wicked games', 'parra for cuva', 'wicked games', ['anna naklab']) == [
+        'wicked games parra for cuva', 'wicked games parra for cuva anna naklab', 'wicked games parra for cuva wicked games']
+    assert provider.save(['v1']) is None
+    assert ytmusic.ratings == [('v1', 'LIKE')] and ytmusic.tracks == [song]
+
+
+def test_services_sharing_a_search_cache_keep_their_responses_apart():
+    cache = SearchCache(':memory:')
+    spotify = SearchExecutor(lambda q, limit, type: {'tracks': {'items': [{'id': 's', 'name': q}]}}, cache=cache)
+    ytmusic = SearchExecutor(lambda q, limit, type: {'tracks': {'items': [{'id': 'v', 'name': q}]}}, cache=cache,
+                             cache_namespace='ytmusic')
+
+    assert spotify.search('love')['tracks']['items'][0]['id'] == 's'
+    assert ytmusic.search('love')['tracks']['items'][0]['id'] == 'v'
+    assert ytmusic.search('love')['tracks']['items'][0]['id'] == 'v'
+    assert (spotify.calls, ytmusic.calls, len(cache)) == (1, 1, 2)
+    cache.close()
+
+
+def test_library_diff_finds_both_deltas(fake_context):
+    youtube_likes = pd.DataFrame([{'title': 'Song A', 'artist': 'Band', 'album': 'X', 'videoId': 'va'},
+                                  {'title': 'Song B', 'artist': 'Band', 'album': 'X', 'videoId': 'vb'}])
+    spotify_likes = pd.DataFrame([{'title': 'song b', 'artist': 'band', 'album': 'X', 'spotify_id': 'sb'},
+                                  {'title': 'Song C', 'artist': 'Band', 'album': 'X', 'spotify_id': 'sc'},
+                                  {'title': 'Song D', 'artist': 'Band', 'album': 'X', 'spotify_id': 'sd'}])
+    added_to_youtube = pd.DataFrame([{'original_title': 'Song D', 'original_artist': 'Band', 'spotify_id': 'vd'}])
+
+    spotify_index, youtube_index, youtube_only, spotify_only = library_diff(
+        youtube_likes, spotify_likes, pd.DataFrame(columns=['spotify_id']), added_to_youtube)
+
+    assert list(youtube_only['title']) == ['Song A']
+    assert list(spotify_only['title']) == ['Song C']
+    assert 'sb' in spotify_index and 'vd' in youtube_index
+
+
+@pytest.fixture
+def fake_services(fake_context):
+    library = generate_library(40, seed=4)
+    context.sp = sp = FakeSpotify(library['catalog'], library['spotify_likes'])
+    context.ytmusic = ytmusic = FakeYTMusic(library['youtube_likes'], catalog=library['youtube_catalog'])
+    return library, sp, ytmusic
+
+
+def test_bidirectional_sync_adds_each_delta_once(fake_services):
+    library, sp, ytmusic = fake_services
+    spotify_id_of = {video['videoId']: track['id'] for track, video in zip(library['catalog'], library['youtube_catalog'])}
+    saved = len(sp.saved_items)
+
+    first = BidirectionalSync(context.ytmusic, context.sp)
+    entries = first.sync()
+
+    added = [entry for entry in entries['youtube_to_spotify'] if entry['status'] == 'added']
+    liked = [entry for entry in entries['spotify_to_youtube'] if entry['status'] == 'added']
+    assert added and len(sp.saved_items) == saved + len(added)
+    assert liked and [video_id for video_id, _ in ytmusic.ratings] == [entry['spotify_id'] for entry in liked]
+    # Every song liked on YouTube Music is the Spotify like it was matched for
+    spotify_likes = {item['track']['id']: item['track']['name'] for item in library['spotify_likes']}
+    for entry in liked:
+        assert spotify_likes[spotify_id_of[entry['spotify_id']]] == entry['original_title']
+    assert context.search_cache.get(f"ytmusic:{entry['query_title']} {entry['query_artist']}", 50) is not None
+
+    # Both libraries now hold what the other has: the next sync pairs the songs either direction
+    # added by identity, and searches (from the cache) only the songs no match was found for
+    searches = (sp.calls['search'], ytmusic.searches)
+    second = BidirectionalSync(context.ytmusic, context.sp)
+    entries = second.sync()
+    assert not [entry for direction in entries.values() for entry in direction if entry['status'] == 'added']
+    assert (sp.calls['search'], ytmusic.searches) == searches
+    assert second.forward.identity_matches and second.reverse.identity_matches
+    for run_before, run in [(first.forward, second.forward), (first.reverse, second.reverse)]:
+        unmatched = {match['original_title'] for match in run_before.best_matches if match['status'] != 'selected'}
+        assert set(run.songs_to_search['title']) <= unmatched
+
+
+def test_reverse_only_dry_run_likes_nothing(fake_services):
+    library, sp, ytmusic = fake_services
+
+    entries = BidirectionalSync(context.ytmusic, context.sp, forward=False).sync(dry_run=True)
+
+    assert entries == {'spotify_to_youtube': []}
+    assert ytmusic.searches and not ytmusic.ratings
+    assert 'current_user_saved_tracks_add' not in sp.calls
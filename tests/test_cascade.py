@@ -0,0 +1,43 @@
+from musiclikessync.cascade import QueryCascade
+
+
+def run(cascade, queries, scores):
+    executed = []
+
+    def execute(query):
+        executed.append(query)
+        return [scores[query]]
+
+    batches = cascade.run(queries, execute, lambda batch: max(batch))
+    return executed, batches
+
+
+def test_stops_after_first_query_above_threshold():
+    cascade = QueryCascade(threshold=0.8)
+    executed, batches = run(cascade, ['q1', 'q2', 'q3'], {'q1': 0.5, 'q2': 0.95, 'q3': 1.0})
+
+    assert executed == ['q1', 'q2']
+    assert batches == [[0.5], [0.95]]
+    assert cascade.stats()['queries_saved'] == 1
+    assert cascade.stats()['early_exits'] == 1
+
+
+def test_runs_every_query_when_nothing_clears_threshold():
+    cascade = QueryCascade(threshold=0.8)
+    executed, _ = run(cascade, ['q1', 'q2'], {'q1': 0.5, 'q2': 0.8})
+
+    assert executed == ['q1', 'q2']
+    stats = cascade.stats()
+    assert stats['queries_planned'] == stats['queries_executed'] == 2
+    assert stats['savings_ratio'] == 0.0
+
+
+def test_savings_accumulate_across_songs():
+    cascade = QueryCascade(threshold=0.8)
+    run(cascade, ['a1', 'a2', 'a3', 'a4'], {'a1': 0.9, 'a2': 0, 'a3': 0, 'a4': 0})
+    run(cascade, ['b1', 'b2'], {'b1': 0.1, 'b2': 0.2})
+
+    stats = cascade.stats()
+    assert stats['songs'] == 2
+    assert stats['queries_saved'] == 3
+    assert stats['savings_ratio'] == 0.5
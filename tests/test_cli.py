@@ -0,0 +1,132 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from benchmarks.fakes import FakeSpotify, FakeYTMusic
+from benchmarks.synthetic import generate_library
+from musiclikessync import config, context
+from musiclikessync.cli import main
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ['pandas', 'numpy', 'spotipy', 'ytmusicapi', 'deep_translator', 'googletrans', 'transliterate']
+
+
+def run_python(code, cwd):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    return subprocess.run([sys.executable, '-c', code], cwd=cwd, env=env, capture_output=True, text=True, check=True).stdout
+
+
+def test_fast_start_without_heavy_dependencies(tmp_path):
+    output = run_python(
+        'import sys\n'
+        'from musiclikessync.text import extract_featured_artists, normalize_text\n'
+        'from musiclikessync.cli import main\n'
+        'print(extract_featured_artists("Song (ft. A, B)"))\n'
+        'main(["add", "--dry-run"])\n'
+        f'print([name for name in {HEAVY_MODULES!r} if name in sys.modules])\n', tmp_path)
+    assert output.splitlines() == ["('Song', ['A', 'B'])", '0 tracks would be added', '[]']
+    assert not (tmp_path / 'data').exists()
+
+
+@pytest.fixture
+def fakes(fake_context):
+    """Run the commands against fake clients."""
+    translator = context.artist_translator
+    library = generate_library(40, seed=3)
+    sp = FakeSpotify(library['catalog'], library['spotify_likes'])
+    ytmusic = FakeYTMusic(library['youtube_likes'], catalog=library['youtube_catalog'])
+
+    def install():
+        # main() closes the context after every command, forgetting the clients
+        context.ytmusic = ytmusic
+        context.sp = sp
+        context.artist_translator = translator
+    return install, sp
+
+
+def test_dry_run_then_add(fakes, tmp_path, capsys):
+    install, sp = fakes
+    install()
+    assert main(['--workers', '1', 'sync', '--dry-run']) == 0
+    assert 'current_user_saved_tracks_add' not in sp.calls
+    selected = sum(1 for match in json_lines(tmp_path / 'data' / 'match_results.jsonl') if match['status'] == 'selected')
+    assert selected
+
+    capsys.readouterr()
+    assert main(['add', '--dry-run']) == 0
+    assert f'{selected} tracks would be added' in capsys.readouterr().out
+
+    install()
+    assert main(['--workers', '1', 'add']) == 0
+    added = [entry for entry in json_lines(tmp_path / 'data' / 'added_songs_to_spotify.jsonl') if entry.get('status') == 'added']
+    assert len(added) == selected
+    assert sp.calls['current_user_saved_tracks_add'] >= 1
+
+    capsys.readouterr()
+    assert main(['add', '--dry-run']) == 0
+    assert '0 tracks would be added' in capsys.readouterr().out
+
+
+def test_select_again_with_another_threshold(fakes, tmp_path, capsys):
+    install, sp = fakes
+    install()
+    assert main(['--workers', '1', 'match']) == 0
+    match_results = tmp_path / 'data' / 'match_results.jsonl'
+    matches = json_lines(match_results)
+    selected = sum(1 for match in matches if match['status'] == 'selected')
+    searches = sp.calls['search']
+    searched = [match for match in matches if match.get('candidates')]
+    assert searched and all(len(match.get('candidates', ())) <= config.SELECTION_TOP_K for match in matches)
+    assert all(match['candidates'][0]['spotify_id'] == match['best_variant']['spotify_id'] for match in searched)
+
+    capsys.readouterr()
+    assert main(['select', '--threshold', '0.99', '--review']) == 0
+    output = capsys.readouterr().out
+    strict = [match for match in json_lines(match_results) if match['status'] == 'selected']
+    assert len(strict) < selected
+    assert all(match['best_variant']['similarity_score'] > 0.99 for match in strict)
+    assert f'{len(strict)} of {len(matches)} matches selected above 0.99' in output
+    rejected = next(match for match in searched if match['best_variant']['similarity_score'] <= 0.99)
+    assert f"{rejected['original_title']} by {rejected['original_artist']}:" in output
+
+    assert main(['select', '--threshold', '0.8']) == 0
+    assert json_lines(match_results) == matches
+    assert sp.calls['search'] == searches
+
+
+def test_sync_writes_run_report(fakes, tmp_path, capsys):
+    install, sp = fakes
+    install()
+    assert main(['--workers', '1', 'sync', '--streaming']) == 0
+    assert config.STREAMING_MODE
+    run_report = json.loads((tmp_path / 'data' / 'run_report.json').read_text())
+    assert 'stream_sync' in run_report['stages']
+    assert run_report['stats']['sync_state']
+
+    capsys.readouterr()
+    assert main(['report']) == 0
+    assert 'stream_sync' in capsys.readouterr().out
+    assert main(['report', '--path', str(tmp_path / 'missing.json')]) == 1
+
+
+def test_sync_both_ways(fakes, tmp_path, capsys):
+    install, sp = fakes
+    install()
+    ytmusic = context.ytmusic
+    assert main(['--workers', '1', 'sync', '--direction', 'both']) == 0
+    output = capsys.readouterr().out
+    liked = [entry for entry in json_lines(tmp_path / 'data' / 'added_songs_to_ytmusic.jsonl') if entry.get('status') == 'added']
+    assert liked and len(ytmusic.ratings) == len(liked)
+    assert f'{len(liked)} tracks added to YouTube Music' in output
+    assert sp.calls['current_user_saved_tracks_add'] >= 1
+    run_report = json.loads((tmp_path / 'data' / 'run_report.json').read_text())
+    assert run_report['stats']['reverse_sync']['liked'] >= len(liked)
+    assert 'query_ytmusic_for_tracks' in run_report['stages']
+
+
+def json_lines(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
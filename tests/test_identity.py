@@ -0,0 +1,92 @@
+import pandas as pd
+
+from musiclikessync import context
+from musiclikessync.identity import IdentityResolver, IdentityStore, fetch_tracks
+from musiclikessync.matching import record_identities, resolve_identities
+
+
+def track(track_id):
+    return {'id': track_id, 'name': f'title {track_id}', 'artists': [{'name': 'band'}], 'album': {'name': 'album'}}
+
+
+class FakeSpotify:
+    def __init__(self, existing, isrcs=None):
+        self.existing = set(existing)
+        self.isrcs = isrcs or {}
+        self.track_calls = []
+        self.queries = []
+
+    def tracks(self, track_ids):
+        self.track_calls.append(list(track_ids))
+        return {'tracks': [track(track_id) if track_id in self.existing else None for track_id in track_ids]}
+
+    def search(self, query, limit):
+        self.queries.append(query)
+        track_id = self.isrcs.get(query.split(':', 1)[1])
+        return {'tracks': {'items': [track(track_id)] if track_id else []}}
+
+
+def test_store_round_trip(tmp_path):
+    store = IdentityStore(str(tmp_path / 'identities.sqlite'))
+    store.record({'v1': 's1', 'v2': 's2', 'v3': None}, 'search')
+    store.forget(['v2'])
+
+    assert store.lookup(['v1', 'v2', 'v3', None]) == {'v1': 's1'}
+    assert len(store) == 1
+
+
+def test_fetch_tracks_batches_ids():
+    sp = FakeSpotify(existing=[f's{i}' for i in range(120) if i != 7])
+
+    found, missing = fetch_tracks(sp.tracks, [f's{i}' for i in range(120)] + ['s0'])
+
+    assert [len(call) for call in sp.track_calls] == [50, 50, 20]
+    assert len(found) == 119 and missing == {'s7'}
+
+
+def test_resolver_uses_stored_identities_and_isrcs():
+    store = IdentityStore(':memory:')
+    store.record({'v1': 's1', 'v2': 'gone'}, 'search')
+    sp = FakeSpotify(existing=['s1', 's4'], isrcs={'ISRC4': 's4'})
+    resolver = IdentityResolver(store, sp.tracks, sp.search)
+    songs = [{'videoId': 'v1'}, {'videoId': 'v2'}, {'videoId': 'v3'}, {'videoId': 'v4', 'isrc': 'ISRC4'},
+             {'videoId': float('nan'), 'isrc': float('nan')}]
+
+    resolved = resolver.resolve(songs)
+
+    assert [item and item['id'] for item in resolved] == ['s1', None, None, 's4', None]
+    # One batched lookup confirms every candidate
+    assert sp.track_calls == [['s1', 'gone', 's4']]
+    assert sp.queries == ['isrc:ISRC4']
+    # The vanished track is forgotten and the ISRC match is remembered
+    assert store.lookup(['v1', 'v2', 'v4']) == {'v1': 's1', 'v4': 's4'}
+    assert resolver.stats() == {'songs': 5, 'known': 2, 'isrc': 1, 'resolved': 2, 'stale': 1, 'identities': 2}
+
+
+def test_known_likes_are_matched_without_searching(fake_context):
+    context.identity_store = store = IdentityStore(':memory:')
+    store.record({'v1': 's1'}, 'search')
+    sp = FakeSpotify(existing=['s1'])
+    songs = pd.DataFrame([{'title': 'Song 1', 'artist': 'band', 'album': 'album', 'videoId': 'v1'},
+                          {'title': 'Song 2', 'artist': 'band', 'album': 'album', 'videoId': 'v2'}])
+
+    songs_to_search, matches = resolve_identities(sp, songs)
+
+    assert list(songs_to_search['videoId']) == ['v2']
+    assert sp.queries == []
+    assert [(match['original_title'], match['status'], match['best_variant']['spotify_id']) for match in matches] == [
+        ('Song 1', 'selected', 's1')]
+
+
+def test_only_attempted_matches_are_recorded(fake_context):
+    context.identity_store = store = IdentityStore(':memory:')
+    songs = pd.DataFrame([{'title': f'Song {i}', 'artist': 'band', 'album': 'album', 'videoId': f'v{i}'} for i in range(4)])
+
+    def entry(i, status, spotify_id):
+        return {'original_title': f'Song {i}', 'original_artist': 'band', 'original_album': 'album',
+                'status': status, 'spotify_id': spotify_id}
+
+    record_identities(songs, [entry(0, 'added', 's0'), entry(1, 'not attempted', 's1'), entry(2, 'failed', None),
+                              {**entry(3, 'selected', None), 'best_variant': {'spotify_id': 's3'}}])
+
+    assert store.lookup([f'v{i}' for i in range(4)]) == {'v0': 's0', 'v3': 's3'}
@@ -0,0 +1,99 @@
+import pytest
+import requests
+import spotipy
+
+from fake_spotify_server import FakeSpotifyServer
+from musiclikessync import config
+from musiclikessync.library_fetch import PageCheckpoint, fetch_spotify_saved_tracks, fetch_youtube_liked_songs
+from musiclikessync.likes import read_incremental_likes
+from musiclikessync.state_store import SyncStateStore
+
+
+def fake_client(server):
+    sp = spotipy.Spotify(auth='token', requests_session=requests.Session())
+    sp.prefix = server.url
+    return sp
+
+
+def saved_page_offsets(server):
+    return sorted(int(params['offset']) for path, params in server.requests if path == '/v1/me/tracks')
+
+
+def test_pages_are_fetched_in_parallel_with_the_maximum_page_size():
+    with FakeSpotifyServer(saved_tracks=523, latency=0.01) as server:
+        tracks = fetch_spotify_saved_tracks(fake_client(server), workers=4)
+
+    assert [track['spotify_id'] for track in tracks] == [f'saved{i:06d}' for i in range(523)]
+    assert saved_page_offsets(server) == list(range(0, 523, 50))
+    assert all(params['limit'] == '50' for _, params in server.requests)
+    assert server.max_active > 1
+
+
+def test_interrupted_fetch_resumes_from_checkpoint(tmp_path):
+    checkpoint = PageCheckpoint(str(tmp_path / 'likes.checkpoint.jsonl'))
+
+    with FakeSpotifyServer(saved_tracks=300, failing_offsets={150}) as server:
+        with pytest.raises(spotipy.SpotifyException):
+            fetch_spotify_saved_tracks(fake_client(server), workers=2, checkpoint=checkpoint)
+    total, pages = checkpoint.load(50)
+    assert total == 300
+    assert sorted(pages) == [0, 50, 100, 200, 250]
+
+    with FakeSpotifyServer(saved_tracks=300) as server:
+        tracks = fetch_spotify_saved_tracks(fake_client(server), workers=2, checkpoint=checkpoint)
+
+    assert saved_page_offsets(server) == [150]
+    assert [track['spotify_id'] for track in tracks] == [f'saved{i:06d}' for i in range(300)]
+    assert checkpoint.load(50) == (None, {})
+
+
+def test_stale_checkpoint_is_ignored(tmp_path):
+    now = [1000.0]
+    checkpoint = PageCheckpoint(str(tmp_path / 'likes.checkpoint.jsonl'), max_age=60, clock=lambda: now[0])
+    checkpoint.start(50, 100)
+    checkpoint.save(0, [])
+
+    assert checkpoint.load(20) == (None, {})
+    now[0] += 61
+    assert checkpoint.load(50) == (None, {})
+
+
+def test_youtube_likes_are_fetched_without_a_cap():
+    class FakeYTMusic:
+        def get_liked_songs(self, limit=100):
+            self.limit = limit
+            return {'tracks': [{'title': 'song', 'artists': [{'name': 'band'}], 'album': None, 'videoId': 'v1'}]}
+
+    ytmusic = FakeYTMusic()
+    songs = fetch_youtube_liked_songs(ytmusic)
+
+    assert ytmusic.limit is None
+    assert songs == [{'title': 'song', 'artist': 'band', 'album': 'Unknown Album', 'videoId': 'v1'}]
+
+
+def test_first_incremental_sync_fetches_the_libraries_like_a_full_sync(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    class FakeYTMusic:
+        def __init__(self):
+            self.limits = []
+
+        def get_liked_songs(self, limit=100):
+            self.limits.append(limit)
+            return {'tracks': [{'title': 'song', 'artists': [{'name': 'band'}], 'album': None, 'videoId': 'v1'}]}
+
+    ytmusic, state = FakeYTMusic(), SyncStateStore(':memory:')
+    with FakeSpotifyServer(saved_tracks=523, latency=0.01) as server:
+        youtube_likes, spotify_likes = read_incremental_likes(ytmusic, fake_client(server), state)
+
+    assert ytmusic.limits == [None]
+    assert saved_page_offsets(server) == list(range(0, 523, 50))
+    assert server.max_active > 1
+    assert len(spotify_likes) == 523 and list(youtube_likes['videoId']) == ['v1']
+    assert state.get_cursor('spotify_added_at') == '2024-01-01T00:00:00Z#000000'
+    assert not (tmp_path / config.SPOTIFY_LIKES_CHECKPOINT_PATH).exists()
+
+    # Later runs only fetch what is new
+    with FakeSpotifyServer(saved_tracks=523) as server:
+        read_incremental_likes(ytmusic, fake_client(server), state)
+    assert ytmusic.limits == [None, 100]
@@ -0,0 +1,22 @@
+from musiclikessync.library_index import LibraryIndex
+
+
+def test_membership_by_id_and_song_key():
+    index = LibraryIndex(['id1', '', None, float('nan')], [('song', 'band')])
+
+    assert 'id1' in index
+    assert index.has_id('id1')
+    assert not index.has_id('')
+    assert index.has_song('song', 'band')
+    assert not index.has_song('song', 'other band')
+    assert index.stats() == {'spotify_ids': 1, 'song_keys': 1}
+
+
+def test_incremental_updates():
+    index = LibraryIndex()
+    index.add(spotify_id='id2')
+    index.add(song_key=['title', 'artist'])
+    index.update(['id3', 'id2'])
+
+    assert len(index) == 2
+    assert index.has_song('title', 'artist')
@@ -0,0 +1,108 @@
+from fake_spotify_server import FakeSpotifyServer, spotify_client_for
+from musiclikessync.library_writer import AdaptivePacer, BatchedLibraryWriter
+from musiclikessync.transport import Transport
+
+
+class SpotifyError(Exception):
+    def __init__(self, http_status, headers=None):
+        super().__init__(f'http status: {http_status}')
+        self.http_status = http_status
+        self.headers = headers or {}
+
+
+class FakeLibrary:
+    def __init__(self, bad_ids=(), rate_limit_calls=()):
+        self.bad_ids = set(bad_ids)
+        self.rate_limit_calls = set(rate_limit_calls)
+        self.calls = []
+        self.saved = []
+
+    def add(self, track_ids):
+        self.calls.append(list(track_ids))
+        if len(self.calls) in self.rate_limit_calls:
+            raise SpotifyError(429, {'Retry-After': '2'})
+        if self.bad_ids & set(track_ids):
+            raise SpotifyError(400)
+        self.saved.extend(track_ids)
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def writer_for(library, fake_time=None):
+    fake_time = fake_time or FakeTime()
+    pacer = AdaptivePacer(clock=fake_time.clock, sleep=fake_time.sleep)
+    return BatchedLibraryWriter(library.add, pacer=pacer)
+
+
+def test_ids_are_written_in_chunks_of_fifty():
+    library = FakeLibrary()
+    ids = [f'id{i}' for i in range(120)] + ['id0']
+    outcomes = writer_for(library).write(ids)
+
+    assert [len(call) for call in library.calls] == [50, 50, 20]
+    assert len(outcomes) == 120
+    assert set(outcomes.values()) == {('added', 'Successfully added')}
+
+
+def test_bad_ids_are_isolated_by_bisection():
+    library = FakeLibrary(bad_ids={'id13'})
+    outcomes = writer_for(library).write([f'id{i}' for i in range(50)])
+
+    assert outcomes['id13'][0] == 'failed'
+    assert 'http status: 400' in outcomes['id13'][1]
+    assert sorted(library.saved) == sorted(f'id{i}' for i in range(50) if i != 13)
+    assert len(library.calls) < 50
+
+
+def test_rate_limited_chunk_waits_for_retry_after_and_retries():
+    library = FakeLibrary(rate_limit_calls={1})
+    fake_time = FakeTime()
+    writer = writer_for(library, fake_time)
+    outcomes = writer.write(['a', 'b'])
+
+    assert outcomes == {'a': ('added', 'Successfully added'), 'b': ('added', 'Successfully added')}
+    assert library.calls == [['a', 'b'], ['a', 'b']]
+    assert fake_time.sleeps == [2.0]
+    assert writer.stats()['rate_limited'] == 1
+
+
+def test_rate_limits_of_the_production_client_pace_the_writes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    transport = Transport()
+    fake_time = FakeTime()
+    ids = [f'{i:022d}' for i in range(120)]
+    with FakeSpotifyServer(rate_limit_every=2, retry_after='3') as server:
+        sp = spotify_client_for(server, transport)
+        writer = BatchedLibraryWriter(lambda track_ids: sp.current_user_saved_tracks_add(tracks=track_ids),
+                                      pacer=AdaptivePacer(clock=fake_time.clock, sleep=fake_time.sleep))
+        outcomes = writer.write(ids)
+        transport.close()
+
+    assert set(outcomes.values()) == {('added', 'Successfully added')}
+    assert server.saved == ids
+    assert writer.stats()['rate_limited'] == server.rate_limited == 2
+    # Every 429 held the retry back for its Retry-After, and the next chunk waited for the backed-off delay
+    assert fake_time.sleeps == [3.0, 0.25, 3.0]
+
+
+def test_pacer_backs_off_and_recovers():
+    fake_time = FakeTime()
+    pacer = AdaptivePacer(clock=fake_time.clock, sleep=fake_time.sleep)
+    pacer.failure()
+    assert pacer.delay == 0.5
+    pacer.failure()
+    assert pacer.delay == 1.0
+    pacer.success()
+    pacer.success()
+    assert pacer.delay == 0.25
@@ -0,0 +1,119 @@
+import json
+
+import pytest
+from spotipy.exceptions import SpotifyException
+
+from fake_spotify_server import FakeSpotifyServer, spotify_client_for
+from musiclikessync.metrics import RunMetrics
+from musiclikessync.search_executor import SearchExecutor
+from musiclikessync.transport import Transport
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeClient:
+    def __init__(self, clock):
+        self.clock = clock
+        self.market = 'US'
+
+    def search(self, q, limit=10):
+        self.clock.now += 0.5
+        if q == 'limited':
+            raise SpotifyException(429, -1, 'rate limited', headers={'Retry-After': '1'})
+        return {'q': q}
+
+
+def test_timers_and_counters():
+    clock = FakeClock()
+    metrics = RunMetrics(clock=clock, wall_clock=lambda: 0.0)
+
+    @metrics.timed()
+    def stage(seconds):
+        clock.now += seconds
+        return seconds
+
+    assert stage(1.0) == 1.0
+    stage(3.0)
+    with metrics.timer('score_variants', items=10):
+        clock.now += 2.0
+    metrics.count('songs', 5)
+
+    report = metrics.report()
+    assert report['stages']['stage'] == {'calls': 2, 'seconds': 4.0, 'max_seconds': 3.0, 'items': 0}
+    assert report['stages']['score_variants']['items_per_second'] == 5.0
+    assert report['counters'] == {'songs': 5}
+    assert report['duration_seconds'] == 6.0
+    assert report['started_at'] == '1970-01-01T00:00:00+00:00'
+
+
+def test_instrumented_client_records_calls_errors_and_rate_limits():
+    clock = FakeClock()
+    metrics = RunMetrics(clock=clock)
+    client = metrics.instrument(FakeClient(clock), 'spotify')
+
+    assert client.search('song') == {'q': 'song'}
+    with pytest.raises(SpotifyException):
+        client.search('limited')
+    assert client.market == 'US'
+
+    stats = metrics.report()['api']['spotify']['search']
+    assert stats == {'calls': 2, 'errors': 1, 'rate_limited': 1, 'seconds': 1.0, 'max_seconds': 0.5,
+                     'mean_seconds': 0.5}
+
+
+def test_rate_limits_of_the_production_client_are_counted(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    metrics = RunMetrics()
+    transport = Transport()
+    with FakeSpotifyServer(rate_limit_every=3, retry_after='0') as server:
+        sp = metrics.instrument(spotify_client_for(server, transport), 'spotify')
+        executor = SearchExecutor(sp.search, max_workers=2, requests_per_second=1000)
+        executor.search_all([f'track:song {i}' for i in range(10)], limit=5)
+        transport.close()
+
+    assert server.rate_limited > 0
+    stats = metrics.report()['api']['spotify']['search']
+    assert stats['calls'] == len(server.requests) == 10 + server.rate_limited
+    assert stats['rate_limited'] == stats['errors'] == server.rate_limited
+    assert (f'musiclikessync_api_rate_limited_total{{service="spotify",method="search"}} {float(server.rate_limited)}'
+            in metrics.prometheus_lines())
+
+
+def test_sleeper_records_waits():
+    slept = []
+    metrics = RunMetrics()
+    sleep = metrics.sleeper('search_throttle_wait', sleep=slept.append)
+
+    sleep(0.25)
+    sleep(0.5)
+
+    assert slept == [0.25, 0.5]
+    assert metrics.report()['stages']['search_throttle_wait']['seconds'] == 0.75
+
+
+def test_exports(tmp_path):
+    clock = FakeClock()
+    metrics = RunMetrics(clock=clock, wall_clock=lambda: 100.0)
+    metrics.instrument(FakeClient(clock), 'spo"tify').search('song')
+    metrics.add_time('clean_missing_songs', 2.0)
+    metrics.set_section('search cache', {'hit_rate': 0.25, 'enabled': True, 'name': 'x'})
+
+    metrics.write_json(str(tmp_path / 'data' / 'run_report.json'))
+    assert json.loads((tmp_path / 'data' / 'run_report.json').read_text())['stats'] == {
+        'search cache': {'hit_rate': 0.25, 'enabled': True, 'name': 'x'}}
+
+    metrics.write_prometheus(str(tmp_path / 'sync.prom'))
+    lines = (tmp_path / 'sync.prom').read_text().splitlines()
+    assert 'musiclikessync_run_start_time_seconds 100.0' in lines
+    assert '# TYPE musiclikessync_stage_seconds_total counter' in lines
+    assert 'musiclikessync_stage_seconds_total{stage="clean_missing_songs"} 2.0' in lines
+    assert 'musiclikessync_api_calls_total{service="spo\\"tify",method="search"} 1.0' in lines
+    assert 'musiclikessync_search_cache_hit_rate 0.25' in lines
+    assert not any('enabled' in line or 'name' in line for line in lines)
+    assert not (tmp_path / 'sync.prom.tmp').exists()
@@ -0,0 +1,83 @@
+import re
+import unicodedata
+
+import pytest
+
+from musiclikessync.normalization import NormalizationEngine, clean_text, detect_language, strip_suffixes
+
+CORPUS = [
+    '', ' ', 'Wicked Games', 'Parra for Cuva', 'wicked games', 'Song 52 (feat. Guest) - Remix',
+    'Song - Original Mix', 'Song - original mix', 'Song - Remix (Live)', 'A - B - Edit', 'Track - Extended Mix',
+    '  padded\ttitle\n', 'a  b\t\tc', 'dots...and---dashes', "rock'n'roll", 'AC/DC', 'Guns N’ Roses',
+    'Beyoncé', 'Sigur Rós', 'Ｆｕｌｌｗｉｄｔｈ', 'ﬁnal ﬂight', 'x²', '½ time', 'Å̊', 'é',
+    'non breaking', 'zero​width', 'under_score', 'emoji 🎵 song', 'Tab　ideographic',
+    'Кино', 'Группа крови', 'Кино - Remix', 'עומר אדם', 'עומר אדם - Remix', 'Mixed Кино עומר',
+    'עומר Кино', 'Кино and Hebrew ש', 'Ёлка', 'Ελληνικά', 'Ⅻ', '①②', 'İstanbul', 'ǅemal',
+]
+
+
+class StubTranslator:
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.prefetched = []
+
+    def translate(self, text, language_code):
+        if text in self.fail:
+            raise RuntimeError('translation failed')
+        return f'{text} [{language_code}→en]'
+
+    def prefetch(self, pairs):
+        self.prefetched.append(set(pairs))
+
+
+def fake_translit(text, language_code):
+    return text.upper() + '!'
+
+
+def legacy_normalize(text, transliterate_flag, translate_flag, translator):
+    """The original normalize_text steps, kept as the oracle for the engine."""
+    text = re.sub(r' - (Original Mix|Remix|Edit|Version|Extended Mix|Instrumental)$', '', text, flags=re.IGNORECASE)
+    if re.search('[\u0590-\u05FF]', text):
+        language_code = 'he'
+    elif re.search('[\u0400-\u04FF]', text):
+        language_code = 'ru'
+    else:
+        language_code = 'en'
+    if transliterate_flag and language_code in ['ru', 'uk']:
+        text = fake_translit(text, language_code)
+    if translate_flag and language_code != 'en':
+        text = translator.translate(text, language_code)
+    text = unicodedata.normalize('NFKC', text)
+    text = text.lower().strip()
+    text = re.sub(r'[^\w\s]', '', text)
+    return re.sub(r'\s+', ' ', text)
+
+
+@pytest.mark.parametrize('transliterate_flag', [False, True])
+@pytest.mark.parametrize('translate_flag', [False, True])
+def test_engine_matches_legacy_normalization(transliterate_flag, translate_flag):
+    translator = StubTranslator()
+    engine = NormalizationEngine(translator, transliterate=fake_translit, language_codes=['ru', 'uk'])
+
+    expected = [legacy_normalize(text, transliterate_flag, translate_flag, translator) for text in CORPUS]
+
+    assert [engine.normalize(text, transliterate_flag, translate_flag)[0] for text in CORPUS] == expected
+    assert engine.normalize_many(CORPUS, transliterate_flag, translate_flag) == expected
+
+
+def test_building_blocks():
+    assert strip_suffixes('Song - Remix') == 'Song'
+    assert detect_language('Кино') == 'ru'
+    assert detect_language('Кино עומר') == 'he'
+    assert detect_language('Beyoncé') == 'en'
+    assert clean_text('  Hello,   World!  ') == 'hello world'
+
+
+def test_batch_prefetches_translations_and_reports_failures():
+    translator = StubTranslator(fail={'עומר'})
+    engine = NormalizationEngine(translator, transliterate=fake_translit, language_codes=['ru'])
+
+    results = engine.normalize_batch(['Кино', 'עומר', 'Кино', 'Song'], transliterate_flag=True, translate_flag=True)
+
+    assert results == [('кино ruen', True), ('עומר', False), ('кино ruen', True), ('song', True)]
+    assert translator.prefetched == [{('ru', 'КИНО!'), ('he', 'עומר')}]
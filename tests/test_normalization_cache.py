@@ -0,0 +1,47 @@
+from musiclikessync.normalization_cache import NormalizationCache, cache_key
+
+
+def test_cache_key_depends_on_flags():
+    assert cache_key('Artist') != cache_key('Artist', transliterate_flag=True)
+    assert cache_key('Artist', True, False) != cache_key('Artist', False, True)
+    assert cache_key('Artist', True, True) == cache_key('Artist', 1, 1)
+
+
+def test_memory_tier_counts_hits_and_misses():
+    cache = NormalizationCache(path=None)
+    calls = []
+
+    def compute(text, transliterate_flag, translate_flag):
+        calls.append(text)
+        return text.lower()
+
+    assert cache.get_or_compute('Song', compute) == 'song'
+    assert cache.get_or_compute('Song', compute) == 'song'
+    assert calls == ['Song']
+    assert cache.stats()['memory_hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+def test_disk_tier_survives_new_instance(tmp_path):
+    path = str(tmp_path / 'cache' / 'normalization.sqlite')
+    first = NormalizationCache(path)
+    first.put('Шазам', 'shazam', transliterate_flag=True, translate_flag=True)
+    first.close()
+
+    second = NormalizationCache(path)
+    assert second.get('Шазам', transliterate_flag=True, translate_flag=True) == 'shazam'
+    assert second.get('Шазам') is None
+    assert second.stats()['disk_hits'] == 1
+    assert second.stats()['misses'] == 1
+    second.close()
+
+
+def test_lru_evicts_oldest_entry():
+    cache = NormalizationCache(path=None, max_entries=2)
+    cache.put('a', 'a')
+    cache.put('b', 'b')
+    cache.get('a')
+    cache.put('c', 'c')
+    assert cache.get('b') is None
+    assert cache.get('a') == 'a'
+    assert cache.get('c') == 'c'
@@ -0,0 +1,72 @@
+import os
+import random
+
+import pytest
+
+from musiclikessync import config, context
+from musiclikessync.matching import calculate_similarity, determine_best_matches
+from musiclikessync.parallel import can_fork, chunk_size_for, chunked, map_chunks
+from musiclikessync.results import SongResult
+from musiclikessync.scoring import DifflibScorer
+from musiclikessync.translation import ArtistDictionary, ArtistTranslator, StubTranslationBackend
+
+
+def square_with_pid(chunk):
+    return [(value * value, os.getpid()) for value in chunk]
+
+
+def test_chunk_size_balances_workers_and_respects_minimum():
+    assert chunk_size_for(1000, workers=4) == 63
+    assert chunk_size_for(1000, workers=4, min_chunk_size=256) == 256
+    assert chunk_size_for(0, workers=4, min_chunk_size=8) == 8
+    assert chunked([1, 2, 3, 4, 5], 2) == [[1, 2], [3, 4], [5]]
+
+
+def test_parallel_output_matches_serial_order():
+    items = list(range(500))
+    serial = map_chunks(square_with_pid, items, workers=1)
+    parallel = map_chunks(square_with_pid, items, workers=3, chunk_size=17)
+
+    assert [value for value, _ in parallel] == [value for value, _ in serial] == [i * i for i in items]
+    assert {pid for _, pid in serial} == {os.getpid()}
+
+
+def test_single_chunk_runs_in_process():
+    results = map_chunks(square_with_pid, [1, 2, 3], workers=4, min_chunk_size=10)
+    assert {pid for _, pid in results} == {os.getpid()}
+
+
+def synthetic_search_results(seed, songs=200, tracks=15):
+    rng = random.Random(seed)
+    words = ['love', 'night', 'dance', 'heart', 'fire', 'remix', 'live', 'karaoke version', 'tribute']
+
+    def phrase(count):
+        return ' '.join(rng.choice(words) for _ in range(count))
+
+    search_results = []
+    for song in range(songs):
+        title, artist = phrase(2), phrase(1)
+        song_result = SongResult(title, artist, 'Unknown Album', title, artist, 'Unknown Album')
+        song_result.add_tracks([{'id': f'{song}-{track}', 'name': phrase(rng.randint(1, 4)),
+                                 'artists': [{'name': phrase(rng.randint(1, 2))}], 'album': {'name': ''}}
+                                for track in range(tracks)])
+        search_results.append(song_result)
+    return search_results
+
+
+@pytest.mark.skipif(not can_fork(), reason='worker processes need fork')
+def test_parallel_matching_writes_the_same_match_results(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    context.scorer = DifflibScorer()
+    context.artist_translator = ArtistTranslator(StubTranslationBackend(), ArtistDictionary(path=None))
+    try:
+        for workers in (1, 2):
+            search_results = calculate_similarity(synthetic_search_results(7), workers=workers)
+            determine_best_matches(search_results, workers=workers, store_name=f'match_results_{workers}')
+    finally:
+        context.close()
+
+    serial = (tmp_path / 'data' / f'match_results_1.{config.STORAGE_FORMAT}').read_bytes()
+    parallel = (tmp_path / 'data' / f'match_results_2.{config.STORAGE_FORMAT}').read_bytes()
+    assert serial == parallel
+    assert b'"selected"' in serial
@@ -0,0 +1,61 @@
+import pandas as pd
+
+from musiclikessync.context import data_store
+from musiclikessync.matching import library_tracks, prematch_songs
+from musiclikessync.prematch import CandidateIndex, ngrams
+
+
+def test_ngrams_are_padded():
+    assert ngrams('ab') == {' ab', 'ab '}
+    assert ngrams('') == set()
+
+
+def test_candidates_are_blocked_on_shared_ngrams():
+    index = CandidateIndex()
+    for title in ['wicked games', 'blinding lights', 'games people play', 'save your tears']:
+        index.add(title, {'name': title})
+
+    assert [track['name'] for track in index.candidates('wicked game')] == ['wicked games']
+    assert [track['name'] for track in index.candidates('blinding light')] == ['blinding lights']
+    assert index.candidates('something else entirely') == []
+    assert index.candidates('') == []
+    assert len(index) == 4
+
+
+def test_candidates_are_ranked_and_capped():
+    index = CandidateIndex(max_candidates=2, min_overlap=0.1)
+    for title in ['love', 'love song', 'love songs', 'lovely']:
+        index.add(title, title)
+
+    assert index.candidates('love song') == ['love song', 'love songs']
+
+
+def test_drifted_likes_are_resolved_against_the_library(fake_context):
+    missing_songs = pd.DataFrame([
+        {'title': 'Blinding Light', 'artist': 'The Weeknd', 'album': 'After Hours', 'videoId': 'v1'},
+        {'title': 'Wicked Game', 'artist': 'Chris Isaak', 'album': 'Heart Shaped World', 'videoId': 'v2'},
+        {'title': 'Save Your Tear', 'artist': 'The Weeknd', 'album': 'After Hours', 'videoId': 'v3'},
+    ])
+    spotify_likes = pd.DataFrame([
+        {'title': 'Blinding Lights', 'artist': 'The Weeknd', 'album': 'After Hours', 'spotify_id': 's1'},
+        {'title': 'Games People Play', 'artist': 'The Alan Parsons Project', 'album': 'The Turn of a Friendly Card',
+         'spotify_id': 's2'},
+    ])
+    added_songs = pd.DataFrame([
+        {'status': 'added', 'spotify_id': 's3', 'spotify_title': 'Save Your Tears', 'spotify_artist': 'The Weeknd',
+         'spotify_album': 'After Hours'},
+        # Failed adds are not in the library
+        {'status': 'failed', 'spotify_id': 's4', 'spotify_title': 'Wicked Game', 'spotify_artist': 'Chris Isaak',
+         'spotify_album': 'Heart Shaped World'},
+    ])
+
+    assert [track['id'] for track in library_tracks(spotify_likes, added_songs)] == ['s1', 's2', 's3']
+
+    songs_to_search, prematched = prematch_songs(missing_songs, spotify_likes, added_songs)
+
+    # The like only close to a library track below the threshold is still searched
+    assert list(songs_to_search['videoId']) == ['v2']
+    assert [(match['original_title'], match['best_variant']['spotify_id']) for match in prematched] == [
+        ('Blinding Light', 's1'), ('Save Your Tear', 's3')]
+    assert all(match['best_variant']['similarity_score'] > 0.9 for match in prematched)
+    assert data_store('prematch_results').read() == prematched
@@ -0,0 +1,51 @@
+import pickle
+
+from musiclikessync.results import SongResult, Variant
+
+
+def track(track_id, name='song', artists=('band',), album='album'):
+    return {'id': track_id, 'name': name, 'artists': [{'name': artist} for artist in artists], 'album': {'name': album}}
+
+
+def test_hits_are_deduplicated_by_spotify_id():
+    result = SongResult('Song', 'Band', 'Album', 'song', 'band', 'album')
+
+    first = result.add_response({'tracks': {'items': [track('a'), track('b')]}})
+    second = result.add_response({'tracks': {'items': [track('b'), track('c'), track('a')]}})
+
+    assert [variant.spotify_id for variant in first] == ['a', 'b']
+    assert [variant.spotify_id for variant in second] == ['c']
+    assert [variant.spotify_id for variant in result.variants] == ['', 'a', 'b', 'c']
+    assert result.duplicates == 2
+    assert result.add_response(None) == []
+
+
+def test_to_dict_matches_legacy_layout():
+    result = SongResult('Song', 'Band', 'Unknown Album', 'song', 'band', 'Unknown Album')
+    result.add_tracks([track('a', 'Song', ('Band', 'Guest'), 'Single')])
+    result.variants[1].similarity_score = 0.9
+
+    assert result.to_dict() == {
+        'title': 'Song',
+        'artist': 'Band',
+        'album': 'Unknown Album',
+        'variants': [
+            {'original_title': 'Song', 'original_artist': 'Band', 'original_album': 'Unknown Album',
+             'query_title': 'song', 'query_artist': 'band', 'query_album': 'Unknown Album',
+             'spotify_title': '', 'spotify_artist': '', 'spotify_album': '', 'spotify_id': ''},
+            {'original_title': 'Song', 'original_artist': 'Band', 'original_album': 'Unknown Album',
+             'query_title': 'song', 'query_artist': 'band', 'query_album': 'Unknown Album',
+             'spotify_title': 'Song', 'spotify_artist': 'Band, Guest', 'spotify_album': 'Single', 'spotify_id': 'a',
+             'similarity_score': 0.9},
+        ],
+    }
+
+
+def test_results_pickle_for_worker_processes():
+    result = SongResult('Song', 'Band', 'Album', 'song', 'band', 'album')
+    result.add_tracks([track('a')])
+
+    restored = pickle.loads(pickle.dumps(result))
+
+    assert restored.to_dict() == result.to_dict()
+    assert not hasattr(Variant('', '', '', ''), '__dict__')
@@ -0,0 +1,59 @@
+import threading
+
+from musiclikessync.scheduler import FairScheduler, ScheduledClient
+
+
+def test_accounts_take_turns_however_many_requests_they_send():
+    scheduler = FairScheduler(200, capacity=1)
+    order = []
+    lock = threading.Lock()
+
+    def send(account, count):
+        for _ in range(count):
+            scheduler.acquire(account)
+            with lock:
+                order.append(account)
+
+    # 'busy' sends from eight threads at once, 'quiet' from one
+    threads = [threading.Thread(target=send, args=('busy', 10)) for _ in range(8)]
+    threads.append(threading.Thread(target=send, args=('quiet', 10)))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # While 'quiet' had requests left it was granted about every other one
+    last_quiet = max(index for index, account in enumerate(order) if account == 'quiet')
+    assert last_quiet < 30
+    stats = scheduler.stats()
+    assert stats['busy']['requests'] == 80 and stats['quiet']['requests'] == 10
+
+
+def test_budget_refills_at_the_rate():
+    now = [0.0]
+    scheduler = FairScheduler(2, capacity=2, clock=lambda: now[0])
+    scheduler.acquire('a')
+    scheduler.acquire('a')
+    assert scheduler._tokens < 1
+    now[0] += 0.5
+    scheduler.acquire('a')
+    assert scheduler.stats()['a']['requests'] == 3
+
+
+class Client:
+    def __init__(self):
+        self.value = 1
+
+    def search(self, q):
+        return q
+
+
+def test_scheduled_client_waits_for_every_call():
+    scheduler = FairScheduler(1000)
+    client = ScheduledClient(Client(), scheduler, 'a')
+
+    assert client.search('x') == 'x'
+    assert client.value == 1
+    client.value = 2
+    assert client._client.value == 2
+    assert scheduler.stats() == {'a': {'requests': 1, 'wait_seconds': scheduler.wait_seconds['a']}}
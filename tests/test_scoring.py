@@ -0,0 +1,45 @@
+import difflib
+import random
+
+import pytest
+
+from musiclikessync.scoring import DifflibScorer, get_scorer, weighted_scores
+
+
+def random_strings(seed, count):
+    rng = random.Random(seed)
+    return [''.join(rng.choice('abc de') for _ in range(rng.randint(0, 12))) for _ in range(count)]
+
+
+def ratio(a, b):
+    return difflib.SequenceMatcher(None, a, b).ratio()
+
+
+def test_difflib_scorer_reproduces_historical_weighting():
+    titles, artists, albums = random_strings(1, 50), random_strings(2, 50), random_strings(3, 50)
+    scorer = DifflibScorer()
+
+    without_album = weighted_scores(scorer, 'abc', titles, 'de', artists)
+    with_album = weighted_scores(scorer, 'abc', titles, 'de', artists, 'ab d', albums)
+
+    assert without_album == [0.5 * ratio('abc', t) + 0.5 * ratio('de', a) for t, a in zip(titles, artists)]
+    assert with_album == [0.4 * ratio('abc', t) + 0.4 * ratio('de', a) + 0.2 * ratio('ab d', al)
+                          for t, a, al in zip(titles, artists, albums)]
+
+
+def test_rapidfuzz_scores_track_difflib():
+    pytest.importorskip('rapidfuzz')
+    candidates = random_strings(4, 200) + ['abc de', '']
+    fast = get_scorer('rapidfuzz').ratios('abc de', candidates)
+    exact = DifflibScorer().ratios('abc de', candidates)
+
+    assert len(fast) == len(exact)
+    assert all(f >= e - 1e-12 for f, e in zip(fast, exact))
+    assert fast[-2] == exact[-2] == 1.0
+
+
+def test_unknown_engine_is_rejected():
+    assert get_scorer('difflib').name == 'difflib'
+    assert get_scorer('auto').name in ('difflib', 'rapidfuzz')
+    with pytest.raises(ValueError):
+        get_scorer('levenshtein')
@@ -0,0 +1,60 @@
+from fake_spotify_server import fake_track
+from musiclikessync.search_cache import SearchCache
+from musiclikessync.search_executor import SearchExecutor
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_round_trip_keeps_matching_fields_only(tmp_path):
+    cache = SearchCache(str(tmp_path / 'search.sqlite'))
+    track = dict(fake_track('track:song', 0), popularity=42, available_markets=['IL'])
+    cache.put('track:song', 50, {'tracks': {'items': [track]}})
+
+    cached = cache.get('track:song', 50)
+    assert cached == {'tracks': {'items': [fake_track('track:song', 0)]}}
+    assert cache.get('track:song', 10) is None
+    assert cache.stats()['hits'] == 1
+
+
+def test_entries_survive_reopen(tmp_path):
+    path = str(tmp_path / 'search.sqlite')
+    SearchCache(path).put('track:song', 50, {'tracks': {'items': [fake_track('track:song', 0)]}})
+    assert SearchCache(path).get('track:song', 50)['tracks']['items'][0]['name'] == 'track:song #0'
+
+
+def test_negative_results_use_their_own_ttl():
+    clock = Clock()
+    cache = SearchCache(':memory:', ttl=100, negative_ttl=10, clock=clock)
+    cache.put('track:missing', 50, {'tracks': {'items': []}})
+    cache.put('track:found', 50, {'tracks': {'items': [fake_track('track:found', 0)]}})
+
+    assert cache.get('track:missing', 50) == {'tracks': {'items': []}}
+    assert cache.stats()['negative_hits'] == 1
+
+    clock.now += 50
+    assert cache.get('track:missing', 50) is None
+    assert cache.get('track:found', 50) is not None
+    assert cache.purge_expired() == 1
+    assert len(cache) == 1
+
+
+def test_executor_skips_api_for_cached_queries():
+    calls = []
+
+    def search(q, limit, type):
+        calls.append(q)
+        return {'tracks': {'items': [fake_track(q, 0)] if q != 'track:none' else []}}
+
+    cache = SearchCache(':memory:')
+    queries = ['track:a', 'track:none', 'track:b']
+    first = SearchExecutor(search, max_workers=2, requests_per_second=1000, cache=cache).search_all(queries)
+    second = SearchExecutor(search, max_workers=2, requests_per_second=1000, cache=cache).search_all(queries)
+
+    assert sorted(calls) == sorted(queries)
+    assert first == second
@@ -0,0 +1,101 @@
+import pytest
+
+from fake_spotify_server import FakeSpotifyServer, spotify_client_for
+from musiclikessync.search_executor import SearchExecutor, TokenBucket, retry_after_seconds
+from musiclikessync.transport import Transport
+
+
+@pytest.fixture
+def client_for(tmp_path, monkeypatch):
+    """Build clients as the pipeline does, on a shared transport, in tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    transport = Transport(pool_maxsize=8)
+    yield lambda server: spotify_client_for(server, transport)
+    transport.close()
+
+
+class RecordingBucket(TokenBucket):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pauses = []
+
+    def pause(self, seconds):
+        self.pauses.append(seconds)
+        super().pause(seconds)
+
+
+def test_results_keep_query_order_under_concurrency(client_for):
+    queries = [f'track:song {i} artist:band {i % 7}' for i in range(40)]
+    with FakeSpotifyServer(latency=0.01) as server:
+        executor = SearchExecutor(client_for(server).search, max_workers=8, requests_per_second=1000)
+        results = executor.search_all(queries, limit=50)
+
+    assert [r['tracks']['items'][0]['name'] for r in results] == [f'{q} #0' for q in queries]
+    assert len(server.requests) == 40
+    assert 1 < server.max_active <= 8
+
+
+def test_rate_limited_requests_pause_the_bucket_for_retry_after(client_for):
+    queries = [f'track:song {i}' for i in range(12)]
+    bucket = RecordingBucket(1000, 4)
+    with FakeSpotifyServer(rate_limit_every=4, retry_after='0.2') as server:
+        executor = SearchExecutor(client_for(server).search, max_workers=4, limiter=bucket)
+        results = executor.search_all(queries, limit=5)
+
+    assert [r['tracks']['items'][0]['name'] for r in results] == [f'{q} #0' for q in queries]
+    assert server.rate_limited > 0
+    assert executor.stats()['rate_limited'] == server.rate_limited
+    assert bucket.pauses == [0.2] * server.rate_limited
+
+
+def test_non_retryable_errors_are_raised():
+    class NotFound(Exception):
+        http_status = 404
+
+    def search(q, limit, type):
+        raise NotFound(q)
+
+    executor = SearchExecutor(search, max_workers=1, requests_per_second=1000)
+    with pytest.raises(NotFound):
+        executor.search('track:x')
+    assert executor.stats() == {'calls': 1, 'retries': 0, 'rate_limited': 0}
+
+
+def test_retries_with_backoff_then_gives_up():
+    class Unavailable(Exception):
+        http_status = 503
+
+    sleeps = []
+
+    def search(q, limit, type):
+        raise Unavailable(q)
+
+    executor = SearchExecutor(search, max_workers=1, requests_per_second=1000, max_retries=3,
+                              backoff=0.5, sleep=sleeps.append)
+    with pytest.raises(Unavailable):
+        executor.search('track:x')
+    assert sleeps == [0.5, 1.0, 2.0]
+
+
+def test_token_bucket_pause_blocks_until_retry_after():
+    now = [0.0]
+    waits = []
+
+    def sleep(seconds):
+        waits.append(seconds)
+        now[0] += seconds
+
+    bucket = TokenBucket(rate=10, capacity=1, clock=lambda: now[0], sleep=sleep)
+    bucket.acquire()
+    bucket.pause(3)
+    bucket.acquire()
+    assert now[0] >= 3
+    assert waits[0] == pytest.approx(3)
+
+
+def test_retry_after_seconds_reads_header():
+    class Error(Exception):
+        headers = {'Retry-After': '7'}
+
+    assert retry_after_seconds(Error()) == 7.0
+    assert retry_after_seconds(Exception()) is None
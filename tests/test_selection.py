@@ -0,0 +1,133 @@
+import random
+
+import pytest
+
+from musiclikessync import config, context
+from musiclikessync.matching import _score_items
+from musiclikessync.results import SongResult
+from musiclikessync.scoring import DifflibScorer, QueryScorer, get_scorer, ratio_bound, weighted_bound, weighted_scores
+from musiclikessync.selection import TopK, match_status, reselect_matches, score_top_k
+from musiclikessync.translation import ArtistDictionary, ArtistTranslator, StubTranslationBackend
+
+
+def random_strings(seed, count):
+    rng = random.Random(seed)
+    return [''.join(rng.choice('abc de') for _ in range(rng.randint(0, 12))) for _ in range(count)]
+
+
+def test_top_k_keeps_the_best_and_prefers_lower_positions_on_ties():
+    top = TopK(2)
+    for score, position in [(0.5, 0), (0.9, 1), (0.7, 2), (0.9, 3), (0.9, 4)]:
+        top.push(score, position)
+
+    assert top.positions() == [1, 3]
+    assert not top.admits(0.9, 5)
+    assert top.admits(0.9, 2)
+    assert top.admits(0.95, 9)
+
+
+@pytest.mark.parametrize('engine', ['difflib', 'rapidfuzz'])
+def test_ratio_bounds_are_never_below_the_ratios(engine):
+    if engine == 'rapidfuzz':
+        pytest.importorskip('rapidfuzz')
+    scorer = get_scorer(engine)
+    candidates = random_strings(1, 300) + ['']
+    for query in ['abc de', 'a', '']:
+        for candidate, ratio in zip(candidates, scorer.ratios(query, candidates)):
+            assert ratio <= ratio_bound(query, candidate)
+    assert ratio_bound('abc', 'abcdef') < 0.7
+
+
+def test_query_scorer_matches_weighted_scores_and_its_bounds():
+    scorer = DifflibScorer()
+    titles, artists, albums = random_strings(2, 60), random_strings(3, 60), random_strings(4, 60)
+    query = ('abc', 'de', 'ab d')
+    query_scorer = QueryScorer(scorer, query)
+
+    scores = query_scorer.scores(list(zip(titles[:20], artists[:20], albums[:20])))
+    scores += query_scorer.scores(list(zip(titles[20:], artists[20:], albums[20:])))
+
+    assert scores == weighted_scores(scorer, 'abc', titles, 'de', artists, 'ab d', albums)
+    assert all(score <= weighted_bound(query, candidate) for score, candidate in zip(scores, zip(titles, artists, albums)))
+    assert QueryScorer(scorer, ('abc', 'de', None)).scores([('abc', 'de', None)]) == [1.0]
+
+
+def test_score_top_k_finds_the_k_best_without_scoring_everything():
+    rng = random.Random(5)
+    scores = [rng.random() for _ in range(200)]
+    # Tight bounds let most items be skipped
+    candidates = [(min(1.0, score + 0.05), position) for position, score in enumerate(scores)]
+    scored_positions = []
+
+    def score_batch(positions):
+        scored_positions.extend(positions)
+        return [scores[position] for position in positions]
+
+    found = score_top_k(candidates, score_batch, 5)
+
+    best = sorted(range(200), key=lambda position: -scores[position])[:5]
+    top = TopK(5)
+    for position, score in found.items():
+        top.push(score, position)
+    assert top.positions() == best
+    assert len(scored_positions) == len(found) < 60
+
+
+def test_score_top_k_keeps_items_scored_before():
+    found = score_top_k([(0.5, 1), (0.4, 2)], lambda positions: [0.3 for _ in positions], 1, scored=[(0.6, 0)])
+    assert found == {}
+
+
+def test_reselect_changes_only_searched_matches():
+    matches = [
+        {'best_variant': {'similarity_score': 0.85}, 'status': 'selected', 'reason': 'High similarity score',
+         'candidates': [{'similarity_score': 0.85}]},
+        {'best_variant': {'similarity_score': 1.0}, 'status': 'selected', 'reason': 'Resolved by track identity'},
+        {'best_variant': {'similarity_score': 0.7}, 'status': 'not selected', 'reason': 'No match above threshold',
+         'candidates': [{'similarity_score': 0.7}]},
+    ]
+
+    reselect_matches(matches, 0.9)
+    assert [match['status'] for match in matches] == ['not selected', 'selected', 'not selected']
+
+    reselect_matches(matches, 0.6)
+    assert [match['status'] for match in matches] == ['selected', 'selected', 'selected']
+    assert match_status(0.8, 0.8) == ('not selected', 'High similarity score')
+
+
+@pytest.fixture
+def difflib_context(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'NORMALIZATION_CACHE_PATH', str(tmp_path / 'normalization_cache.sqlite'))
+    context.scorer = DifflibScorer()
+    context.artist_translator = ArtistTranslator(StubTranslationBackend(), ArtistDictionary(path=None))
+    yield
+    context.close()
+
+
+def test_pruned_scoring_selects_the_same_variants(difflib_context):
+    rng = random.Random(6)
+    words = ['love', 'night', 'dance', 'heart', 'fire', 'remix', 'live', 'karaoke version', 'tribute']
+
+    def phrase(count):
+        return ' '.join(rng.choice(words) for _ in range(count))
+
+    def songs():
+        song_results = []
+        for song in range(20):
+            song_result = SongResult(f'song {song}', 'band', 'Unknown Album', phrase(2), phrase(1), 'Unknown Album')
+            song_result.add_tracks([{'id': f'{song}-{track}', 'name': phrase(rng.randint(1, 6)),
+                                     'artists': [{'name': phrase(rng.randint(1, 3))}], 'album': {'name': ''}}
+                                    for track in range(40)])
+            song_results.append(song_result)
+        return song_results
+
+    state = rng.getstate()
+    pruned = _score_items(songs(), k=3)
+    rng.setstate(state)
+    complete = _score_items(songs(), k=100)
+
+    assert all(variant.similarity_score is not None for song_result in complete for variant in song_result.variants)
+    assert sum(variant.similarity_score is None for song_result in pruned for variant in song_result.variants) > 100
+    for pruned_result, complete_result in zip(pruned, complete):
+        assert ([variant.spotify_id for variant in pruned_result.best_variants(3)]
+                == [variant.spotify_id for variant in complete_result.best_variants(3)])
@@ -0,0 +1,90 @@
+from musiclikessync.incremental import fetch_new_spotify_likes, fetch_new_youtube_likes
+from musiclikessync.state_store import SyncStateStore, song_key
+
+
+def yt_track(video_id, title):
+    return {'videoId': video_id, 'title': title, 'artists': [{'name': 'band'}], 'album': {'name': 'album'}}
+
+
+class FakeYTMusic:
+    def __init__(self, tracks):
+        self.tracks = tracks
+        self.limits = []
+
+    def get_liked_songs(self, limit=100):
+        self.limits.append(limit)
+        return {'tracks': self.tracks[:limit]}
+
+
+def saved_item(track_id, added_at):
+    return {'added_at': added_at, 'track': {'id': track_id, 'name': track_id, 'artists': [{'name': 'band'}],
+                                            'album': {'name': 'album'}}}
+
+
+class FakeSpotify:
+    def __init__(self, items):
+        self.items = items
+        self.calls = 0
+
+    def current_user_saved_tracks(self, limit=20, offset=0):
+        self.calls += 1
+        page = self.items[offset:offset + limit]
+        has_next = offset + limit < len(self.items)
+        return {'items': page, 'next': 'next' if has_next else None}
+
+
+def test_pending_likes_and_outcomes():
+    store = SyncStateStore(':memory:')
+    songs = [{'title': 'a', 'artist': 'x', 'album': 'y', 'videoId': 'v1'},
+             {'title': 'b', 'artist': 'x', 'album': 'y', 'videoId': None}]
+
+    assert store.record_youtube_likes(songs) == songs
+    assert store.record_youtube_likes(songs) == []
+    assert store.known_song_keys() == {'v1', 'b\x1fx\x1fy'}
+    assert store.pending_youtube_likes() == songs
+
+    store.record_outcomes({'v1': ('added', 'sp1'), song_key(songs[1]): ('failed', None)})
+    assert store.outcome('v1') == ('added', 'sp1')
+    assert store.pending_youtube_likes() == [songs[1]]
+    assert store.stats() == {'added': 1, 'failed': 1, 'spotify_likes': 0}
+
+
+def test_state_persists_between_runs(tmp_path):
+    path = str(tmp_path / 'state.sqlite')
+    store = SyncStateStore(path)
+    store.record_spotify_likes([{'spotify_id': 'sp1', 'title': 't', 'artist': 'a', 'album': 'b',
+                                 'added_at': '2024-01-01T00:00:00Z'}])
+    store.set_cursor('spotify_added_at', '2024-01-01T00:00:00Z')
+    store.close()
+
+    reopened = SyncStateStore(path)
+    assert reopened.get_cursor('spotify_added_at') == '2024-01-01T00:00:00Z'
+    assert reopened.get_cursor('missing', 'default') == 'default'
+    assert [track['spotify_id'] for track in reopened.spotify_likes()] == ['sp1']
+
+
+def test_fetch_new_youtube_likes_stops_at_known_like():
+    ytmusic = FakeYTMusic([yt_track(f'v{i}', f'song {i}') for i in range(10)])
+
+    new_songs = fetch_new_youtube_likes(ytmusic, {'v6'}, initial_limit=2, growth=2)
+
+    assert [song['videoId'] for song in new_songs] == ['v0', 'v1', 'v2', 'v3', 'v4', 'v5']
+    assert ytmusic.limits == [2, 4, 8]
+
+
+def test_fetch_new_youtube_likes_returns_everything_on_first_sync():
+    ytmusic = FakeYTMusic([yt_track(f'v{i}', f'song {i}') for i in range(5)])
+
+    assert len(fetch_new_youtube_likes(ytmusic, set(), initial_limit=2, growth=2)) == 5
+    assert ytmusic.limits == [2, 4, 8]
+
+
+def test_fetch_new_spotify_likes_stops_at_cursor():
+    items = [saved_item(f'sp{i}', f'2024-01-{20 - i:02d}T00:00:00Z') for i in range(10)]
+    sp = FakeSpotify(items)
+
+    new_tracks = fetch_new_spotify_likes(sp, since='2024-01-15T00:00:00Z', page_size=3)
+
+    assert [track['spotify_id'] for track in new_tracks] == ['sp0', 'sp1', 'sp2', 'sp3', 'sp4', 'sp5']
+    assert sp.calls == 3
+    assert len(fetch_new_spotify_likes(FakeSpotify(items), page_size=3)) == 10
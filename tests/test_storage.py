@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+from musiclikessync.storage import JsonLinesStore, JsonStore, ParquetStore, open_store
+
+RECORDS = [
+    {'title': 'Song', 'artist': 'Band', 'variants': [{'spotify_id': 'a', 'similarity_score': 0.5}]},
+    {'title': 'Песня', 'artist': 'Группа', 'variants': []},
+]
+
+
+@pytest.mark.parametrize('store_class', [JsonStore, JsonLinesStore])
+def test_write_append_and_read(tmp_path, store_class):
+    store = store_class(str(tmp_path / 'data' / 'results'))
+    assert not store.exists()
+    assert len(store) == 0
+
+    store.write(iter(RECORDS))
+    store.append([{'title': 'Third', 'artist': 'Band', 'variants': []}])
+
+    assert store.read() == RECORDS + [{'title': 'Third', 'artist': 'Band', 'variants': []}]
+    assert len(store) == 3
+    assert list(store.read_frame(columns=['title'])['title']) == ['Song', 'Песня', 'Third']
+
+
+@pytest.mark.parametrize('store_class', [JsonStore, JsonLinesStore])
+def test_interrupted_write_keeps_the_old_data(tmp_path, store_class):
+    store = store_class(str(tmp_path / 'data' / 'results'))
+    store.write(RECORDS)
+
+    def interrupted():
+        yield RECORDS[0]
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        store.write(interrupted())
+    assert store.read() == RECORDS
+
+
+def test_jsonl_random_access_and_index_repair(tmp_path):
+    store = JsonLinesStore(str(tmp_path / 'log'))
+    store.write(RECORDS)
+    store.append([{'title': 'Third'}])
+
+    assert store[2] == {'title': 'Third'}
+    assert store[1]['artist'] == 'Группа'
+
+    # An append interrupted before its index entry and in the middle of a record
+    with open(store.path, 'ab') as f:
+        f.write(json.dumps({'title': 'Fourth'}).encode('utf-8') + b'\n{"title": "Fif')
+    reopened = JsonLinesStore(store.path[:-len('.jsonl')])
+    assert len(reopened) == 4
+    assert reopened[3] == {'title': 'Fourth'}
+
+    reopened.append([{'title': 'Fifth'}])
+    assert [record['title'] for record in reopened][2:] == ['Third', 'Fourth', 'Fifth']
+    assert reopened[4] == {'title': 'Fifth'}
+
+
+def test_open_store_migrates_legacy_json(tmp_path):
+    base_path = str(tmp_path / 'match_results')
+    with open(base_path + '.json', 'w', encoding='utf-8') as f:
+        json.dump(RECORDS, f, indent=4)
+
+    store = open_store(base_path, 'jsonl')
+
+    assert isinstance(store, JsonLinesStore)
+    assert store.read() == RECORDS
+    with pytest.raises(ValueError):
+        open_store(base_path, 'xml')
+
+
+def test_parquet_round_trip(tmp_path):
+    pytest.importorskip('pyarrow')
+    store = ParquetStore(str(tmp_path / 'results'))
+    store.write(RECORDS)
+    store.append([{'title': 'Third', 'artist': 'Band', 'variants': []}])
+
+    assert store.read()[:2] == RECORDS
+    assert len(store) == 3
+    assert list(store.read_frame(columns=['artist'])['artist']) == ['Band', 'Группа', 'Band']
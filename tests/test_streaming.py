@@ -0,0 +1,68 @@
+import threading
+import time
+
+import pytest
+
+from musiclikessync.streaming import background, batched, bounded_map
+
+
+def counting(items, consumed):
+    for item in items:
+        consumed.append(item)
+        yield item
+
+
+def test_batched():
+    assert list(batched(range(7), 3)) == [[0, 1, 2], [3, 4, 5], [6]]
+    assert list(batched([], 3)) == []
+
+
+def test_bounded_map_keeps_order_and_reads_ahead_only_max_pending():
+    consumed = []
+
+    def slow_square(x):
+        time.sleep(0.001 * (x % 3))
+        return x * x
+
+    results = bounded_map(slow_square, counting(range(100), consumed), max_workers=4, max_pending=5)
+    assert next(results) == 0
+    assert len(consumed) <= 6
+    assert list(results) == [x * x for x in range(1, 100)]
+
+
+def test_bounded_map_propagates_errors():
+    def fail_on_three(x):
+        if x == 3:
+            raise ValueError(x)
+        return x
+
+    with pytest.raises(ValueError):
+        list(bounded_map(fail_on_three, range(10), max_workers=2))
+
+
+def test_background_buffers_at_most_buffer_size_items():
+    consumed = []
+    stream = background(counting(range(1000), consumed), buffer_size=8)
+    assert next(stream) == 0
+    time.sleep(0.05)
+    assert len(consumed) <= 10
+    assert list(stream) == list(range(1, 1000))
+
+
+def test_background_reraises_upstream_errors():
+    def failing():
+        yield 1
+        raise RuntimeError('upstream')
+
+    stream = background(failing())
+    assert next(stream) == 1
+    with pytest.raises(RuntimeError, match='upstream'):
+        next(stream)
+
+
+def test_closing_background_stops_the_producer():
+    threads_before = threading.active_count()
+    stream = background(iter(range(10 ** 6)), buffer_size=2)
+    assert next(stream) == 0
+    stream.close()
+    assert threading.active_count() == threads_before
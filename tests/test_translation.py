@@ -0,0 +1,42 @@
+from musiclikessync.translation import ArtistDictionary, ArtistTranslator, StubTranslationBackend
+
+
+def test_prefetch_batches_unknown_names_per_language(tmp_path):
+    backend = StubTranslationBackend({'שלום': 'shalom', 'zemfira': 'Zemfira'})
+    dictionary = ArtistDictionary(str(tmp_path / 'artists.json'))
+    translator = ArtistTranslator(backend, dictionary, batch_size=2)
+
+    translated = translator.prefetch([
+        ('he', 'שלום'), ('he', 'שלום'), ('he', 'עומר'), ('he', 'אדם'),
+        ('ru', 'zemfira'), ('en', 'Muse'),
+    ])
+
+    assert translated == 4
+    assert [language for language, _ in backend.batches] == ['he', 'he', 'ru']
+    assert sum(len(texts) for _, texts in backend.batches) == 4
+    assert translator.translate('שלום', 'he') == 'shalom'
+    assert translator.translate('Muse', 'en') == 'Muse'
+
+
+def test_dictionary_persists_so_reruns_need_no_backend_calls(tmp_path):
+    path = str(tmp_path / 'artists.json')
+    first = ArtistTranslator(StubTranslationBackend({'zemfira': 'Zemfira'}), ArtistDictionary(path))
+    first.prefetch([('ru', 'zemfira')])
+
+    backend = StubTranslationBackend()
+    second = ArtistTranslator(backend, ArtistDictionary(path))
+    second.prefetch([('ru', 'zemfira')])
+
+    assert second.translate('zemfira', 'ru') == 'Zemfira'
+    assert backend.batches == []
+    assert second.stats()['dictionary_hits'] == 1
+
+
+def test_failed_batch_is_left_for_later():
+    class FailingBackend:
+        def translate_batch(self, texts, language_code):
+            raise RuntimeError('offline')
+
+    translator = ArtistTranslator(FailingBackend(), ArtistDictionary(path=None))
+    assert translator.prefetch([('he', 'שלום')]) == 0
+    assert ('he', 'שלום') not in translator.dictionary
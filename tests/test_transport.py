@@ -0,0 +1,119 @@
+import html
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+import spotipy
+
+from fake_spotify_server import FakeSpotifyServer, spotify_client_for
+from musiclikessync.translation import GoogleTranslateBackend
+from musiclikessync.transport import Transport
+
+
+class FakeTranslatePage:
+    """Serve a Google Translate mobile page that upper-cases ``q``, counting connections."""
+
+    def __init__(self):
+        self.connections = 0
+        self.requests = 0
+        lock = threading.Lock()
+        page = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                with lock:
+                    page.connections += 1
+
+            def do_GET(self):
+                with lock:
+                    page.requests += 1
+                text = parse_qs(urlparse(self.path).query)['q'][0]
+                body = f'<html><div class="result-container">{html.escape(text.upper())}</div></html>'.encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f'http://{host}:{port}/m'
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def test_concurrent_searches_share_a_bounded_pool():
+    transport = Transport(pool_maxsize=4)
+    with FakeSpotifyServer(latency=0.01) as server:
+        sp = spotipy.Spotify(auth='token', requests_session=transport.session)
+        sp.prefix = server.url
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda i: sp.search(q=f'track:song {i}', limit=5), range(40)))
+        stats = transport.stats()
+        transport.close()
+
+    assert len(results) == 40 and len(server.requests) == 40
+    assert server.connections <= 4
+    assert server.max_active <= 4
+    assert stats['connections'] == server.connections
+    assert stats['requests'] == 40
+    assert stats['requests_per_connection'] >= 10
+
+
+def test_spotify_client_passes_rate_limits_on_and_retries_server_errors(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    transport = Transport()
+    with FakeSpotifyServer(rate_limit_every=3, retry_after='7', saved_tracks=100, failing_offsets={50}) as server:
+        sp = spotify_client_for(server, transport)
+        sp.search(q='track:a')
+        sp.search(q='track:b')
+        with pytest.raises(spotipy.SpotifyException) as rate_limited:
+            sp.search(q='track:c')
+        # Not retried by the session, and still carrying its Retry-After
+        assert len(server.requests) == 3
+        assert rate_limited.value.http_status == 429
+        assert rate_limited.value.headers['Retry-After'] == '7'
+
+        server.rate_limit_every = 0
+        with pytest.raises(spotipy.SpotifyException):
+            sp.current_user_saved_tracks(limit=50, offset=50)
+        transport.close()
+
+    # The 500 was retried by the session's retry policy
+    assert len(server.requests) == 3 + 4
+
+
+def test_translations_reuse_one_keep_alive_connection():
+    transport = Transport(pool_maxsize=2)
+    with FakeTranslatePage() as page:
+        backend = GoogleTranslateBackend(max_chars=12, session=transport.session, url=page.url)
+        translations = backend.translate_batch(['שלום', 'zemfira', 'mumiy troll', 'splin'], 'ru')
+        transport.close()
+
+    assert translations == ['שלום', 'ZEMFIRA', 'MUMIY TROLL', 'SPLIN']
+    assert page.requests > 1
+    assert page.connections == 1
+
+
+def test_stats_of_an_unused_transport():
+    transport = Transport()
+    assert transport.stats() == {'connections': 0, 'requests': 0, 'requests_per_connection': 0.0}
+    transport.close()